@@ -0,0 +1,546 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the buyer-scoring hot paths (synthetic buyers from generate_buyers.py).
+
+Usage:
+  python3 python_ml/benchmarks.py interval [--sizes 10000,100000,1000000] [--queries 200]
+  python3 python_ml/benchmarks.py memory [--sizes 100000,1000000]
+  python3 python_ml/benchmarks.py shards [--sizes 1000000] [--procs 1,2,4,8] [--deals 5] [--top-k 50]
+  python3 python_ml/benchmarks.py shared [--buyers 1000000] [--workers 1,2,4,8]
+  python3 python_ml/benchmarks.py microbatch [--clients 32] [--requests 50] [--windows 0,2,5]
+  python3 python_ml/benchmarks.py retrieval [--sizes 100000,1000000] [--deals 20] [--top-k 50] [--budgets 0,20000,5000]
+  python3 python_ml/benchmarks.py train [--sizes 10000,1000000,10000000] [--epochs 1] [--sgd-max 100000]
+  python3 python_ml/benchmarks.py stream [--sizes 100000,1000000,3000000] [--epochs 2] [--chunk-rows 65536]
+  python3 python_ml/benchmarks.py cache [--sizes 100000,1000000,5000000]
+  python3 python_ml/benchmarks.py search [--sizes 100000,1000000] [--procs 1,2,4,8]
+
+Each benchmark checks its fast path against the reference path before timing it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import math
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np  # type: ignore
+
+import buyer_index
+import generate_buyers
+import generate_csv
+import infer
+import train
+from interval_index import IntervalIndex
+
+
+def synthetic_buyers(n: int, seed: int = 7) -> List[Dict[str, Any]]:
+    random.seed(seed)
+    return [generate_buyers.generate_buyer(i + 1) for i in range(n)]
+
+
+def synthetic_values(n: int, lo: float, hi: float, seed: int = 11) -> List[float]:
+    # log-uniform, like deal sizes / EBITDA across the mid-market
+    rng = random.Random(seed)
+    return [math.exp(rng.uniform(math.log(lo), math.log(hi))) for _ in range(n)]
+
+
+def best_of(fn: Callable[[], Any], repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def bench_interval(sizes: List[int], queries: int) -> None:
+    print(f"{'buyers':>9} {'band':>9} {'build_ms':>9} {'avg_k':>9} {'scan_us':>9} {'tree_us':>9} {'mask_us':>9}")
+    for n in sizes:
+        index = buyer_index.compile_buyers(synthetic_buyers(n))
+        for name, (lo_key, hi_key, lo_v, hi_v) in {
+            "sizeFit": ("minDealSize", "maxDealSize", 5e6, 1e9),
+            "ebitdaFit": ("minEbitda", "maxEbitda", 5e5, 1e8),
+        }.items():
+            lo, hi = index.numeric[lo_key], index.numeric[hi_key]
+            t0 = time.perf_counter()
+            tree = IntervalIndex(lo, hi)
+            build_ms = (time.perf_counter() - t0) * 1e3
+
+            values = synthetic_values(queries, lo_v, hi_v)
+            ks = []
+            for v in values:
+                ref = np.flatnonzero(infer.interval_fit(v, lo, hi))
+                got = np.sort(tree.query(v))
+                if not np.array_equal(ref, got):
+                    raise AssertionError(f"interval index mismatch at n={n} {name} value={v}")
+                ks.append(len(got))
+
+            scan = best_of(lambda: [np.flatnonzero(infer.interval_fit(v, lo, hi)) for v in values])
+            query = best_of(lambda: [tree.query(v) for v in values])
+            mask = best_of(lambda: [tree.contains_mask(v) for v in values])
+            print(
+                f"{n:>9} {name:>9} {build_ms:>9.1f} {sum(ks) / len(ks):>9.0f} "
+                f"{scan / queries * 1e6:>9.1f} {query / queries * 1e6:>9.1f} {mask / queries * 1e6:>9.1f}"
+            )
+
+
+def traced(fn: Callable[[], Any]) -> Tuple[Any, int, int]:
+    """
+    (result, bytes still allocated while the result is alive, peak bytes during fn); numpy reports
+    its buffers to tracemalloc, so arrays and Python objects are both counted.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = fn()
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, current, peak
+
+
+def bench_memory(sizes: List[int]) -> None:
+    print(f"{'buyers':>9} {'representation':<34} {'B/buyer':>9} {'peak B/buyer':>13}")
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "buyers.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"buyerDbVersion": "bench", "buyers": synthetic_buyers(n)}, f)
+            gc.collect()
+
+            def load_dicts() -> Any:
+                with open(path, "r", encoding="utf-8") as f:
+                    return json.load(f)["buyers"]
+
+            def load_npz() -> Any:
+                return buyer_index.load_index(npz_path)
+
+            index, _, _ = traced(lambda: buyer_index.compile_buyers_json(path))
+            npz_path = buyer_index.index_cache_path(path)
+            buyer_index.save_index(index, npz_path)
+            del index
+            for label, fn in [
+                ("buyers.json dicts (json.load)", load_dicts),
+                ("generate_csv.Buyer (load_buyer_db)", lambda: generate_csv.load_buyer_db(path)),
+                ("BuyerIndex (compile_buyers_json)", lambda: buyer_index.compile_buyers_json(path)),
+                ("BuyerIndex (load_index, .npz)", load_npz),
+            ]:
+                result, current, peak = traced(fn)
+                print(f"{n:>9} {label:<34} {current / n:>9.0f} {peak / n:>13.0f}")
+                del result
+        if n:
+            index = buyer_index.compile_buyers(synthetic_buyers(min(n, 1000)))
+            cols = ", ".join(f"{k}={v.dtype}" for k, v in index.numeric.items())
+            masks = f"sector={index.sector_bits.dtype} geo={index.geo_bits.dtype} tag={index.tag_bits.dtype}"
+            print(f"{'':>9} columns: {cols}; masks: {masks}")
+
+
+def synthetic_deals(n: int, seed: int = 17) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [
+        {
+            "sector": rng.choice(generate_buyers.SECTORS),
+            "geography": rng.choice(generate_buyers.GEOS),
+            "dealSize": math.exp(rng.uniform(math.log(5e6), math.log(1e9))),
+            "ebitda": math.exp(rng.uniform(math.log(5e5), math.log(1e8))),
+        }
+        for _ in range(n)
+    ]
+
+
+def bench_shards(sizes: List[int], procs: List[int], deals: int, top_k: int) -> None:
+    # every repeat must re-score, and small sizes must shard too
+    os.environ["INFER_CACHE_MB"] = "0"
+    os.environ["INFER_SHARD_MIN"] = "0"
+    model = infer.load_model()
+    deal_list = synthetic_deals(deals)
+    print(f"{'buyers':>9} {'procs':>6} {'ms/deal':>9} {'speedup':>8}")
+    for n in sizes:
+        index = buyer_index.compile_buyers(synthetic_buyers(n))
+        refs = [infer.score_indexed(model, d, index, top_k).to_columns() for d in deal_list]
+        single = 0.0
+        for p in procs:
+            os.environ["INFER_PROCS"] = str(p)
+            pool = infer.get_shard_pool(index)  # None for p < 2: in-process scoring
+            for deal, ref in zip(deal_list, refs):
+                if infer.score_indexed(model, deal, index, top_k, None, pool).to_columns() != ref:
+                    raise AssertionError(f"sharded top-K mismatch at n={n} procs={p}")
+            elapsed = best_of(lambda: [infer.score_indexed(model, d, index, top_k, None, pool) for d in deal_list])
+            single = single or elapsed
+            print(f"{n:>9} {p:>6} {elapsed / deals * 1e3:>9.1f} {single / elapsed:>7.2f}x")
+
+
+def process_memory(pid: int) -> Tuple[int, int]:
+    """
+    (Pss, private bytes) of a process from /proc/<pid>/smaps_rollup (Linux). Pss splits shared pages
+    evenly between the processes mapping them, so summing it over workers counts them once.
+    """
+    fields: Dict[str, int] = {}
+    with open(f"/proc/{pid}/smaps_rollup", "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    return fields.get("Pss", 0), fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+
+
+def hold_index(mode: str, path: str, ready: Any, done: Any) -> None:
+    # worker stand-in: load the buyer DB, touch every column + id once like whole-universe scoring
+    if mode == "shared":
+        index = buyer_index.attach_shared(buyer_index.default_shared_root(path))
+    elif mode == "npz":
+        index = buyer_index.load_index(buyer_index.index_cache_path(path))
+    else:
+        index = None
+    if index is not None:
+        infer.build_feature_matrix_indexed(synthetic_deals(1)[0], index)
+        buyer_index.take_ids(index.ids, np.arange(len(index)))
+        index.rows_for_ids([index.ids[0]])
+    gc.collect()
+    ready.put(os.getpid())
+    done.wait()
+
+
+def bench_shared(n: int, workers: List[int]) -> None:
+    ctx = multiprocessing.get_context("spawn")  # fork would share the parent's pages either way
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "buyers.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"buyerDbVersion": "bench", "buyers": synthetic_buyers(n)}, f)
+        buyer_index.refresh_shared(path, buyer_index.default_shared_root(path))  # also writes the .npz
+        print(f"{'mode':>7} {'workers':>8} {'private MB/worker':>18} {'total Pss MB':>13}")
+        for mode in ("none", "npz", "shared"):
+            for w in workers:
+                ready, done = ctx.Queue(), ctx.Event()
+                procs = [ctx.Process(target=hold_index, args=(mode, path, ready, done)) for _ in range(w)]
+                for p in procs:
+                    p.start()
+                pids = [ready.get() for _ in procs]
+                mems = [process_memory(pid) for pid in pids]
+                done.set()
+                for p in procs:
+                    p.join()
+                pss = sum(m[0] for m in mems) / 2**20
+                private = sum(m[1] for m in mems) / len(mems) / 2**20
+                print(f"{mode:>7} {w:>8} {private:>18.1f} {pss:>13.1f}")
+
+
+def socket_client(path: str, lines: List[bytes], latencies: List[float]) -> None:
+    # one connection, requests sent back to back (each waits for its response line)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        rfile = sock.makefile("rb")
+        for line in lines:
+            t0 = time.perf_counter()
+            sock.sendall(line)
+            rfile.readline()
+            latencies.append(time.perf_counter() - t0)
+
+
+def bench_microbatch(clients: int, requests: int, windows: List[float]) -> None:
+    """
+    Burst load against `infer.py --socket` over the real buyer DB: `clients` connections each send
+    `requests` distinct universe top-K requests. Window 0 is the thread-per-connection server.
+    """
+    deals = synthetic_deals(clients * requests)
+    infer_py = os.path.join(os.path.dirname(os.path.abspath(__file__)), "infer.py")
+    print(f"{'window_ms':>9} {'req/s':>8} {'p50_ms':>8} {'p99_ms':>8}")
+    for window in windows:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "infer.sock")
+            env = {**os.environ, "INFER_MICROBATCH_MS": str(window), "INFER_CACHE_MB": "0"}
+            proc = subprocess.Popen([sys.executable, infer_py, "--socket", path], env=env, stderr=subprocess.DEVNULL)
+            try:
+                while not os.path.exists(path):
+                    time.sleep(0.05)
+                warm: List[float] = []
+                socket_client(path, [b'{"op": "ping"}\n'], warm)
+                latencies: List[float] = []
+                threads = []
+                for c in range(clients):
+                    lines = [
+                        (json.dumps({"id": f"{c}-{i}", "deal": d, "universe": True, "topK": 10}) + "\n").encode("utf-8")
+                        for i, d in enumerate(deals[c * requests : (c + 1) * requests])
+                    ]
+                    threads.append(threading.Thread(target=socket_client, args=(path, lines, latencies)))
+                t0 = time.perf_counter()
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+                elapsed = time.perf_counter() - t0
+            finally:
+                proc.terminate()
+                proc.wait()
+        lat = np.sort(np.asarray(latencies)) * 1e3
+        print(
+            f"{window:>9g} {len(lat) / elapsed:>8.0f} {lat[len(lat) // 2]:>8.2f} {lat[int(len(lat) * 0.99)]:>8.2f}"
+        )
+
+def bench_retrieval(sizes: List[int], deals: int, top_k: int, budgets: List[int]) -> None:
+    """
+    Recall@K vs latency of cluster-pruned retrieval against exhaustive top-K. Budget 0 stops only
+    once the top K is proven (recall 1.0 for a linear model); smaller budgets trade recall for speed.
+    """
+    os.environ["INFER_CACHE_MB"] = "0"
+    os.environ["INFER_RETRIEVE_MIN"] = "0"
+    model = infer.load_model()
+    deal_list = synthetic_deals(deals)
+    print(f"{'buyers':>9} {'budget':>8} {'ms/deal':>9} {'speedup':>8} {'cand':>9} {'proven':>7} {'recall':>7}")
+    for n in sizes:
+        index = buyer_index.compile_buyers(synthetic_buyers(n))
+        t0 = time.perf_counter()
+        tree = infer.get_retriever(index)
+        print(f"{n:>9} cluster index: {len(tree)} clusters, built in {time.perf_counter() - t0:.2f}s")
+        refs = [set(infer.score_indexed(model, d, index, top_k).to_columns(False)["buyerIds"]) for d in deal_list]
+        exhaustive = best_of(lambda: [infer.score_indexed(model, d, index, top_k) for d in deal_list])
+        print(f"{n:>9} {'all':>8} {exhaustive / deals * 1e3:>9.1f} {1.0:>7.2f}x {n:>9} {'':>7} {1.0:>7.3f}")
+        for budget in budgets:
+            os.environ["INFER_RETRIEVE_BUDGET"] = str(budget)
+            results = [infer.score_retrieved(model, d, index, top_k) for d in deal_list]
+            found = [set(r.to_columns(False)["buyerIds"]) for r, _ in results]
+            recall = sum(len(ref & got) / max(1, len(ref)) for ref, got in zip(refs, found)) / deals
+            cand = sum(info["candidates"] for _, info in results) / deals
+            proven = sum(bool(info["proven"]) for _, info in results) / deals
+            elapsed = best_of(lambda: [infer.score_retrieved(model, d, index, top_k) for d in deal_list])
+            print(
+                f"{n:>9} {budget or 'proven':>8} {elapsed / deals * 1e3:>9.1f} {exhaustive / elapsed:>7.2f}x "
+                f"{cand:>9.0f} {proven:>7.0%} {recall:>7.3f}"
+            )
+
+def synthetic_training(n: int, seed: int = 7) -> Tuple[np.ndarray, np.ndarray]:
+    # vectorized train.build_synthetic_rows: same feature marginals and labeling rule
+    rng = np.random.default_rng(seed)
+    sector, geo, size, ebitda = (rng.random((4, n)) < np.array([[0.55], [0.65], [0.6], [0.55]])).astype(np.float64)
+    dry = rng.random(n) ** 0.6
+    activity = rng.random(n) ** 0.7
+    hard = sector + geo + size + ebitda
+    y = ((hard >= 3) & (dry >= 0.35)) | ((hard == 2) & (dry >= 0.75) & (activity >= 0.55))
+    y = np.where(rng.random(n) < 0.03, ~y, y).astype(np.float64)
+    return np.column_stack([sector, geo, size, dry, activity, ebitda]), y
+
+
+def log_loss(X: np.ndarray, y: np.ndarray, w: List[float], b: float) -> float:
+    z = X @ np.asarray(w) + b
+    return float(np.mean(np.logaddexp(0.0, z) - y * z))
+
+
+def bench_train(sizes: List[int], epochs: int, sgd_max: int) -> None:
+    """
+    Seconds per epoch: legacy per-row SGD vs NumPy mini-batch (train.py defaults), and the log loss
+    each reaches after `epochs` epochs. Above `sgd_max` rows the legacy loop is timed on its first
+    `sgd_max` rows and extrapolated linearly (marked *).
+    """
+    print(f"{'rows':>9} {'sgd_s/ep':>10} {'mb_s/ep':>9} {'speedup':>8} {'sgd_loss':>9} {'mb_loss':>8}")
+    for n in sizes:
+        X, y = synthetic_training(n)
+        m = min(n, sgd_max)
+        rows = [train.TrainingRow(x=x, y=int(t)) for x, t in zip(X[:m].tolist(), y[:m].tolist())]
+        t0 = time.perf_counter()
+        w, b = train.train_logistic_regression(rows, epochs=epochs)
+        sgd = (time.perf_counter() - t0) / epochs * n / m
+        sgd_loss = f"{log_loss(X, y, w, b):.4f}" if m == n else "-"
+        del rows
+        t0 = time.perf_counter()
+        w, b = train.train_logistic_regression_minibatch(X, y, epochs=epochs)
+        mb = (time.perf_counter() - t0) / epochs
+        sgd_s = f"{sgd:.2f}" + ("*" if m < n else "")
+        print(f"{n:>9} {sgd_s:>10} {mb:>9.3f} {sgd / mb:>7.0f}x {sgd_loss:>9} {log_loss(X, y, w, b):>8.4f}")
+
+def write_training_csv(path: str, n: int, chunk: int = 1000000) -> None:
+    # only the columns train.py reads; generated a chunk at a time so the writer stays small
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(",".join(train.FEATURE_NAMES + ["label"]) + "\n")
+        for start in range(0, n, chunk):
+            X, y = synthetic_training(min(chunk, n - start), seed=start)
+            np.savetxt(f, np.column_stack([X, y]), fmt="%.6g", delimiter=",")
+
+
+def train_in_child(mode: str, path: str, out: Any) -> None:
+    t0 = time.perf_counter()
+    if mode == "stream":
+        _, _, fields, _ = train.train_stream(path, 7)
+    else:
+        _, _, fields = train.train_dependency_free(train.load_rows_from_csv(path), 7)
+    history = fields["training"]["history"]  # type: ignore[index]
+    out.put((time.perf_counter() - t0, train.peak_rss_bytes() or 0, history[-1].get("valLoss")))
+
+
+def bench_stream(sizes: List[int], epochs: int, chunk_rows: int) -> None:
+    """
+    Peak RSS and wall time of training from a CSV: in-memory (load_rows_from_csv + mini-batch) vs
+    TRAIN_STREAM chunks, each in a fresh process, `epochs` epochs without early stopping.
+    """
+    os.environ.update({"TRAIN_EPOCHS": str(epochs), "TRAIN_PATIENCE": "0", "TRAIN_CHUNK_ROWS": str(chunk_rows)})
+    ctx = multiprocessing.get_context("spawn")  # a fresh interpreter per run, so peak RSS is its own
+    print(f"{'rows':>9} {'csv_MB':>7} {'mode':>7} {'seconds':>8} {'peak_MB':>8} {'val_loss':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            path = os.path.join(tmp, f"train_{n}.csv")
+            write_training_csv(path, n)
+            size_mb = os.path.getsize(path) / 2**20
+            for mode in ("memory", "stream"):
+                out = ctx.Queue()
+                proc = ctx.Process(target=train_in_child, args=(mode, path, out))
+                proc.start()
+                seconds, peak, val_loss = out.get()
+                proc.join()
+                print(f"{n:>9} {size_mb:>7.0f} {mode:>7} {seconds:>8.1f} {peak / 2**20:>8.0f} {val_loss:>9.4f}")
+            os.remove(path)
+
+def bench_cache(sizes: List[int]) -> None:
+    """
+    Loading the training matrix: CSV parse (train.iter_csv_chunks; pandas.read_csv when installed)
+    vs building the training cache once vs a cache hit (open the maps + one full pass over X).
+    """
+    import training_cache
+
+    try:
+        import pandas as pd  # type: ignore
+    except ImportError:
+        pd = None
+    print(f"{'rows':>9} {'csv_MB':>7} {'csv_s':>7} {'pandas_s':>9} {'build_s':>8} {'hit_s':>7} {'cache_MB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            path = os.path.join(tmp, f"train_{n}.csv")
+            write_training_csv(path, n)
+            t0 = time.perf_counter()
+            parsed = list(train.iter_csv_chunks(path))
+            csv_s = time.perf_counter() - t0
+            ref = np.concatenate([x for x, _ in parsed])
+            del parsed
+            pandas_s = best_of(lambda: pd.read_csv(path), repeat=1) if pd is not None else float("nan")
+            t0 = time.perf_counter()
+            training_cache.build_cache(path, train.FEATURE_NAMES, train.iter_csv_chunks(path))
+            build_s = time.perf_counter() - t0
+
+            def hit() -> None:
+                X, _, _ = training_cache.load_or_build(path, train.FEATURE_NAMES, lambda: iter([]))
+                X.sum()
+
+            X, _, info = training_cache.load_or_build(path, train.FEATURE_NAMES, lambda: iter([]))
+            if info["status"] != "hit" or not np.array_equal(X, ref):
+                raise AssertionError(f"training cache mismatch at n={n}")
+            cache_mb = sum(
+                os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(training_cache.cache_root(path)) for f in files
+            ) / 2**20
+            print(
+                f"{n:>9} {os.path.getsize(path) / 2**20:>7.0f} {csv_s:>7.2f} {pandas_s:>9.2f} {build_s:>8.2f} "
+                f"{best_of(hit):>7.3f} {cache_mb:>9.0f}"
+            )
+            del X, ref
+            os.remove(path)
+
+
+def bench_search(sizes: List[int], procs: List[int]) -> None:
+    """
+    TRAIN_SEARCH wall time vs worker count (grid from the TRAIN_SEARCH_* env, defaults 18 trials x
+    2 calibrations). Every worker count must produce the same leaderboard as the first.
+    """
+    print(f"cores={os.cpu_count()}")
+    print(f"{'rows':>9} {'procs':>6} {'trials':>7} {'wall_s':>8} {'trial_s':>8} {'speedup':>8}  best")
+    for n in sizes:
+        X, y = synthetic_training(n)
+        base_wall = 0.0
+        base_entries = None
+        for p in procs:
+            leaderboard, best = train.run_search(X, y, 7, p)
+            entries = [{k: v for k, v in e.items() if k != "trainSeconds"} for e in leaderboard["entries"]]
+            if base_entries is None:
+                base_wall, base_entries = leaderboard["wallSeconds"], entries
+            elif entries != base_entries:
+                raise AssertionError(f"leaderboard depends on procs at n={n} procs={p}")
+            print(
+                f"{n:>9} {leaderboard['procs']:>6} {leaderboard['trials']:>7} {leaderboard['wallSeconds']:>8.2f} "
+                f"{leaderboard['trialSeconds']:>8.2f} {base_wall / leaderboard['wallSeconds']:>7.2f}x  "
+                f"lr={best['learningRate']} l2={best['l2']} pw={best['posWeight']} {best['calibration']}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="buyer-scoring benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p_interval = sub.add_parser("interval", help="interval index vs linear band scan (sizeFit / ebitdaFit)")
+    p_interval.add_argument("--sizes", default="10000,100000,1000000")
+    p_interval.add_argument("--queries", type=int, default=200)
+
+    p_memory = sub.add_parser("memory", help="resident bytes per buyer: dicts vs Buyer records vs BuyerIndex")
+    p_memory.add_argument("--sizes", default="100000,1000000")
+
+    p_shards = sub.add_parser("shards", help="top-K over the whole universe: in-process vs N shard processes")
+    p_shards.add_argument("--sizes", default="1000000")
+    p_shards.add_argument("--procs", default="1,2,4,8")
+    p_shards.add_argument("--deals", type=int, default=5)
+    p_shards.add_argument("--top-k", type=int, default=50)
+
+    p_shared = sub.add_parser("shared", help="worker memory: per-process .npz index vs memory-mapped shared store")
+    p_shared.add_argument("--buyers", type=int, default=1000000)
+    p_shared.add_argument("--workers", default="1,2,4,8")
+
+    p_micro = sub.add_parser("microbatch", help="socket worker under burst load: threads vs micro-batching windows")
+    p_micro.add_argument("--clients", type=int, default=32)
+    p_micro.add_argument("--requests", type=int, default=50)
+    p_micro.add_argument("--windows", default="0,2,5")
+
+    p_retrieval = sub.add_parser("retrieval", help="recall@K vs latency: cluster-pruned retrieval vs exhaustive top-K")
+    p_retrieval.add_argument("--sizes", default="100000,1000000")
+    p_retrieval.add_argument("--deals", type=int, default=20)
+    p_retrieval.add_argument("--top-k", type=int, default=50)
+    p_retrieval.add_argument("--budgets", default="0,20000,5000")
+
+    p_train = sub.add_parser("train", help="training throughput: legacy per-row SGD vs NumPy mini-batch")
+    p_train.add_argument("--sizes", default="10000,1000000,10000000")
+    p_train.add_argument("--epochs", type=int, default=1)
+    p_train.add_argument("--sgd-max", type=int, default=100000)
+
+    p_stream = sub.add_parser("stream", help="training from CSV: peak memory of in-memory vs chunked (TRAIN_STREAM)")
+    p_stream.add_argument("--sizes", default="100000,1000000,3000000")
+    p_stream.add_argument("--epochs", type=int, default=2)
+    p_stream.add_argument("--chunk-rows", type=int, default=65536)
+
+    p_cache = sub.add_parser("cache", help="training matrix load: CSV parse vs compiled training cache")
+    p_cache.add_argument("--sizes", default="100000,1000000,5000000")
+
+    p_search = sub.add_parser("search", help="hyperparameter search (TRAIN_SEARCH): wall time vs worker processes")
+    p_search.add_argument("--sizes", default="100000,1000000")
+    p_search.add_argument("--procs", default="1,2,4,8")
+
+    args = parser.parse_args()
+    if args.bench == "interval":
+        bench_interval([int(x) for x in args.sizes.split(",")], args.queries)
+    elif args.bench == "memory":
+        bench_memory([int(x) for x in args.sizes.split(",")])
+    elif args.bench == "shared":
+        bench_shared(args.buyers, [int(x) for x in args.workers.split(",")])
+    elif args.bench == "microbatch":
+        bench_microbatch(args.clients, args.requests, [float(x) for x in args.windows.split(",")])
+    elif args.bench == "shards":
+        bench_shards([int(x) for x in args.sizes.split(",")], [int(x) for x in args.procs.split(",")], args.deals, args.top_k)
+    elif args.bench == "cache":
+        bench_cache([int(x) for x in args.sizes.split(",")])
+    elif args.bench == "stream":
+        bench_stream([int(x) for x in args.sizes.split(",")], args.epochs, args.chunk_rows)
+    elif args.bench == "train":
+        bench_train([int(x) for x in args.sizes.split(",")], args.epochs, args.sgd_max)
+    elif args.bench == "search":
+        bench_search([int(x) for x in args.sizes.split(",")], [int(x) for x in args.procs.split(",")])
+    elif args.bench == "retrieval":
+        bench_retrieval([int(x) for x in args.sizes.split(",")], args.deals, args.top_k, [int(x) for x in args.budgets.split(",")])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,722 @@
+#!/usr/bin/env python3
+"""
+Compiled, columnar view of the buyer universe (server/data/buyers.json).
+
+infer.py used to receive every buyer profile in every request and walk them as dicts.
+This module compiles the DB once into:
+- contiguous numeric columns for the mandate fields, each in the narrowest dtype that holds
+  every value exactly (int32 / float32 / float64; scoring computes in float64)
+- interned sector / geography / strategy-tag vocabularies, each buyer's lists encoded as a
+  bitmask row (bit j of word j // W = vocab entry j), so matching a deal is an AND (+ popcount for
+  tag overlap) over n x ceil(V / W) words; W is 8 / 16 / 32 / 64 bits, the smallest that fits V
+  in one word (64-bit words beyond that)
+The JSON is compiled in one pass into flat code arrays, without per-buyer intermediate lists.
+
+Sanitization mirrors server/src/buyers.ts (records without id/name are dropped,
+missing sector/geo/tag lists get the same defaults), so "whole universe" scoring sees the
+same buyers the server does.
+
+Run directly to (re)build the on-disk cache next to buyers.json:
+
+    python3 python_ml/buyer_index.py
+
+Shared store (publish_shared / attach_shared): the same arrays written as raw .npy files under
+a content-versioned directory, memory-mapped read-only by every worker so N processes share one
+copy through the page cache. A CURRENT handle file names the live version and is switched with
+an atomic rename; `--shared [DIR]` publishes one.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+from array import array
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import numpy as np  # type: ignore
+
+try:
+    import fcntl
+except ImportError:  # Windows: publishers are not serialized
+    fcntl = None  # type: ignore
+
+
+NUMERIC_FIELDS = ["minDealSize", "maxDealSize", "minEbitda", "maxEbitda", "dryPowder", "pastDeals"]
+
+INDEX_FORMAT = 3
+
+WORD_BITS = 64  # widest bitmask word; narrower vocabularies use uint8 / uint16 / uint32
+
+
+def default_buyers_path() -> str:
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(repo_root, "server", "data", "buyers.json")
+
+
+def normalize_token(s: str) -> str:
+    # same normalization as infer.normalize_sector / normalize_geo
+    return (s or "").strip().lower()
+
+
+def to_number(v: Any) -> float:
+    # JS `Number(v) || 0`
+    try:
+        x = float(v)
+    except (TypeError, ValueError):
+        return 0.0
+    return x if x == x else 0.0
+
+
+def compact_column(values: np.ndarray) -> np.ndarray:
+    """
+    float64 column -> int32 or float32 when that round-trips every value exactly, else unchanged.
+    Callers promote to float64 (np.float64 scalars, / by Python floats), so scores are unchanged.
+    """
+    if len(values) and np.isfinite(values).all() and (np.abs(values) < 2**31).all():
+        as_int = values.astype(np.int32)
+        if np.array_equal(as_int, values):
+            return as_int
+    as_f32 = values.astype(np.float32)
+    if np.array_equal(as_f32.astype(np.float64), values, equal_nan=True):
+        return as_f32
+    return values
+
+
+def mask_dtype(vocab_size: int) -> Any:
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if vocab_size <= np.dtype(dtype).itemsize * 8:
+            return dtype
+    return np.uint64
+
+
+def word_bits(bits: np.ndarray) -> int:
+    return bits.dtype.itemsize * 8
+
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    """
+    Per-element set-bit count of an unsigned integer array.
+    """
+    if hasattr(np, "bitwise_count"):  # numpy >= 2.0
+        return np.bitwise_count(words)
+    size = words.dtype.itemsize
+    as_bytes = np.ascontiguousarray(words).view(np.uint8).reshape(words.shape + (size,))
+    return _POPCOUNT_8[as_bytes].sum(axis=-1, dtype=np.uint8)
+
+
+_POPCOUNT_8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class Interner:
+    """
+    Appends one buyer's token list at a time as int32 codes (flat codes + row offsets), then packs
+    all rows into bitmasks once the vocabulary size is known.
+    """
+
+    def __init__(self) -> None:
+        self.vocab: Dict[str, int] = {}
+        self.codes = array("i")
+        self.offsets = array("q", [0])
+
+    def add(self, items: List[str]) -> None:
+        vocab = self.vocab
+        for s in items:
+            self.codes.append(vocab.setdefault(s, len(vocab)))
+        self.offsets.append(len(self.codes))
+
+    def bitmasks(self) -> "tuple[List[str], np.ndarray]":
+        """
+        (vocabulary in first-seen order, [rows, words] bitmask rows of mask_dtype(len(vocab))).
+        """
+        dtype = mask_dtype(len(self.vocab))
+        width = np.dtype(dtype).itemsize * 8
+        n = len(self.offsets) - 1
+        bits = np.zeros((n, max(1, -(-len(self.vocab) // width))), dtype=dtype)
+        codes = np.frombuffer(self.codes, dtype=np.int32) if len(self.codes) else np.zeros(0, dtype=np.int32)
+        rows = np.repeat(np.arange(n), np.diff(np.frombuffer(self.offsets, dtype=np.int64)))
+        np.bitwise_or.at(bits, (rows, codes // width), (np.ones(1, dtype=dtype) << (codes % width).astype(dtype)))
+        return list(self.vocab), bits
+
+
+def intern_lists(lists: List[List[str]]) -> "tuple[List[str], np.ndarray]":
+    """
+    Token lists -> (vocabulary in first-seen order, bitmask rows); see Interner.
+    """
+    interner = Interner()
+    for items in lists:
+        interner.add(items)
+    return interner.bitmasks()
+
+
+def token_mask(token_ids: List[int], words: int, dtype: Any = np.uint64) -> np.ndarray:
+    mask = np.zeros(words, dtype=dtype)
+    width = np.dtype(dtype).itemsize * 8
+    for j in token_ids:
+        mask[j // width] |= dtype(1 << (j % width))
+    return mask
+
+
+def any_bits(bits: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """
+    float64[n]: 1.0 where a buyer's bitmask row shares a bit with `mask` (same word dtype).
+    """
+    words = np.flatnonzero(mask)
+    if not len(words):
+        return np.zeros(len(bits), dtype=np.float64)
+    return (bits[:, words] & mask[words]).any(axis=1).astype(np.float64)
+
+
+class IdColumn(Sequence):
+    """
+    Buyer ids as one UTF-8 blob + int64 offsets: a read-only str sequence whose storage can be
+    memory-mapped, instead of one str object per buyer in every process. Slices are views.
+    """
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray, order: Optional[np.ndarray] = None) -> None:
+        self.blob = blob
+        self.offsets = offsets
+        self.order = order  # rows sorted by id (stable), for find()
+
+    @classmethod
+    def from_list(cls, ids: List[str]) -> "IdColumn":
+        encoded = [s.encode("utf-8") for s in ids]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        # UTF-8 byte order is code point order, so this is also the blob's sort order
+        order = np.asarray(sorted(range(len(ids)), key=ids.__getitem__), dtype=np.int64)
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets, order)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: Any) -> Any:
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step != 1:
+                return [self[j] for j in range(start, stop, step)]
+            return IdColumn(self.blob, self.offsets[start : max(start, stop) + 1])
+        i = int(i)
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("buyer id index out of range")
+        a, b = self.offsets[i : i + 2].tolist()
+        return bytes(self.blob[a:b]).decode("utf-8")
+
+    def find(self, bid: str) -> Optional[int]:
+        """
+        Row of `bid` (the last one for duplicate ids, like a {id: row} dict) by binary search over
+        `order`; no per-process id dict. None when absent or the column has no order.
+        """
+        if self.order is None:
+            return None
+        lo, hi = 0, len(self.order)
+        while lo < hi:  # bisect_right
+            mid = (lo + hi) // 2
+            if bid < self[int(self.order[mid])]:
+                hi = mid
+            else:
+                lo = mid + 1
+        if lo and self[int(self.order[lo - 1])] == bid:
+            return int(self.order[lo - 1])
+        return None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.take(np.arange(len(self))))
+
+    def take(self, rows: np.ndarray) -> List[str]:
+        starts, stops = self.offsets[rows].tolist(), self.offsets[rows + 1].tolist()
+        mv = memoryview(self.blob)
+        return [str(mv[a:b], "utf-8") for a, b in zip(starts, stops)]
+
+
+def take_ids(ids: Union[List[str], IdColumn], rows: np.ndarray) -> List[str]:
+    """
+    ids[rows] as a list for either id representation.
+    """
+    if isinstance(ids, IdColumn):
+        return ids.take(np.asarray(rows, dtype=np.int64))
+    return [ids[i] for i in rows.tolist()]
+
+
+@dataclass
+class BuyerIndex:
+    version: str  # buyerDbVersion from the JSON
+    source_hash: str  # sha256 of the buyers.json bytes
+    ids: Union[List[str], IdColumn]  # IdColumn when attached from the shared store
+    numeric: Dict[str, np.ndarray]  # field -> int32 / float32 / float64[n] (see compact_column)
+    sector_vocab: List[str]
+    sector_bits: np.ndarray  # uint{8,16,32,64}[n, words] (see mask_dtype)
+    geo_vocab: List[str]
+    geo_bits: np.ndarray
+    tag_vocab: List[str]
+    tag_bits: np.ndarray
+    # optional interval trees over the mandate bands, keyed by feature name (sizeFit / ebitdaFit)
+    intervals: Dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        self._row_of: Optional[Dict[str, int]] = None  # built on the first buyerIds lookup
+        self._sector_id = {s: i for i, s in enumerate(self.sector_vocab)}
+        self._tag_id = {t: i for i, t in enumerate(self.tag_vocab)}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def fingerprint(self) -> str:
+        """
+        Content hash of exactly what scoring reads (ids, numeric columns, vocab bitmasks).
+        Cached on the instance; the DB index is long-lived so this is paid once per load.
+        """
+        fp = self.__dict__.get("_fingerprint")
+        if fp is None:
+            h = hashlib.sha256()
+            h.update(json.dumps([list(self.ids), self.sector_vocab, self.geo_vocab, self.tag_vocab]).encode("utf-8"))
+            for key in NUMERIC_FIELDS:
+                h.update(np.ascontiguousarray(self.numeric[key]).tobytes())
+            for bits in (self.sector_bits, self.geo_bits, self.tag_bits):
+                h.update(np.ascontiguousarray(bits).tobytes())
+            fp = h.hexdigest()
+            self.__dict__["_fingerprint"] = fp
+        return fp
+
+    def rows_for_ids(self, buyer_ids: List[Any]) -> "tuple[np.ndarray, List[str]]":
+        """
+        Returns (row indices in request order, ids not present in the index).
+        """
+        if isinstance(self.ids, IdColumn) and self.ids.order is not None:
+            lookup = self.ids.find
+        else:
+            if self._row_of is None:
+                # whole-universe scoring never needs it, and at ~100 B/buyer it is the index's largest part
+                self._row_of = {bid: i for i, bid in enumerate(self.ids)}
+            lookup = self._row_of.get
+        rows: List[int] = []
+        missing: List[str] = []
+        for bid in buyer_ids:
+            i = lookup(str(bid))
+            if i is None:
+                missing.append(str(bid))
+            else:
+                rows.append(i)
+        return np.asarray(rows, dtype=np.int64), missing
+
+    def sector_match(self, deal_sector: str) -> np.ndarray:
+        """
+        float64[n]: 1.0 where the (normalized) deal sector is in the buyer's sectorFocus.
+        """
+        i = self._sector_id.get(deal_sector) if deal_sector else None
+        if i is None:
+            return np.zeros(len(self.ids), dtype=np.float64)
+        return any_bits(self.sector_bits, token_mask([i], self.sector_bits.shape[1], self.sector_bits.dtype.type))
+
+    def geo_match(self, deal_geo: str) -> np.ndarray:
+        """
+        float64[n]: 1.0 where any buyer geography is a substring of the (normalized) deal geography.
+        """
+        hits = [j for j, g in enumerate(self.geo_vocab) if g and g in deal_geo]
+        return any_bits(self.geo_bits, token_mask(hits, self.geo_bits.shape[1], self.geo_bits.dtype.type))
+
+    def tag_overlap(self, deal_tags: List[str]) -> np.ndarray:
+        """
+        float64[n]: share of the deal's (normalized, distinct) strategy tags the buyer carries.
+        """
+        wanted = {t for t in deal_tags if t}
+        known = [self._tag_id[t] for t in wanted if t in self._tag_id]
+        if not known:
+            return np.zeros(len(self.ids), dtype=np.float64)
+        mask = token_mask(known, self.tag_bits.shape[1], self.tag_bits.dtype.type)
+        words = np.flatnonzero(mask)
+        shared = popcount(self.tag_bits[:, words] & mask[words]).sum(axis=1)
+        return shared.astype(np.float64) / float(len(wanted))
+
+    def build_interval_indexes(self) -> None:
+        """
+        Builds interval trees for the deal-size and EBITDA bands (see interval_index.py).
+        """
+        from interval_index import IntervalIndex
+
+        self.intervals = {
+            "sizeFit": IntervalIndex(self.numeric["minDealSize"], self.numeric["maxDealSize"]),
+            "ebitdaFit": IntervalIndex(self.numeric["minEbitda"], self.numeric["maxEbitda"]),
+        }
+
+    def subset(self, rows: np.ndarray) -> "BuyerIndex":
+        """
+        Index over just `rows` (in that order); vocabularies are shared.
+        """
+        return BuyerIndex(
+            version=self.version,
+            source_hash=self.source_hash,
+            ids=take_ids(self.ids, rows),
+            numeric={k: v[rows] for k, v in self.numeric.items()},
+            sector_vocab=self.sector_vocab,
+            sector_bits=self.sector_bits[rows],
+            geo_vocab=self.geo_vocab,
+            geo_bits=self.geo_bits[rows],
+            tag_vocab=self.tag_vocab,
+            tag_bits=self.tag_bits[rows],
+        )
+
+    def shard(self, start: int, stop: int) -> "BuyerIndex":
+        """
+        Index over rows [start, stop): numpy views, so no buyer data is copied (sharded scoring).
+        """
+        return BuyerIndex(
+            version=self.version,
+            source_hash=self.source_hash,
+            ids=self.ids[start:stop],
+            numeric={k: v[start:stop] for k, v in self.numeric.items()},
+            sector_vocab=self.sector_vocab,
+            sector_bits=self.sector_bits[start:stop],
+            geo_vocab=self.geo_vocab,
+            geo_bits=self.geo_bits[start:stop],
+            tag_vocab=self.tag_vocab,
+            tag_bits=self.tag_bits[start:stop],
+        )
+
+
+def compile_buyers(
+    buyers_raw: List[Any], version: str = "unknown", source_hash: str = "", server_defaults: bool = True
+) -> BuyerIndex:
+    """
+    server_defaults=True applies the buyers.ts sanitization (DB view);
+    False keeps infer.engineer_features semantics for inline request profiles.
+    """
+    builder = BuyerColumns(server_defaults)
+    for b in buyers_raw:
+        builder.add(b)
+    return builder.build(version, source_hash)
+
+
+class BuyerColumns:
+    """
+    Single-pass BuyerIndex builder: each buyer dict is folded into flat numeric / code arrays as it is
+    added, so compiling holds no per-buyer lists beyond the input itself.
+    """
+
+    def __init__(self, server_defaults: bool = True) -> None:
+        self.server_defaults = server_defaults
+        self.ids: List[str] = []
+        self.numeric = {key: array("d") for key in NUMERIC_FIELDS}
+        self.sectors = Interner()
+        self.geos = Interner()
+        self.tags = Interner()
+
+    def add(self, b: Any) -> None:
+        if not isinstance(b, dict):
+            return
+        if self.server_defaults:
+            if not (b.get("id") and b.get("name")):
+                return
+            sectors = b["sectorFocus"] if isinstance(b.get("sectorFocus"), list) else ["other"]
+            geos = b["geographies"] if isinstance(b.get("geographies"), list) else ["pan-india"]
+            tags = b["strategyTags"] if isinstance(b.get("strategyTags"), list) else []
+            for key, col in self.numeric.items():
+                col.append(to_number(b.get(key)))
+        else:
+            sectors = b.get("sectorFocus") or []
+            geos = b.get("geographies") or []
+            tags = b.get("strategyTags") or []
+            for key, col in self.numeric.items():
+                col.append(float(b.get(key) or 0))
+        self.ids.append(str(b.get("id", "")))
+        self.sectors.add([normalize_token(str(x)) for x in sectors])
+        self.geos.add([normalize_token(str(x)) for x in geos])
+        self.tags.add([normalize_token(str(x)) for x in tags])
+
+    def build(self, version: str = "unknown", source_hash: str = "") -> BuyerIndex:
+        sector_vocab, sector_bits = self.sectors.bitmasks()
+        geo_vocab, geo_bits = self.geos.bitmasks()
+        tag_vocab, tag_bits = self.tags.bitmasks()
+        return BuyerIndex(
+            version=version,
+            source_hash=source_hash,
+            ids=self.ids,
+            numeric={key: compact_column(np.frombuffer(col, dtype=np.float64).copy()) for key, col in self.numeric.items()},
+            sector_vocab=sector_vocab,
+            sector_bits=sector_bits,
+            geo_vocab=geo_vocab,
+            geo_bits=geo_bits,
+            tag_vocab=tag_vocab,
+            tag_bits=tag_bits,
+        )
+
+
+def compile_buyers_json(path: str) -> BuyerIndex:
+    with open(path, "rb") as f:
+        raw = f.read()
+    payload = json.loads(raw)
+    buyers_raw = payload.get("buyers") if isinstance(payload, dict) else None
+    if not isinstance(buyers_raw, list):
+        raise ValueError(f"Invalid buyer DB at {path} (missing buyers list)")
+    return compile_buyers(
+        buyers_raw,
+        version=str(payload.get("buyerDbVersion", "unknown")),
+        source_hash=hashlib.sha256(raw).hexdigest(),
+    )
+
+
+def index_cache_path(buyers_path: str) -> str:
+    return os.path.splitext(buyers_path)[0] + ".index.npz"
+
+
+def save_index(index: BuyerIndex, path: str) -> None:
+    # write-then-rename so concurrent readers never see a partial file
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        _write_npz(index, f)
+    os.replace(tmp_path, path)
+
+
+def _write_npz(index: BuyerIndex, f: Any) -> None:
+    np.savez(
+        f,
+        meta=np.asarray(
+            json.dumps(
+                {
+                    "format": INDEX_FORMAT,
+                    "version": index.version,
+                    "sourceHash": index.source_hash,
+                    "ids": index.ids,
+                    "sectorVocab": index.sector_vocab,
+                    "geoVocab": index.geo_vocab,
+                    "tagVocab": index.tag_vocab,
+                }
+            )
+        ),
+        sector_bits=index.sector_bits,
+        geo_bits=index.geo_bits,
+        tag_bits=index.tag_bits,
+        **{f"num_{k}": v for k, v in index.numeric.items()},
+    )
+
+
+def load_index(path: str) -> BuyerIndex:
+    with np.load(path, allow_pickle=False) as z:
+        meta = json.loads(str(z["meta"]))
+        if meta.get("format") != INDEX_FORMAT:
+            raise ValueError(f"Unsupported buyer index format in {path}")
+        return BuyerIndex(
+            version=str(meta["version"]),
+            source_hash=str(meta["sourceHash"]),
+            ids=list(meta["ids"]),
+            numeric={k: np.ascontiguousarray(z[f"num_{k}"]) for k in NUMERIC_FIELDS},
+            sector_vocab=list(meta["sectorVocab"]),
+            sector_bits=z["sector_bits"],
+            geo_vocab=list(meta["geoVocab"]),
+            geo_bits=z["geo_bits"],
+            tag_vocab=list(meta["tagVocab"]),
+            tag_bits=z["tag_bits"],
+        )
+
+
+SHARED_FORMAT = 1
+
+SHARED_HANDLE = "CURRENT"
+
+
+def default_shared_root(buyers_path: Optional[str] = None) -> str:
+    return os.path.splitext(buyers_path or default_buyers_path())[0] + ".shared"
+
+
+def read_shared_handle(root: str) -> Optional[Dict[str, Any]]:
+    """
+    {"version", "sourceHash", "stamp": [mtime_ns, size] of the buyers.json it was built from}.
+    """
+    try:
+        with open(os.path.join(root, SHARED_HANDLE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def publish_shared(index: BuyerIndex, root: str, stamp: Optional[List[int]] = None, keep: int = 2) -> str:
+    """
+    Writes `index` (and its interval trees) as .npy files under root/<version>/ and points
+    root/CURRENT at it. The version is the index fingerprint, so republishing identical buyers only
+    rewrites the handle. Versions beyond the newest `keep` are deleted; a worker still mapping one
+    keeps reading it (an unlinked file stays mapped until released).
+    """
+    version = index.fingerprint()[:24]
+    path = os.path.join(root, version)
+    os.makedirs(root, exist_ok=True)
+    if not os.path.isdir(path):
+        ids = index.ids if isinstance(index.ids, IdColumn) and index.ids.order is not None else IdColumn.from_list(list(index.ids))
+        arrays: Dict[str, np.ndarray] = {
+            "ids_blob": ids.blob,
+            "ids_offsets": ids.offsets,
+            "ids_order": ids.order,
+            "sector_bits": index.sector_bits,
+            "geo_bits": index.geo_bits,
+            "tag_bits": index.tag_bits,
+            **{f"num_{k}": v for k, v in index.numeric.items()},
+        }
+        trees: Dict[str, List[str]] = {}
+        for name, tree in index.intervals.items():
+            trees[name] = list(tree.arrays())
+            arrays.update({f"tree_{name}_{key}": arr for key, arr in tree.arrays().items()})
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        for name, arr in arrays.items():
+            np.save(os.path.join(tmp_path, f"{name}.npy"), np.ascontiguousarray(arr))
+        meta = {
+            "format": SHARED_FORMAT,
+            "version": index.version,
+            "sourceHash": index.source_hash,
+            "fingerprint": index.fingerprint(),
+            "sectorVocab": index.sector_vocab,
+            "geoVocab": index.geo_vocab,
+            "tagVocab": index.tag_vocab,
+            "intervals": trees,
+        }
+        with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            shutil.rmtree(tmp_path, ignore_errors=True)  # a concurrent publisher got there first
+            if not os.path.isdir(path):
+                raise
+
+    handle_path = os.path.join(root, SHARED_HANDLE)
+    tmp_handle = f"{handle_path}.tmp{os.getpid()}"
+    with open(tmp_handle, "w", encoding="utf-8") as f:
+        json.dump({"version": version, "sourceHash": index.source_hash, "stamp": stamp}, f)
+    os.replace(tmp_handle, handle_path)
+
+    versions = [d for d in os.listdir(root) if d != version and os.path.isfile(os.path.join(root, d, "meta.json"))]
+    versions.sort(key=lambda d: os.stat(os.path.join(root, d)).st_mtime_ns, reverse=True)
+    for old in versions[max(0, keep - 1) :]:
+        shutil.rmtree(os.path.join(root, old), ignore_errors=True)
+    return version
+
+
+def _mapped(path: str) -> np.ndarray:
+    try:
+        return np.load(path, mmap_mode="r").view(np.ndarray)
+    except ValueError:  # zero-length arrays cannot be mapped
+        return np.load(path)
+
+
+def attach_shared(root: str, version: Optional[str] = None) -> BuyerIndex:
+    """
+    Memory-maps a published version (default: the one CURRENT names). Every array, ids included,
+    is a read-only view of the page cache, so attaching copies nothing and N workers share one
+    physical copy of the buyer data.
+    """
+    if version is None:
+        handle = read_shared_handle(root)
+        if handle is None:
+            raise FileNotFoundError(f"No shared buyer index published in {root}")
+        version = str(handle["version"])
+    path = os.path.join(root, version)
+    with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("format") != SHARED_FORMAT:
+        raise ValueError(f"Unsupported shared buyer index format in {path}")
+
+    def load(name: str) -> np.ndarray:
+        return _mapped(os.path.join(path, f"{name}.npy"))
+
+    index = BuyerIndex(
+        version=str(meta["version"]),
+        source_hash=str(meta["sourceHash"]),
+        ids=IdColumn(load("ids_blob"), load("ids_offsets"), load("ids_order")),
+        numeric={k: load(f"num_{k}") for k in NUMERIC_FIELDS},
+        sector_vocab=list(meta["sectorVocab"]),
+        sector_bits=load("sector_bits"),
+        geo_vocab=list(meta["geoVocab"]),
+        geo_bits=load("geo_bits"),
+        tag_vocab=list(meta["tagVocab"]),
+        tag_bits=load("tag_bits"),
+    )
+    if meta["intervals"]:
+        from interval_index import IntervalIndex
+
+        index.intervals = {
+            name: IntervalIndex.from_arrays(len(index), {key: load(f"tree_{name}_{key}") for key in keys})
+            for name, keys in meta["intervals"].items()
+        }
+    index.__dict__["_fingerprint"] = meta["fingerprint"]
+    return index
+
+
+def refresh_shared(buyers_path: str, root: str, interval_min: int = 10000) -> Dict[str, Any]:
+    """
+    Publishes buyers.json into the shared store unless CURRENT was built from its current
+    (mtime, size), and returns the handle. Serialized with a lock file, so when buyers.json is
+    regenerated one worker compiles it and the others attach the result.
+    """
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, ".lock"), "a+") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)  # released when the file closes
+        st = os.stat(buyers_path)
+        stamp = [st.st_mtime_ns, st.st_size]
+        handle = read_shared_handle(root)
+        if handle is None or handle.get("stamp") != stamp:
+            index = load_or_compile(buyers_path)
+            if len(index) >= interval_min:
+                index.build_interval_indexes()
+            publish_shared(index, root, stamp)
+            handle = read_shared_handle(root)
+    if handle is None:
+        raise OSError(f"Could not publish the shared buyer index to {root}")
+    return handle
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def load_or_compile(buyers_path: Optional[str] = None) -> BuyerIndex:
+    """
+    Uses the on-disk compiled index if it was built from the current buyers.json bytes,
+    otherwise compiles from JSON (and refreshes the cache best-effort).
+    """
+    buyers_path = buyers_path or default_buyers_path()
+    cache_path = index_cache_path(buyers_path)
+    if os.path.exists(cache_path):
+        try:
+            index = load_index(cache_path)
+            if index.source_hash == file_sha256(buyers_path):
+                return index
+        except Exception:
+            pass
+
+    index = compile_buyers_json(buyers_path)
+    try:
+        save_index(index, cache_path)
+    except OSError:
+        pass  # read-only checkout: compiled in memory only
+    return index
+
+
+def main() -> None:
+    buyers_path = default_buyers_path()
+    if len(sys.argv) > 1 and sys.argv[1] == "--shared":
+        root = sys.argv[2] if len(sys.argv) > 2 else default_shared_root(buyers_path)
+        handle = refresh_shared(buyers_path, root)
+        print(f"Published {os.path.join(root, handle['version'])} (CURRENT) from {buyers_path}")
+        return
+    index = compile_buyers_json(buyers_path)
+    out_path = index_cache_path(buyers_path)
+    save_index(index, out_path)
+    print(
+        f"Wrote {out_path} buyers={len(index)} version={index.version} "
+        f"sectors={len(index.sector_vocab)} geos={len(index.geo_vocab)} tags={len(index.tag_vocab)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
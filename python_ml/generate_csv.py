@@ -18,6 +18,7 @@ import math
 import os
 import random
 import json
+import sys
 from dataclasses import dataclass
 from typing import Any, Dict, List, Tuple, Optional
 
@@ -39,10 +40,25 @@ def lognormal(mean: float, sigma: float) -> float:
 
 @dataclass
 class Buyer:
+    # no per-instance __dict__ and interned tuples instead of lists: a full buyer DB stays small
+    __slots__ = (
+        "buyerId",
+        "type",
+        "sectorFocus",
+        "geographies",
+        "minDeal",
+        "maxDeal",
+        "minEbitda",
+        "maxEbitda",
+        "dryPowder",
+        "pastDeals",
+        "synergyPropensity",
+    )
+
     buyerId: str
     type: str
-    sectorFocus: List[str]
-    geographies: List[str]
+    sectorFocus: Tuple[str, ...]
+    geographies: Tuple[str, ...]
     minDeal: float
     maxDeal: float
     minEbitda: float
@@ -86,8 +102,8 @@ def generate_buyers(n: int) -> List[Buyer]:
             Buyer(
                 buyerId=f"syn_b{i+1}",
                 type=buyer_type,
-                sectorFocus=[sector],
-                geographies=[geo],
+                sectorFocus=(sector,),
+                geographies=(geo,),
                 minDeal=float(min_deal),
                 maxDeal=float(max_deal),
                 minEbitda=float(min_e),
@@ -225,31 +241,39 @@ def simulate_outcomes(deal: Deal, buyer: Buyer, features: Dict[str, float]) -> T
     return float(clamp01(p_pursue)), float(clamp01(p_nda)), float(clamp01(p_ioi)), stage, int(label)
 
 
-def load_buyer_db() -> Optional[List[Buyer]]:
+def interned(items: Any, default: str) -> Tuple[str, ...]:
+    # the DB repeats a few dozen sector / geo names across every buyer: share one str object each
+    return tuple(sys.intern(str(x)) for x in (items or [default]))
+
+
+def load_buyer_db(path_: Optional[str] = None) -> Optional[List[Buyer]]:
     """
-    Loads buyer DB from server/data/buyers.json if present.
+    Loads buyer DB from server/data/buyers.json (or `path_`) if present.
     """
     try:
-        repo_root = os.path.dirname(os.path.dirname(__file__))
-        path_ = os.path.join(repo_root, "server", "data", "buyers.json")
+        if path_ is None:
+            repo_root = os.path.dirname(os.path.dirname(__file__))
+            path_ = os.path.join(repo_root, "server", "data", "buyers.json")
         if not os.path.exists(path_):
             return None
         with open(path_, "r", encoding="utf-8") as f:
             payload = json.load(f)
         buyers_raw = payload.get("buyers") if isinstance(payload, dict) else None
+        del payload
         if not isinstance(buyers_raw, list):
             return None
         out: List[Buyer] = []
-        for b in buyers_raw:
+        for i, b in enumerate(buyers_raw):
+            buyers_raw[i] = None  # drop each source dict once converted (peak ~ one copy of the DB)
             if not isinstance(b, dict):
                 continue
             meta = b.get("_meta") if isinstance(b.get("_meta"), dict) else {}
             out.append(
                 Buyer(
                     buyerId=str(b.get("id", "")),
-                    type=str(b.get("type", "Private Equity")),
-                    sectorFocus=list(b.get("sectorFocus") or ["Other"]),
-                    geographies=list(b.get("geographies") or ["US"]),
+                    type=sys.intern(str(b.get("type", "Private Equity"))),
+                    sectorFocus=interned(b.get("sectorFocus"), "Other"),
+                    geographies=interned(b.get("geographies"), "US"),
                     minDeal=float(b.get("minDealSize") or 0),
                     maxDeal=float(b.get("maxDealSize") or 0),
                     minEbitda=float(b.get("minEbitda") or 0),
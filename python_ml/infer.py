@@ -15,15 +15,51 @@ Outputs JSON to stdout:
      { "buyerId": "...", "score": 0.0-1.0, "features": { ... } }
   ]
 }
+
+Worker mode (`--worker`, or `--socket PATH` for a Unix socket):
+- loads artifacts once, then serves newline-delimited JSON requests
+- each request may carry an "id"; the response echoes it so callers can multiplex
+- INFER_RELOAD=1 hot-reloads retrained artifacts without a restart (see ModelReloader)
+- INFER_PROCS=N scores top-K requests over the buyer DB in N forked shard processes (see get_shard_pool)
+- INFER_SHARED_INDEX=1 memory-maps the compiled buyer DB from a store shared by all workers
+- INFER_MICROBATCH_MS=N coalesces requests arriving within N ms into one scoring pass (see MicroBatcher)
+- INFER_RETRIEVE=1 (or "retrieve": true) scores universe top-K requests over a first-stage candidate set
 """
 
 from __future__ import annotations
 
+import argparse
+import asyncio
+import bisect
+import hashlib
+import heapq
 import json
 import math
+import multiprocessing
 import os
+import random
+import socketserver
 import sys
-from typing import Any, Dict, List, Tuple, Optional
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Tuple, Optional
+
+import profiling
+
+# importMs in one-shot timings: numpy (and sklearn, via joblib) dominate module import
+_IMPORT_STARTED = time.perf_counter()
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # numpy is optional; the per-row path below needs only the stdlib
+    np = None  # type: ignore
+
+
+FEATURE_NAMES = ["sectorMatch", "geoMatch", "sizeFit", "dryPowderFit", "activityLevel", "ebitdaFit", "tagOverlap"]
 
 
 def sigmoid(z: float) -> float:
@@ -53,6 +89,11 @@ def normalize_geo(s: str) -> str:
     return (s or "").strip().lower()
 
 
+def normalize_tags(tags: Any) -> List[str]:
+    # distinct, non-empty, lowercased strategy tags
+    return list(dict.fromkeys(t for t in (str(x).strip().lower() for x in (tags or [])) if t))
+
+
 def engineer_features(deal: Dict[str, Any], buyer: Dict[str, Any]) -> Dict[str, float]:
     """
     Minimal feature engineering + preprocessing.
@@ -83,6 +124,11 @@ def engineer_features(deal: Dict[str, Any], buyer: Dict[str, Any]) -> Dict[str,
     past_deals = float(buyer.get("pastDeals", 0) or 0)
     activity_level = clamp01(past_deals / 20.0)
 
+    # share of the deal's strategy tags (optional deal.strategyTags) the buyer carries
+    deal_tags = normalize_tags(deal.get("strategyTags"))
+    buyer_tags = set(normalize_tags(buyer.get("strategyTags")))
+    tag_overlap = sum(1 for t in deal_tags if t in buyer_tags) / len(deal_tags) if deal_tags else 0.0
+
     return {
         "sectorMatch": sector_match,
         "geoMatch": geo_match,
@@ -90,23 +136,28 @@ def engineer_features(deal: Dict[str, Any], buyer: Dict[str, Any]) -> Dict[str,
         "dryPowderFit": dry_powder_fit,
         "activityLevel": activity_level,
         "ebitdaFit": ebitda_fit,
+        "tagOverlap": tag_overlap,
     }
 
 
-def load_metadata() -> Tuple[str, List[str]]:
-    meta_path = os.path.join(os.path.dirname(__file__), "artifacts", "metadata.json")
+def default_artifacts_dir() -> str:
+    return os.path.join(os.path.dirname(__file__), "artifacts")
+
+
+def load_metadata(artifacts_dir: Optional[str] = None) -> Tuple[str, List[str]]:
+    meta_path = os.path.join(artifacts_dir or default_artifacts_dir(), "metadata.json")
     if not os.path.exists(meta_path):
-        return "unknown", ["sectorMatch", "geoMatch", "sizeFit", "dryPowderFit", "activityLevel", "ebitdaFit"]
+        return "unknown", FEATURE_NAMES[:]
     with open(meta_path, "r", encoding="utf-8") as f:
         payload = json.load(f)
     return str(payload.get("modelVersion", "unknown")), list(payload.get("featureNames") or [])
 
 
-def try_load_sklearn_model() -> Optional[object]:
+def try_load_sklearn_model(artifacts_dir: Optional[str] = None) -> Optional[object]:
     """
     Returns a loaded sklearn model if deps + artifact exist, else None.
     """
-    model_path = os.path.join(os.path.dirname(__file__), "artifacts", "model.joblib")
+    model_path = os.path.join(artifacts_dir or default_artifacts_dir(), "model.joblib")
     if not os.path.exists(model_path):
         return None
     try:
@@ -116,8 +167,104 @@ def try_load_sklearn_model() -> Optional[object]:
     return load(model_path)
 
 
-def load_legacy_weights() -> Tuple[List[float], float, str, List[str]]:
-    path = os.path.join(os.path.dirname(__file__), "artifacts", "model.json")
+@dataclass
+class CompiledModel:
+    """
+    Calibrated logistic regression exported by train.py (model_compiled.json):
+    per fold, logit = coef . x + intercept, then an isotonic (piecewise-linear) or sigmoid
+    calibrator; the probability is the mean over folds. No sklearn/joblib needed.
+    """
+
+    model_version: str
+    feature_names: List[str]
+    folds: List[Dict[str, Any]]
+
+
+def parse_compiled_model(payload: Dict[str, Any]) -> CompiledModel:
+    folds = payload.get("folds")
+    feature_names = [str(x) for x in (payload.get("featureNames") or [])]
+    if not isinstance(folds, list) or not folds:
+        raise ValueError("Invalid compiled model (missing folds)")
+    parsed: List[Dict[str, Any]] = []
+    for fold in folds:
+        coef = [float(c) for c in fold["coef"]]
+        if len(coef) != len(feature_names):
+            raise ValueError("Invalid compiled model (coef/featureNames length mismatch)")
+        cal = fold["calibrator"]
+        if cal.get("type") == "isotonic":
+            calibrator: Dict[str, Any] = {"type": "isotonic", "x": [float(v) for v in cal["x"]], "y": [float(v) for v in cal["y"]]}
+            if not calibrator["x"] or len(calibrator["x"]) != len(calibrator["y"]):
+                raise ValueError("Invalid compiled model (isotonic thresholds)")
+        elif cal.get("type") == "sigmoid":
+            calibrator = {"type": "sigmoid", "a": float(cal["a"]), "b": float(cal["b"])}
+        else:
+            raise ValueError(f"Invalid compiled model (calibrator type {cal.get('type')!r})")
+        parsed.append({"coef": coef, "intercept": float(fold["intercept"]), "calibrator": calibrator})
+    return CompiledModel(
+        model_version=str(payload.get("modelVersion", "unknown")), feature_names=feature_names, folds=parsed
+    )
+
+
+def try_load_compiled_model(artifacts_dir: Optional[str] = None) -> Optional[CompiledModel]:
+    """
+    Returns the compiled calibrated model if artifacts/model_compiled.json exists, else None.
+    """
+    path = os.path.join(artifacts_dir or default_artifacts_dir(), "model_compiled.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_compiled_model(json.load(f))
+
+
+def _interp(x: float, xp: List[float], fp: List[float]) -> float:
+    # np.interp for one point (clamped at both ends, like IsotonicRegression(out_of_bounds="clip"))
+    if x <= xp[0]:
+        return fp[0]
+    if x >= xp[-1]:
+        return fp[-1]
+    i = bisect.bisect_right(xp, x)
+    x0, x1 = xp[i - 1], xp[i]
+    return fp[i - 1] + (x - x0) * (fp[i] - fp[i - 1]) / (x1 - x0)
+
+
+def _fix_overshoot(p: float) -> float:
+    # sklearn snaps probabilities within 1e-5 above 1.0 back to 1.0
+    return 1.0 if 1.0 < p <= 1.0 + 1e-5 else p
+
+
+def compiled_predict_row(cm: CompiledModel, x: List[float]) -> float:
+    total = 0.0
+    for fold in cm.folds:
+        z = sum(w * xi for w, xi in zip(fold["coef"], x)) + fold["intercept"]
+        cal = fold["calibrator"]
+        if cal["type"] == "isotonic":
+            p = _interp(z, cal["x"], cal["y"])
+        else:
+            p = sigmoid(-(cal["a"] * z + cal["b"]))
+        total += _fix_overshoot(p)
+    return total / len(cm.folds)
+
+
+def compiled_predict_batch(cm: CompiledModel, X: "np.ndarray", coefs: Optional[List["np.ndarray"]] = None) -> "np.ndarray":
+    """
+    X columns in cm.feature_names order, or any order when `coefs` gives each fold's weights aligned to X.
+    """
+    total = np.zeros(X.shape[0], dtype=np.float64)
+    for i, fold in enumerate(cm.folds):
+        coef = coefs[i] if coefs is not None else np.asarray(fold["coef"], dtype=np.float64)
+        z = X @ coef + fold["intercept"]
+        cal = fold["calibrator"]
+        if cal["type"] == "isotonic":
+            p = np.interp(z, cal["x"], cal["y"])
+        else:
+            p = sigmoid_array(-(cal["a"] * z + cal["b"]))
+        p[(1.0 < p) & (p <= 1.0 + 1e-5)] = 1.0
+        total += p
+    return total / len(cm.folds)
+
+
+def load_legacy_weights(artifacts_dir: Optional[str] = None) -> Tuple[List[float], float, str, List[str]]:
+    path = os.path.join(artifacts_dir or default_artifacts_dir(), "model.json")
     if not os.path.exists(path):
         raise FileNotFoundError(f"Model not found at {path}. Run: python3 python_ml/train.py")
 
@@ -141,61 +288,2066 @@ def score_with_model(weights: List[float], bias: float, features: Dict[str, floa
     return sigmoid(z)
 
 
-def main() -> None:
-    raw = sys.stdin.read()
-    if not raw.strip():
-        raise ValueError("No stdin JSON provided")
+def build_feature_matrix(deal: Dict[str, Any], buyers: List[Dict[str, Any]]) -> "np.ndarray":
+    """
+    Batch version of engineer_features: one row per buyer, columns in FEATURE_NAMES order.
+    Inline profiles are interned into a throwaway BuyerIndex, so each distinct sector / geo / tag
+    string is normalized once and matching runs on bitmasks.
+    """
+    import buyer_index
+
+    with profiling.timed("buyers"):
+        index = buyer_index.compile_buyers(buyers, server_defaults=False)
+    return build_feature_matrix_indexed(deal, index)
+
+
+BUYER_NUMERIC_FIELDS = ["minDealSize", "maxDealSize", "minEbitda", "maxEbitda", "dryPowder", "pastDeals"]
+
+
+# band features: (deal field, buyer lower bound column, buyer upper bound column)
+BAND_FEATURES = {
+    "sizeFit": ("dealSize", "minDealSize", "maxDealSize"),
+    "ebitdaFit": ("ebitda", "minEbitda", "maxEbitda"),
+}
+
+
+def band_fit(
+    name: str, deal: Dict[str, Any], cols: Dict[str, "np.ndarray"], intervals: Optional[Dict[str, Any]] = None
+) -> "np.ndarray":
+    """
+    sizeFit / ebitdaFit column; uses the buyer index's interval tree when it has one.
+    """
+    deal_key, lo_key, hi_key = BAND_FEATURES[name]
+    value = float(deal.get(deal_key, 0) or 0)
+    tree = (intervals or {}).get(name)
+    if tree is not None:
+        return tree.contains_mask(value)
+    return interval_fit(value, cols[lo_key], cols[hi_key])
+
+
+def fill_numeric_features(
+    X: "np.ndarray", deal: Dict[str, Any], cols: Dict[str, "np.ndarray"], intervals: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    Fills sizeFit / dryPowderFit / activityLevel / ebitdaFit from buyer numeric columns.
+    """
+    fill_deal_features(X, deal, cols, intervals, ["sizeFit", "ebitdaFit", "dryPowderFit"])
+    X[:, 4] = clamp01_array(cols["pastDeals"] / np.float64(20.0))
+
+
+# deal fields -> feature columns that depend on them; every other column depends only on
+# sector / geography / strategyTags and the buyer side
+DEAL_FIELD_FEATURES = {
+    "dealSize": ["sizeFit", "dryPowderFit"],
+    "ebitda": ["ebitdaFit"],
+}
 
-    inp = json.loads(raw)
-    deal = inp.get("deal") or {}
-    buyers = inp.get("buyers") or []
-    if not isinstance(deal, dict) or not isinstance(buyers, list):
-        raise ValueError("Invalid input JSON shape")
 
-    model_version, feature_names = load_metadata()
-    sklearn_model = try_load_sklearn_model()
+def fill_deal_features(
+    X: "np.ndarray",
+    deal: Dict[str, Any],
+    cols: Dict[str, "np.ndarray"],
+    intervals: Optional[Dict[str, Any]],
+    names: List[str],
+) -> None:
+    """
+    (Re)computes just the named dealSize / ebitda dependent columns of X in place.
+    """
+    for name in names:
+        X[:, FEATURE_NAMES.index(name)] = deal_feature(name, deal, cols, intervals)
+
+
+def deal_feature(
+    name: str, deal: Dict[str, Any], cols: Dict[str, "np.ndarray"], intervals: Optional[Dict[str, Any]] = None
+) -> "np.ndarray":
+    if name in BAND_FEATURES:
+        return band_fit(name, deal, cols, intervals)
+    return dry_powder_fit(cols["dryPowder"], float(deal.get("dealSize", 0) or 0))
+
+
+@profiling.timed_stage("features")
+def build_feature_matrix_indexed(deal: Dict[str, Any], index: Any) -> "np.ndarray":
+    """
+    Same matrix as build_feature_matrix, computed from a compiled BuyerIndex.
+    """
+    sector = normalize_sector(str(deal.get("sector", "")))
+    geo = normalize_geo(str(deal.get("geography", "")))
+
+    X = np.empty((len(index), len(FEATURE_NAMES)), dtype=np.float64)
+    X[:, 0] = index.sector_match(sector)
+    X[:, 1] = index.geo_match(geo)
+    fill_numeric_features(X, deal, index.numeric, index.intervals)
+    X[:, 6] = index.tag_overlap(normalize_tags(deal.get("strategyTags")))
+    return X
+
+
+def interval_fit(value: float, lo: "np.ndarray", hi: "np.ndarray") -> "np.ndarray":
+    # hi <= 0 means "no upper bound" (same rule as engineer_features); a float64 scalar keeps the
+    # comparison in float64 when the index stores a band as int32 / float32
+    value = np.float64(value)
+    return ((value >= lo) & ((hi <= 0) | (value <= hi))).astype(np.float64)
+
+
+def dry_powder_fit(dry_powder: "np.ndarray", deal_size: float) -> "np.ndarray":
+    # proxy: 10x EV check capacity is "full" fit
+    fit = clamp01_array(dry_powder / np.float64(max(1.0, deal_size) * 10.0))
+    return np.where(dry_powder > 0, fit, 0.65)
+
+
+def clamp01_array(x: "np.ndarray") -> "np.ndarray":
+    # mirrors clamp01: nan/inf -> 0, otherwise clip to [0, 1]
+    return np.clip(np.where(np.isfinite(x), x, 0.0), 0.0, 1.0)
+
+
+def sigmoid_array(z: "np.ndarray") -> "np.ndarray":
+    e = np.exp(-np.abs(z))
+    return np.where(z >= 0, 1.0 / (1.0 + e), e / (1.0 + e))
+
+
+def select_features(X: "np.ndarray", feature_names: List[str]) -> "np.ndarray":
+    """
+    Reorders FEATURE_NAMES columns into the model's feature order (unknown names -> 0).
+    """
+    if feature_names == FEATURE_NAMES:
+        return X
+    out = np.zeros((X.shape[0], len(feature_names)), dtype=np.float64)
+    for j, name in enumerate(feature_names):
+        if name in FEATURE_NAMES:
+            out[:, j] = X[:, FEATURE_NAMES.index(name)]
+    return out
+
+
+def expand_weights(coef: List[float], feature_names: List[str]) -> "np.ndarray":
+    """
+    Linear weights in the model's feature order -> the same weights over FEATURE_NAMES columns
+    (0 for columns the model does not use), so X can be multiplied without select_features' copy.
+    Names unknown to FEATURE_NAMES are dropped: select_features would feed them as 0 anyway.
+    """
+    w = np.zeros(len(FEATURE_NAMES), dtype=np.float64)
+    for name, c in zip(feature_names, coef):
+        if name in FEATURE_NAMES:
+            w[FEATURE_NAMES.index(name)] = float(c)
+    return w
+
+
+@dataclass
+class LoadedModel:
+    model_version: str
+    feature_names: List[str]
+    sklearn_model: Optional[object]
+    legacy: Optional[Tuple[List[float], float, str, List[str]]]
+    compiled: Optional[CompiledModel] = None
+    fingerprint: str = ""  # modelVersion + hash of the artifact bytes actually loaded (score cache key)
+
+
+def artifact_fingerprint(model_version: str, names: List[str], artifacts_dir: Optional[str] = None) -> str:
+    h = hashlib.sha256(model_version.encode("utf-8"))
+    for name in names:
+        path = os.path.join(artifacts_dir or default_artifacts_dir(), name)
+        if os.path.exists(path):
+            h.update(name.encode("utf-8"))
+            with open(path, "rb") as f:
+                h.update(f.read())
+    return h.hexdigest()
+
+
+MODEL_KINDS = ["auto", "compiled", "sklearn", "legacy"]
+
+
+def load_model(artifacts_dir: Optional[str] = None, kind: str = "auto") -> LoadedModel:
+    """
+    Loads metadata + the preferred model artifact:
+    compiled calibrated model (no sklearn import), else model.joblib, else legacy weights.
+    INFER_USE_JOBLIB=1 skips the compiled artifact. kind="compiled" / "sklearn" / "legacy" forces one
+    artifact (FileNotFoundError if it is missing), e.g. to serve model.json next to the calibrated model.
+    """
+    if kind not in MODEL_KINDS:
+        raise ValueError(f"Unknown model kind {kind!r} (expected one of {MODEL_KINDS})")
+    artifacts_dir = artifacts_dir or default_artifacts_dir()
+    model_version, feature_names = load_metadata(artifacts_dir)
+    compiled: Optional[CompiledModel] = None
+    use_joblib = (os.environ.get("INFER_USE_JOBLIB", "0") or "").strip() in ("1", "true", "True")
+    if kind == "compiled" or (kind == "auto" and not use_joblib):
+        compiled = try_load_compiled_model(artifacts_dir)
+        if compiled is None and kind == "compiled":
+            raise FileNotFoundError(f"No model_compiled.json in {artifacts_dir}")
+    if compiled is not None:
+        return LoadedModel(
+            model_version=model_version,
+            feature_names=compiled.feature_names,
+            sklearn_model=None,
+            legacy=None,
+            compiled=compiled,
+            fingerprint=artifact_fingerprint(model_version, ["model_compiled.json"], artifacts_dir),
+        )
+
+    sklearn_model = try_load_sklearn_model(artifacts_dir) if kind in ("auto", "sklearn") else None
+    if sklearn_model is None and kind == "sklearn":
+        raise FileNotFoundError(f"No loadable model.joblib in {artifacts_dir} (missing file or joblib)")
     legacy: Optional[Tuple[List[float], float, str, List[str]]] = None
     if sklearn_model is None:
-        legacy = load_legacy_weights()
+        legacy = load_legacy_weights(artifacts_dir)
         model_version = legacy[2]
         feature_names = legacy[3]
+    return LoadedModel(
+        model_version=model_version,
+        feature_names=feature_names,
+        sklearn_model=sklearn_model,
+        legacy=legacy,
+        fingerprint=artifact_fingerprint(
+            model_version, ["model.joblib" if sklearn_model is not None else "model.json"], artifacts_dir
+        ),
+    )
 
-    out_scores: List[Dict[str, Any]] = []
-    for b in buyers:
-        if not isinstance(b, dict):
+
+PRIMARY_MODEL = "primary"
+
+
+@dataclass
+class ModelSet:
+    """
+    Every model this process serves, by name. "primary" is load_model(); INFER_MODELS adds more:
+        INFER_MODELS="legacy=legacy,cand=auto:/path/to/candidate/artifacts"
+    (name=kind[:artifacts dir]). Requests pick one with "model": name, or via "routingKey", hashed
+    onto the INFER_AB_SPLIT weights ("primary:90,cand:10"); "shadow" scores the same feature
+    matrix with other models too.
+    `sources` remembers where each model came from (artifacts dir, kind) for hot reload; swap()
+    replaces the whole dict, so a request sees either the old or the new model, never a mix.
+    """
+
+    models: Dict[str, LoadedModel]
+    split: List[Tuple[str, float]]
+    sources: Dict[str, Tuple[Optional[str], str]] = field(default_factory=dict)
+    previous: Dict[str, str] = field(default_factory=dict)  # name -> modelVersion before the last swap
+
+    @property
+    def primary(self) -> LoadedModel:
+        return self.models[PRIMARY_MODEL]
+
+    def route(self, inp: Any) -> Tuple[str, LoadedModel]:
+        name = PRIMARY_MODEL
+        if isinstance(inp, dict) and inp.get("model") is not None:
+            name = str(inp["model"])
+        elif isinstance(inp, dict) and inp.get("routingKey") is not None and self.split:
+            name = route_key(str(inp["routingKey"]), self.split)
+        if name not in self.models:
+            raise ValueError(f"Unknown model {name!r} (loaded: {list(self.models)})")
+        return name, self.models[name]
+
+    def shadows(self, inp: Any, routed: str) -> List[Tuple[str, LoadedModel]]:
+        """
+        "shadow": true -> every other loaded model; "shadow": [names] -> just those.
+        """
+        want = inp.get("shadow") if isinstance(inp, dict) else None
+        if not want:
+            return []
+        if want is True:
+            names = [n for n in self.models if n != routed]
+        elif isinstance(want, list) and all(isinstance(n, str) for n in want):
+            names = [n for n in dict.fromkeys(want) if n != routed]
+        else:
+            raise ValueError("shadow must be true or a list of model names")
+        unknown = [n for n in names if n not in self.models]
+        if unknown:
+            raise ValueError(f"Unknown shadow model(s) {unknown} (loaded: {list(self.models)})")
+        return [(n, self.models[n]) for n in names]
+
+    def swap(self, name: str, model: LoadedModel) -> None:
+        self.previous = {**self.previous, name: self.models[name].model_version}
+        self.models = {**self.models, name: model}
+
+
+def route_key(key: str, split: List[Tuple[str, float]]) -> str:
+    # stable across processes/restarts: the same key (e.g. a deal or user id) always lands on the same model
+    total = sum(w for _, w in split)
+    point = int.from_bytes(hashlib.sha256(key.encode("utf-8")).digest()[:8], "big") / 2.0**64 * total
+    for name, weight in split:
+        if point < weight:
+            return name
+        point -= weight
+    return split[-1][0]
+
+
+def parse_model_specs(spec: str) -> List[Tuple[str, str, Optional[str]]]:
+    out: List[Tuple[str, str, Optional[str]]] = []
+    for item in (x.strip() for x in spec.split(",")):
+        if not item:
             continue
-        buyer_id = str(b.get("id", ""))
-        feats = engineer_features(deal, b)
-        if sklearn_model is not None:
-            # build a single-row feature array in the correct order
-            x = [[float(feats.get(name, 0.0)) for name in feature_names]]
+        name, sep, rest = item.partition("=")
+        kind, _, artifacts_dir = rest.partition(":")
+        if not sep or not name.strip() or name.strip() == PRIMARY_MODEL:
+            raise ValueError(f"Invalid INFER_MODELS entry {item!r} (expected name=kind[:artifacts dir])")
+        out.append((name.strip(), kind.strip() or "auto", artifacts_dir.strip() or None))
+    return out
+
+
+def parse_split(spec: str) -> List[Tuple[str, float]]:
+    out: List[Tuple[str, float]] = []
+    for item in (x.strip() for x in spec.split(",")):
+        if item:
+            name, _, weight = item.partition(":")
+            out.append((name.strip(), float(weight or 0)))
+    return [(n, w) for n, w in out if w > 0]
+
+
+def load_model_set() -> ModelSet:
+    models = {PRIMARY_MODEL: load_model()}
+    sources: Dict[str, Tuple[Optional[str], str]] = {PRIMARY_MODEL: (None, "auto")}
+    for name, kind, artifacts_dir in parse_model_specs(os.environ.get("INFER_MODELS", "") or ""):
+        models[name] = load_model(artifacts_dir, kind)
+        sources[name] = (artifacts_dir, kind)
+    split = parse_split(os.environ.get("INFER_AB_SPLIT", "") or "")
+    unknown = [n for n, _ in split if n not in models]
+    if unknown:
+        raise ValueError(f"INFER_AB_SPLIT names unknown model(s) {unknown}")
+    return ModelSet(models=models, split=split, sources=sources)
+
+
+RELOAD_ARTIFACTS = ["metadata.json", "model.json", "model.joblib", "model_compiled.json"]
+
+
+def artifacts_signature(artifacts_dir: Optional[str]) -> Tuple[Tuple[str, int, int], ...]:
+    # (name, mtime_ns, size) per artifact; cheap enough to poll every couple of seconds
+    out: List[Tuple[str, int, int]] = []
+    for name in RELOAD_ARTIFACTS:
+        try:
+            st = os.stat(os.path.join(artifacts_dir or default_artifacts_dir(), name))
+        except OSError:
+            continue
+        out.append((name, st.st_mtime_ns, st.st_size))
+    return tuple(out)
+
+
+def canary_features(path: str = "") -> List[Dict[str, float]]:
+    """
+    Feature rows a reloaded model must score sanely before it is swapped in: a held-out request
+    file ({"deal": ..., "buyers": [...]}, INFER_RELOAD_CANARY) run through engineer_features, else a
+    fixed synthetic batch covering the feature ranges.
+    """
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        deal = payload.get("deal") or {}
+        return [engineer_features(deal, b) for b in payload.get("buyers") or [] if isinstance(b, dict)]
+    rng = random.Random(13)
+    binary = ("sectorMatch", "geoMatch", "sizeFit", "ebitdaFit")
+    return [
+        {name: float(rng.random() < 0.5) if name in binary else rng.random() for name in FEATURE_NAMES}
+        for _ in range(256)
+    ]
+
+
+def canary_scores(model: LoadedModel, canary: List[Dict[str, float]]) -> List[float]:
+    if np is None:
+        return [predict_row(model, feats) for feats in canary]
+    X = np.array([[feats.get(name, 0.0) for name in FEATURE_NAMES] for feats in canary], dtype=np.float64)
+    return predict_batch(model, X.reshape(len(canary), len(FEATURE_NAMES))).tolist()
+
+
+def validate_model(
+    candidate: LoadedModel, current: Optional[LoadedModel], canary: List[Dict[str, float]], max_drift: float = 0.0
+) -> Optional[str]:
+    """
+    Why `candidate` must not replace `current` (None: OK): unknown features, non-finite or
+    out-of-range canary scores, a constant output, or (max_drift > 0) a mean score shift vs the
+    current model above max_drift.
+    """
+    unknown = [n for n in candidate.feature_names if n not in FEATURE_NAMES]
+    if unknown:
+        return f"unknown features {unknown}"
+    if not canary:
+        return "empty canary batch"
+    scores = canary_scores(candidate, canary)
+    if any(not math.isfinite(p) or p < 0.0 or p > 1.0 + 1e-9 for p in scores):
+        return "non-finite or out-of-range canary scores"
+    if len(canary) > 1 and max(scores) == min(scores):
+        return "constant canary scores"
+    if max_drift > 0 and current is not None:
+        drift = sum(abs(a - b) for a, b in zip(scores, canary_scores(current, canary))) / len(scores)
+        if drift > max_drift:
+            return f"mean canary drift {drift:.4f} > INFER_RELOAD_MAX_DRIFT={max_drift}"
+    return None
+
+
+class ModelReloader:
+    """
+    Artifact hot reload for resident workers. Polls each served model's artifacts dir every
+    `interval` seconds (INFER_RELOAD=1); a changed dir is reloaded once its signature has been stable
+    for one poll (train.py writes several files), on the watcher thread. The new model must pass
+    validate_model on the canary batch before ModelSet.swap; otherwise the current one keeps serving
+    and the error is reported in stats. In-flight requests finish on the model they started with.
+    """
+
+    def __init__(self, models: ModelSet, interval: float = 2.0, canary_path: str = "", max_drift: float = 0.0) -> None:
+        self.models = models
+        self.interval = interval
+        self.canary_path = canary_path
+        self.max_drift = max_drift
+        self._seen = {name: artifacts_signature(src[0]) for name, src in models.sources.items()}
+        self._pending: Dict[str, Tuple[Tuple[str, int, int], ...]] = {}
+        self._lock = threading.Lock()
+        self.reloads = 0
+        self.failures = 0
+        self.last_reload_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def poll(self) -> List[str]:
+        """
+        One watch step; returns the names that were swapped.
+        """
+        swapped: List[str] = []
+        for name, (artifacts_dir, _) in self.models.sources.items():
+            sig = artifacts_signature(artifacts_dir)
+            if sig == self._seen.get(name):
+                self._pending.pop(name, None)
+            elif self._pending.get(name) != sig:
+                self._pending[name] = sig  # changed since the last poll: wait for it to settle
+            elif self.reload(name, sig):
+                swapped.append(name)
+        return swapped
+
+    def reload(self, name: str, sig: Optional[Tuple[Tuple[str, int, int], ...]] = None) -> bool:
+        artifacts_dir, kind = self.models.sources[name]
+        sig = artifacts_signature(artifacts_dir) if sig is None else sig
+        with self._lock:
+            self._pending.pop(name, None)
+            self._seen[name] = sig
+            current = self.models.models[name]
             try:
-                p = float(sklearn_model.predict_proba(x)[0][1])
-            except Exception:
-                # if something goes wrong, fall back to legacy if available
-                if legacy is None:
-                    raise
-                p = score_with_model(legacy[0], legacy[1], feats, feature_names)
+                candidate = load_model(artifacts_dir, kind)
+                if candidate.fingerprint == current.fingerprint:
+                    return False  # touched, not changed
+                error = validate_model(candidate, current, canary_features(self.canary_path), self.max_drift)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            if error is not None:
+                self.failures += 1
+                self.last_error = f"{name}: {error}"
+                sys.stderr.write(f"infer reload rejected ({self.last_error}); still serving {current.model_version}\n")
+                sys.stderr.flush()
+                return False
+            self.models.swap(name, candidate)
+            self.reloads += 1
+            self.last_reload_at = time.time()
+            self.last_error = None
+            sys.stderr.write(f"infer reload: {name} {current.model_version} -> {candidate.model_version}\n")
+            sys.stderr.flush()
+            return True
+
+    def reload_all(self) -> List[str]:
+        return [name for name in list(self.models.sources) if self.reload(name)]
+
+    def start(self) -> None:
+        def loop() -> None:
+            while True:
+                time.sleep(self.interval)
+                try:
+                    self.poll()
+                except Exception as e:  # never let the watcher die
+                    self.last_error = f"{type(e).__name__}: {e}"
+
+        threading.Thread(target=loop, name="infer-reload", daemon=True).start()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "watching": self.interval if self.interval > 0 else None,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "lastReloadAt": self.last_reload_at,
+            "lastError": self.last_error,
+        }
+
+
+def reloader_from_env(models: ModelSet) -> ModelReloader:
+    """
+    Always available to {"op": "reload"}; INFER_RELOAD=1 also starts the watcher thread.
+    """
+    watch = (os.environ.get("INFER_RELOAD", "0") or "").strip() in ("1", "true", "True")
+    reloader = ModelReloader(
+        models,
+        interval=float(os.environ.get("INFER_RELOAD_INTERVAL", "2") or 2) if watch else 0.0,
+        canary_path=(os.environ.get("INFER_RELOAD_CANARY", "") or "").strip(),
+        max_drift=float(os.environ.get("INFER_RELOAD_MAX_DRIFT", "0") or 0),
+    )
+    if watch:
+        reloader.start()
+    return reloader
+
+
+_reloader: Optional[ModelReloader] = None
+
+
+def sklearn_linear_part(clf: Any) -> Optional[Tuple[List[float], float]]:
+    """
+    (coef, intercept) of a fitted LogisticRegression, or the fold average of a
+    CalibratedClassifierCV(LogisticRegression); None for any other estimator.
+    """
+    calibrated = getattr(clf, "calibrated_classifiers_", None)
+    estimators = [getattr(cc, "estimator", None) or getattr(cc, "base_estimator", None) for cc in calibrated or []]
+    if not calibrated:
+        estimators = [clf]
+    parts: List[Tuple[List[float], float]] = []
+    for est in estimators:
+        coef = getattr(est, "coef_", None)
+        intercept = getattr(est, "intercept_", None)
+        if coef is None or intercept is None or len(coef) != 1:
+            return None
+        parts.append(([float(c) for c in coef[0]], float(intercept[0])))
+    n = len(parts)
+    return [sum(col) / n for col in zip(*(c for c, _ in parts))], sum(b for _, b in parts) / n
+
+
+def linear_terms(model: LoadedModel) -> Optional[Tuple[List[str], List[float], float]]:
+    """
+    The model's logit as (feature names, weights, bias), restricted to FEATURE_NAMES. Calibrated models
+    contribute the fold-averaged logistic stage, i.e. the mean pre-calibration logit; None when the
+    sklearn model has no linear first stage.
+    """
+    cached = model.__dict__.get("_linear_terms", False)
+    if cached is not False:
+        return cached
+    part: Optional[Tuple[List[float], float]] = None
+    if model.compiled is not None:
+        folds = model.compiled.folds
+        part = (
+            [sum(col) / len(folds) for col in zip(*(f["coef"] for f in folds))],
+            sum(f["intercept"] for f in folds) / len(folds),
+        )
+    elif model.sklearn_model is not None:
+        part = sklearn_linear_part(model.sklearn_model)
+    elif model.legacy is not None:
+        part = (model.legacy[0], model.legacy[1])
+    terms: Optional[Tuple[List[str], List[float], float]] = None
+    if part is not None:
+        pairs = [(n, w) for n, w in zip(model.feature_names, part[0]) if n in FEATURE_NAMES]
+        terms = ([n for n, _ in pairs], [w for _, w in pairs], part[1])
+    model.__dict__["_linear_terms"] = terms
+    return terms
+
+
+def strictly_monotone(model: LoadedModel) -> bool:
+    """
+    True when the score is a strictly increasing function of the linear_terms logit, so a bound on
+    the logit orders scores with no ties the logit does not have: model.json, or one compiled fold
+    with a sigmoid calibrator. Isotonic steps and fold averages can tie (or reorder) buyers whose
+    logits differ.
+    """
+    if model.legacy is not None:
+        return True
+    if model.compiled is None or len(model.compiled.folds) != 1:
+        return False
+    cal = model.compiled.folds[0]["calibrator"]
+    return cal["type"] == "sigmoid" and cal["a"] < 0  # p = sigmoid(-(a * z + b))
+
+
+@profiling.timed_stage("model")
+def predict_batch(model: LoadedModel, X: "np.ndarray") -> "np.ndarray":
+    """
+    Scores a FEATURE_NAMES-ordered matrix with one model call.
+    """
+    if model.sklearn_model is not None:
+        Xm = select_features(X, model.feature_names)
+        return np.asarray(model.sklearn_model.predict_proba(Xm)[:, 1], dtype=np.float64)
+    # linear first stages: weights are expanded once per model instead of reordering X per call
+    expanded = model.__dict__.get("_expanded_weights")
+    if expanded is None:
+        if model.compiled is not None:
+            expanded = [expand_weights(fold["coef"], model.feature_names) for fold in model.compiled.folds]
         else:
-            assert legacy is not None
-            p = score_with_model(legacy[0], legacy[1], feats, feature_names)
-        out_scores.append(
-            {
-                "buyerId": buyer_id,
-                "score": float(clamp01(p)),
-                "features": feats,
+            assert model.legacy is not None
+            expanded = [expand_weights(model.legacy[0], model.feature_names)]
+        model.__dict__["_expanded_weights"] = expanded
+    if model.compiled is not None:
+        return compiled_predict_batch(model.compiled, X, expanded)
+    assert model.legacy is not None
+    return sigmoid_array(X @ expanded[0] + model.legacy[1])
+
+
+OUTPUT_MODES = ["rows", "columnar", "ndjson"]
+
+
+def parse_output(inp: Dict[str, Any]) -> Tuple[str, bool]:
+    """
+    "output": "rows" (default) | "columnar" | "ndjson"; "features": false drops per-buyer breakdowns.
+    """
+    mode = inp.get("output", "rows")
+    if mode not in OUTPUT_MODES:
+        raise ValueError(f"output must be one of {OUTPUT_MODES}")
+    with_features = inp.get("features", True)
+    if not isinstance(with_features, bool):
+        raise ValueError("features must be a boolean")
+    return mode, with_features
+
+
+@dataclass
+class ScoredBuyers:
+    """
+    One deal's scores before encoding: ids / X / probs cover every scored row and `rows` picks
+    (and orders) the ones to emit. The numpy-free path carries ready-made entry dicts instead.
+    `shadow` maps shadow model name -> scores aligned with the emitted rows; `contributions` is
+    (feature names, per-feature logit terms aligned with the emitted rows) for "explain" requests.
+    """
+
+    ids: List[str]
+    X: Any = None
+    probs: Any = None
+    rows: Any = None
+    entries: Optional[List[Dict[str, Any]]] = None
+    shadow: Optional[Dict[str, Any]] = None
+    contributions: Optional[Tuple[List[str], Any]] = None
+
+    def __len__(self) -> int:
+        if self.entries is not None:
+            return len(self.entries)
+        return len(self.ids) if self.rows is None else len(self.rows)
+
+    def iter_rows(self, with_features: bool = True, chunk: int = 2048) -> Iterator[Dict[str, Any]]:
+        # arrays are converted a chunk at a time so streaming never materializes every entry
+        shadow = self.shadow or {}
+        contrib_names, contribs = self.contributions or ([], None)
+        if self.entries is not None:
+            for pos, e in enumerate(self.entries):
+                entry = e if with_features else {"buyerId": e["buyerId"], "score": e["score"]}
+                if shadow:
+                    entry = {**entry, "shadow": {name: vals[pos] for name, vals in shadow.items()}}
+                if contribs is not None:
+                    entry = {**entry, "contributions": dict(zip(contrib_names, contribs[pos]))}
+                yield entry
+            return
+        import buyer_index
+
+        rows = np.arange(len(self.ids)) if self.rows is None else self.rows
+        for start in range(0, len(rows), chunk):
+            with profiling.timed("encode"):
+                part = rows[start : start + chunk]
+                ids = buyer_index.take_ids(self.ids, part)
+                probs = self.probs[part].tolist()
+                feats = self.X[part].tolist() if with_features else None
+                shadows = {name: vals[start : start + chunk].tolist() for name, vals in shadow.items()}
+                terms = contribs[start : start + chunk].tolist() if contribs is not None else None
+                entries: List[Dict[str, Any]] = []
+                for j in range(len(part)):
+                    entry: Dict[str, Any] = {"buyerId": ids[j], "score": probs[j]}
+                    if feats is not None:
+                        entry["features"] = dict(zip(FEATURE_NAMES, feats[j]))
+                    if shadows:
+                        entry["shadow"] = {name: vals[j] for name, vals in shadows.items()}
+                    if terms is not None:
+                        entry["contributions"] = dict(zip(contrib_names, terms[j]))
+                    entries.append(entry)
+            yield from entries
+
+    def to_rows(self, with_features: bool = True) -> List[Dict[str, Any]]:
+        return list(self.iter_rows(with_features))
+
+    @profiling.timed_stage("encode")
+    def to_columns(self, with_features: bool = True) -> Dict[str, Any]:
+        """
+        {"buyerIds": [...], "scores": [...], "features": {name: [...]}}
+        """
+        if self.entries is not None:
+            out: Dict[str, Any] = {
+                "buyerIds": [e["buyerId"] for e in self.entries],
+                "scores": [e["score"] for e in self.entries],
             }
-        )
+            if with_features:
+                out["features"] = {
+                    name: [float(e["features"].get(name, 0.0)) for e in self.entries] for name in FEATURE_NAMES
+                }
+            if self.shadow:
+                out["shadow"] = {name: list(vals) for name, vals in self.shadow.items()}
+            if self.contributions is not None:
+                names, contribs = self.contributions
+                out["contributions"] = {name: [row[j] for row in contribs] for j, name in enumerate(names)}
+            return out
+        import buyer_index
 
-    sys.stdout.write(
-        json.dumps(
-            {"modelVersion": model_version, "scores": out_scores},
-            ensure_ascii=False,
-        )
-    )
+        sel = slice(None) if self.rows is None else self.rows
+        out = {
+            "buyerIds": list(self.ids) if self.rows is None else buyer_index.take_ids(self.ids, self.rows),
+            "scores": self.probs[sel].tolist(),
+        }
+        if with_features:
+            Xs = self.X[sel]
+            out["features"] = {name: Xs[:, j].tolist() for j, name in enumerate(FEATURE_NAMES)}
+        if self.shadow:
+            out["shadow"] = {name: vals.tolist() for name, vals in self.shadow.items()}
+        if self.contributions is not None:
+            names, contribs = self.contributions
+            out["contributions"] = {name: contribs[:, j].tolist() for j, name in enumerate(names)}
+        return out
 
 
-if __name__ == "__main__":
-    main()
+def score_shadows(scored: ScoredBuyers, shadows: List[Tuple[str, "LoadedModel"]]) -> ScoredBuyers:
+    """
+    Scores the emitted rows with each shadow model, reusing the feature matrix the serving model
+    already built (no second feature pass).
+    """
+    if not shadows:
+        return scored
+    out: Dict[str, Any] = {}
+    for name, model in shadows:
+        if scored.entries is not None:
+            out[name] = [float(clamp01(predict_row(model, e["features"]))) for e in scored.entries]
+        else:
+            X = scored.X if scored.rows is None else scored.X[scored.rows]
+            out[name] = clamp01_array(predict_batch(model, X)) if len(X) else np.zeros(0, dtype=np.float64)
+    scored.shadow = out
+    return scored
+
+
+CONTRIBUTION_DECIMALS = 6
+
+
+@profiling.timed_stage("explain")
+def explain_scores(scored: ScoredBuyers, model: LoadedModel) -> ScoredBuyers:
+    """
+    Per-feature logit contributions (weight x value) of the emitted rows: one elementwise product
+    over the feature matrix already built for scoring, no extra model calls. With the response's
+    contributionBias they sum to the model's (mean pre-calibration) logit.
+    """
+    terms = linear_terms(model)
+    assert terms is not None  # checked by score_single_deal before scoring starts
+    names, weights, _ = terms
+    if scored.entries is not None:
+        rows = [
+            [round(w * float(e["features"].get(n, 0.0)), CONTRIBUTION_DECIMALS) for n, w in zip(names, weights)]
+            for e in scored.entries
+        ]
+        scored.contributions = (names, rows)
+        return scored
+    cols = [FEATURE_NAMES.index(n) for n in names]
+    X = scored.X if scored.rows is None else scored.X[scored.rows]
+    contribs = X[:, cols] * np.asarray(weights, dtype=np.float64)
+    # rounded: full-precision floats would double the serialized payload for no explanatory value
+    scored.contributions = (names, np.round(contribs, CONTRIBUTION_DECIMALS))
+    return scored
+
+
+def encode_scores(scored: ScoredBuyers, mode: str, with_features: bool) -> Dict[str, Any]:
+    if mode == "columnar":
+        return scored.to_columns(with_features)
+    return {"scores": scored.to_rows(with_features)}
+
+
+def score_buyers_batch(model: LoadedModel, deal: Dict[str, Any], buyers: List[Any]) -> ScoredBuyers:
+    # INFER_BATCH=0 forces the per-row reference path
+    if np is None or (os.environ.get("INFER_BATCH", "1") or "").strip() == "0":
+        entries = score_buyers_rowwise(model, deal, buyers)
+        return ScoredBuyers([e["buyerId"] for e in entries], entries=entries)
+
+    rows = [b for b in buyers if isinstance(b, dict)]
+    X = build_feature_matrix(deal, rows)
+    probs = clamp01_array(predict_batch(model, X)) if rows else np.zeros(0, dtype=np.float64)
+    return ScoredBuyers([str(b.get("id", "")) for b in rows], X, probs)
+
+
+def score_buyers(model: LoadedModel, deal: Dict[str, Any], buyers: List[Any]) -> List[Dict[str, Any]]:
+    return score_buyers_batch(model, deal, buyers).to_rows()
+
+
+HARD_FILTER_FEATURES = ["sectorMatch", "geoMatch", "sizeFit", "ebitdaFit"]
+
+
+def parse_require(v: Any) -> List[str]:
+    """
+    "require": ["sizeFit", "ebitdaFit", ...] -> hard mandate bits a buyer must pass to be scored.
+    """
+    if v is None:
+        return []
+    if not isinstance(v, list) or any(x not in HARD_FILTER_FEATURES for x in v):
+        raise ValueError(f"require must be a list drawn from {HARD_FILTER_FEATURES}")
+    return list(dict.fromkeys(v))
+
+
+@profiling.timed_stage("features")
+def hard_filter_rows(deal: Dict[str, Any], index: Any, require: List[str]) -> "np.ndarray":
+    """
+    Rows passing every required binary feature, computed before (and instead of) the full matrix.
+    A band bit backed by an interval tree seeds the candidate set in O(log N + k); the remaining
+    bits are then only checked on those candidates.
+    """
+    rows: Optional["np.ndarray"] = None
+    for name in sorted(require, key=lambda r: r not in index.intervals):
+        if rows is None and name in index.intervals:
+            value = float(deal.get(BAND_FEATURES[name][0], 0) or 0)
+            rows = np.sort(index.intervals[name].query(value))
+            continue
+        if name in BAND_FEATURES:
+            deal_key, lo_key, hi_key = BAND_FEATURES[name]
+            lo, hi = index.numeric[lo_key], index.numeric[hi_key]
+            if rows is not None:
+                lo, hi = lo[rows], hi[rows]
+            keep = interval_fit(float(deal.get(deal_key, 0) or 0), lo, hi) > 0
+        else:
+            if name == "sectorMatch":
+                col = index.sector_match(normalize_sector(str(deal.get("sector", ""))))
+            else:
+                col = index.geo_match(normalize_geo(str(deal.get("geography", ""))))
+            keep = (col if rows is None else col[rows]) > 0
+        rows = np.flatnonzero(keep) if rows is None else rows[keep]
+    return np.arange(len(index)) if rows is None else rows
+
+
+_score_cache: Dict[str, Any] = {}
+
+# set by main() for --worker / --socket; one-shot processes only cache to INFER_CACHE_DIR
+_resident = False
+
+
+def get_score_cache() -> Any:
+    """
+    Process-wide ScoreCache (see score_cache.py), or None when disabled / numpy missing, and in
+    one-shot mode without INFER_CACHE_DIR (nothing would outlive the process).
+    """
+    if "cache" not in _score_cache:
+        if np is None:
+            _score_cache["cache"] = None
+        else:
+            import score_cache
+
+            _score_cache["cache"] = score_cache.cache_from_env(_resident)
+    return _score_cache["cache"]
+
+
+# request-scoped {score cache key: (rows, X, probs)} from a micro-batch (see prescore_batch)
+_prescored = threading.local()
+
+
+@contextmanager
+def using_prescored(entries: Dict[str, Any]) -> Iterator[None]:
+    prev = getattr(_prescored, "entries", None)
+    _prescored.entries = entries
+    try:
+        yield
+    finally:
+        _prescored.entries = prev
+
+
+def score_deal_indexed(
+    model: LoadedModel, deal: Dict[str, Any], index: Any, require: Optional[List[str]] = None
+) -> Tuple[Optional["np.ndarray"], Any, "np.ndarray", "np.ndarray"]:
+    """
+    Returns (kept rows, scored index, feature matrix, probabilities). With `require`, buyers failing
+    a hard bit are dropped up front: kept rows index into `index` and the scored index is that subset
+    (kept rows is None when nothing was filtered).
+    Results are memoized in the score cache; returned arrays must be treated as read-only.
+    """
+    cache = get_score_cache()
+    prescored = getattr(_prescored, "entries", None)
+    key = ""
+    if cache is not None or prescored:
+        import score_cache
+
+        key = score_cache.make_key(model.fingerprint, score_cache.deal_fingerprint(deal), index.fingerprint(), require or [])
+        hit = prescored.get(key) if prescored else None
+        if hit is None and cache is not None:
+            hit = cache.get(key)
+        if hit is not None:
+            rows, X, probs = hit
+            return rows, (index if rows is None else index.subset(rows)), X, probs
+
+    rows = hard_filter_rows(deal, index, require) if require else None
+    scored = index if rows is None else index.subset(rows)
+    X = build_feature_matrix_indexed(deal, scored)
+    probs = clamp01_array(predict_batch(model, X)) if len(scored) else np.zeros(0, dtype=np.float64)
+    if cache is not None:
+        cache.put(key, (rows, X, probs))
+    return rows, scored, X, probs
+
+
+def score_indexed(
+    model: LoadedModel,
+    deal: Dict[str, Any],
+    index: Any,
+    top_k: Optional[int] = None,
+    require: Optional[List[str]] = None,
+    pool: Any = None,
+) -> ScoredBuyers:
+    if pool is not None and top_k is not None:
+        return score_sharded(pool, model, deal, index, top_k, require)
+    # feature rows are only converted for the emitted (top-K) rows, at encoding time
+    _, scored, X, probs = score_deal_indexed(model, deal, index, require)
+    return ScoredBuyers(scored.ids, X, probs, None if top_k is None else top_k_rows(probs, top_k))
 
 
+_retriever_lock = threading.Lock()
+
+
+def parse_retrieve(inp: Dict[str, Any]) -> bool:
+    v = inp.get("retrieve")
+    if v is None:
+        return (os.environ.get("INFER_RETRIEVE", "0") or "").strip() in ("1", "true", "True")
+    if not isinstance(v, bool):
+        raise ValueError("retrieve must be a boolean")
+    return v
+
+
+def get_retriever(index: Any) -> Any:
+    """
+    The index's ClusterIndex (see retriever.py), built on first use and kept on the index; None below
+    INFER_RETRIEVE_MIN buyers (default 50000), where exhaustive scoring is already cheap.
+    """
+    if len(index) < int(os.environ.get("INFER_RETRIEVE_MIN", "50000") or 0):
+        return None
+    with _retriever_lock:
+        tree = index.__dict__.get("_retriever")
+        if tree is None:
+            import retriever
+
+            tree = retriever.ClusterIndex(index)
+            index.__dict__["_retriever"] = tree
+        return tree
+
+
+def score_retrieved(
+    model: LoadedModel, deal: Dict[str, Any], index: Any, top_k: int, require: Optional[List[str]] = None
+) -> Optional[Tuple[ScoredBuyers, Dict[str, Any]]]:
+    """
+    Top-K over a first-stage candidate set: the cluster index bounds the model's linear logit per
+    cluster, and only the candidates it returns are scored (exactly, with the full model). Returns
+    (scores, retrieval stats), or None when retrieval does not apply (small index, no linear stage).
+    INFER_RETRIEVE_BUDGET caps the candidates (0: stop only once the top K is proven). "proven" is
+    only reported for strictly_monotone models; for the others the logit bound is a close proxy.
+    Candidate scoring skips the score cache.
+    """
+    tree = get_retriever(index)
+    terms = linear_terms(model) if tree is not None else None
+    if terms is None:
+        return None
+    names, weights, bias = terms
+    with profiling.timed("retrieve"):
+        rows, info = tree.candidates(
+            deal,
+            dict(zip(names, weights)),
+            bias,
+            top_k,
+            require,
+            int(os.environ.get("INFER_RETRIEVE_BUDGET", "0") or 0),
+        )
+    candidates = index.subset(rows)
+    keep = hard_filter_rows(deal, candidates, require) if require else None
+    scored = candidates if keep is None else candidates.subset(keep)
+    X = build_feature_matrix_indexed(deal, scored)
+    probs = clamp01_array(predict_batch(model, X)) if len(scored) else np.zeros(0, dtype=np.float64)
+    info["proven"] = bool(info["proven"]) and strictly_monotone(model)
+    return ScoredBuyers(scored.ids, X, probs, top_k_rows(probs, top_k)), info
+
+
+_shard_pool: Dict[str, Any] = {}
+_shard_lock = threading.Lock()
+
+# the buyer index a shard worker scores; set once per pool process by _init_shard_worker
+_shard_index: Any = None
+
+
+def shard_procs() -> int:
+    return int(os.environ.get("INFER_PROCS", "0") or 0)
+
+
+def _init_shard_worker(index: Any) -> None:
+    # with the fork start method Pool initargs are inherited, not pickled: every worker reads the
+    # parent's columns through copy-on-write pages
+    global _shard_index
+    _shard_index = index
+
+
+def get_shard_pool(index: Any) -> Any:
+    """
+    Forked process pool whose workers share `index`, or None when sharding is off: INFER_PROCS < 2,
+    fewer than INFER_SHARD_MIN buyers (default 200000), or no fork start method. One pool is kept
+    per process; a different index (buyers.json changed) or worker count replaces it, letting the
+    old pool finish the shards already queued. The replacement is only forked while this is the
+    process's sole thread; once socket / reload / batch threads run, scoring stays in-process
+    until the worker restarts (see start_shard_pool).
+    """
+    procs = shard_procs()
+    if procs < 2 or np is None or "fork" not in multiprocessing.get_all_start_methods():
+        return None
+    if len(index) < int(os.environ.get("INFER_SHARD_MIN", "200000") or 0):
+        return None
+    with _shard_lock:
+        if _shard_pool.get("index") is not index or _shard_pool.get("procs") != procs:
+            old = _shard_pool.get("pool")
+            if old is not None:
+                old.close()
+            pool = None
+            if threading.active_count() == 1:
+                ctx = multiprocessing.get_context("fork")
+                pool = ctx.Pool(procs, initializer=_init_shard_worker, initargs=(index,))
+            else:
+                sys.stderr.write("infer: buyer DB changed with threads running; sharding off until restart\n")
+                sys.stderr.flush()
+            _shard_pool["pool"] = pool
+            _shard_pool["index"] = index
+            _shard_pool["procs"] = procs
+        return _shard_pool["pool"]
+
+
+def start_shard_pool() -> None:
+    """
+    Forks the shard pool at worker startup, before the socket / reload threads exist (a fork taken
+    while another thread holds a lock can deadlock the child).
+    """
+    if shard_procs() < 2 or np is None:
+        return
+    try:
+        get_shard_pool(get_buyer_index())
+    except FileNotFoundError:
+        pass  # no buyer DB yet: sharding starts with the first universe request
+
+
+def score_shard(
+    model: LoadedModel, deal: Dict[str, Any], start: int, stop: int, top_k: int, require: List[str]
+) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """
+    Pool task: the top-K of rows [start, stop) of the worker's index, as (index rows, X, probs).
+    Only the model and deal are pickled per task; the shard is a view of the inherited columns.
+    """
+    shard = _shard_index.shard(start, stop)
+    rows = hard_filter_rows(deal, shard, require) if require else None
+    scored = shard if rows is None else shard.subset(rows)
+    X = build_feature_matrix_indexed(deal, scored)
+    probs = clamp01_array(predict_batch(model, X)) if len(scored) else np.zeros(0, dtype=np.float64)
+    best = top_k_rows(probs, top_k)
+    kept = best if rows is None else rows[best]
+    return kept + start, X[best], probs[best]
+
+
+@profiling.timed_stage("shards")
+def score_sharded(
+    pool: Any,
+    model: LoadedModel,
+    deal: Dict[str, Any],
+    index: Any,
+    top_k: int,
+    require: Optional[List[str]] = None,
+) -> ScoredBuyers:
+    """
+    Splits the index into one contiguous shard per worker and merges the per-shard top-K lists.
+    Every global top-K row is in its shard's top-K, and the merge orders by (score desc, row asc),
+    so the result is identical to single-process top_k_rows, ties included. Sharded requests skip
+    the score cache: each worker returns only its K best rows.
+    """
+    bounds = np.linspace(0, len(index), shard_procs() + 1).astype(np.int64).tolist()
+    tasks = [(model, deal, a, b, top_k, require or []) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+    parts = pool.starmap(score_shard, tasks) if top_k > 0 else []
+    if not parts:
+        return ScoredBuyers([], np.zeros((0, len(FEATURE_NAMES))), np.zeros(0, dtype=np.float64))
+    rows = np.concatenate([p[0] for p in parts])
+    X = np.concatenate([p[1] for p in parts])
+    probs = np.concatenate([p[2] for p in parts])
+    order = np.lexsort((rows, -probs))[:top_k]
+    import buyer_index
+
+    return ScoredBuyers(buyer_index.take_ids(index.ids, rows[order]), X[order], probs[order])
+
+
+# deal fields engineer_features reads (anything else, e.g. name / description, never changes scores)
+SCORED_DEAL_FIELDS = ["sector", "geography", "dealSize", "ebitda", "strategyTags"]
+
+
+class DealStore:
+    """
+    Recently scored deals by score_cache.deal_fingerprint, so a follow-up request can send
+    {"baseDeal": fingerprint, "delta": {...}} instead of the whole deal. Bounded LRU, thread-safe.
+    """
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max_entries
+        self._deals: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def remember(self, deal: Dict[str, Any]) -> str:
+        import score_cache
+
+        fp = score_cache.deal_fingerprint(deal)
+        with self._lock:
+            self._deals[fp] = dict(deal)
+            self._deals.move_to_end(fp)
+            while len(self._deals) > self.max_entries:
+                self._deals.popitem(last=False)
+        return fp
+
+    def recall(self, fp: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            deal = self._deals.get(fp)
+            if deal is not None:
+                self._deals.move_to_end(fp)
+            return None if deal is None else dict(deal)
+
+
+_deal_store = DealStore()
+
+
+def resolve_deal(inp: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    Returns (deal to score, base deal or None). {"baseDeal": fp, "delta": {...}} applies the delta
+    to a deal this worker scored before.
+    """
+    base_fp = inp.get("baseDeal")
+    if base_fp is None:
+        deal = inp.get("deal") or {}
+        if not isinstance(deal, dict):
+            raise ValueError("Invalid input JSON shape")
+        return deal, None
+    delta = inp.get("delta") or {}
+    if "deal" in inp or not isinstance(base_fp, str) or not isinstance(delta, dict):
+        raise ValueError("Incremental requests take baseDeal (a dealFingerprint) + delta (an object), not deal")
+    base = _deal_store.recall(base_fp)
+    if base is None:
+        raise ValueError("Unknown baseDeal fingerprint (expired or scored by another worker); send the full deal")
+    return {**base, **delta}, base
+
+
+def rescore_indexed(
+    model: LoadedModel, deal: Dict[str, Any], base: Optional[Dict[str, Any]], index: Any
+) -> Tuple["np.ndarray", "np.ndarray", bool]:
+    """
+    Unfiltered (X, probs) for `deal` over the whole index, plus whether it was derived incrementally.
+    If only dealSize / ebitda differ from `base` and base's matrix is still in the score cache, only the
+    dependent columns are recomputed and the model only re-runs on rows whose features moved;
+    otherwise this is a full score.
+    Either way the result is cached, so chains of edits stay incremental.
+    """
+    import score_cache
+
+    cache = get_score_cache()
+    if cache is not None and base is not None:
+        changed = [k for k in SCORED_DEAL_FIELDS if base.get(k) != deal.get(k)]
+        if all(k in DEAL_FIELD_FEATURES for k in changed):
+            key = score_cache.make_key(model.fingerprint, score_cache.deal_fingerprint(deal), index.fingerprint(), [])
+            hit = cache.get(key)
+            if hit is not None:
+                return hit[1], hit[2], True
+            base_key = score_cache.make_key(model.fingerprint, score_cache.deal_fingerprint(base), index.fingerprint(), [])
+            base_hit = cache.get(base_key)
+            if base_hit is not None:
+                _, X_base, probs_base = base_hit
+                with profiling.timed("features"):
+                    new_cols = {
+                        FEATURE_NAMES.index(name): deal_feature(name, deal, index.numeric, index.intervals)
+                        for k in changed
+                        for name in DEAL_FIELD_FEATURES[k]
+                    }
+                    # band bits only flip for buyers near the old/new value; saturated dry powder stays 1.0
+                    moved_mask = np.zeros(len(index), dtype=np.bool_)
+                    for j, col in new_cols.items():
+                        moved_mask |= col != X_base[:, j]
+                    moved = np.flatnonzero(moved_mask)
+                    X = X_base.copy()
+                    for j, col in new_cols.items():
+                        X[:, j] = col
+                if 2 * len(moved) > len(index):
+                    probs = clamp01_array(predict_batch(model, X))
+                else:
+                    probs = probs_base.copy()
+                    if len(moved):
+                        probs[moved] = clamp01_array(predict_batch(model, X[moved]))
+                cache.put(key, (None, X, probs))
+                return X, probs, True
+
+    _, _, X, probs = score_deal_indexed(model, deal, index)
+    return X, probs, False
+
+
+def score_incremental(
+    model: LoadedModel,
+    deal: Dict[str, Any],
+    base: Optional[Dict[str, Any]],
+    index: Any,
+    top_k: Optional[int] = None,
+    require: Optional[List[str]] = None,
+) -> Tuple[ScoredBuyers, bool]:
+    """
+    score_indexed over the full cached matrix: `require` is applied as a mask on the binary feature
+    columns rather than by pruning, so the matrix stays reusable when dealSize / ebitda move.
+    """
+    X, probs, incremental = rescore_indexed(model, deal, base, index)
+    rows: Optional["np.ndarray"] = None
+    if require:
+        keep = np.ones(len(index), dtype=np.bool_)
+        for name in require:
+            keep &= X[:, FEATURE_NAMES.index(name)] >= 1.0
+        rows = np.flatnonzero(keep)
+    if top_k is not None:
+        if rows is None:
+            rows = top_k_rows(probs, top_k)
+        else:
+            rows = rows[top_k_rows(probs[rows], top_k)]
+    return ScoredBuyers(index.ids, X, probs, rows), incremental
+
+
+_buyer_index_cache: Dict[str, Any] = {}
+
+# worker-mode importMs / loadMs, reported by {"op": "stats"}
+_startup_timings: Dict[str, float] = {}
+
+
+def get_buyer_index() -> Any:
+    """
+    Compiled buyer universe, loaded once per process and recompiled when buyers.json changes.
+    """
+    import buyer_index
+
+    path = buyer_index.default_buyers_path()
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Buyer DB not found at {path}. Run: python3 python_ml/generate_buyers.py")
+    root = shared_index_root(path)
+    if root:
+        return get_shared_buyer_index(path, root)
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    if _buyer_index_cache.get("stamp") != stamp:
+        index = buyer_index.load_or_compile(path)
+        # trees only pay off on large universes (a vectorized scan of a few thousand rows is cheaper)
+        if len(index) >= int(os.environ.get("INFER_INTERVAL_INDEX_MIN", "10000") or 0):
+            index.build_interval_indexes()
+        _buyer_index_cache["index"] = index
+        _buyer_index_cache["stamp"] = stamp
+    return _buyer_index_cache["index"]
+
+
+def shared_index_root(buyers_path: str) -> str:
+    """
+    INFER_SHARED_INDEX=1: shared store next to buyers.json (buyers.shared/); any other non-empty
+    value is the store directory (e.g. under /dev/shm); unset / 0: per-process index.
+    """
+    import buyer_index
+
+    value = (os.environ.get("INFER_SHARED_INDEX", "") or "").strip()
+    if value in ("", "0", "false", "False"):
+        return ""
+    if value in ("1", "true", "True"):
+        return buyer_index.default_shared_root(buyers_path)
+    return value
+
+
+def get_shared_buyer_index(buyers_path: str, root: str) -> Any:
+    """
+    Buyer index memory-mapped from the shared store (see buyer_index.publish_shared). Each call reads
+    the CURRENT handle: a new version is attached and swapped in for later requests (requests already
+    running keep the index they started with), and a handle older than buyers.json is republished
+    first, by whichever worker gets the store lock.
+    """
+    import buyer_index
+
+    handle = buyer_index.read_shared_handle(root)
+    st = os.stat(buyers_path)
+    if handle is None or handle.get("stamp") != [st.st_mtime_ns, st.st_size]:
+        handle = buyer_index.refresh_shared(
+            buyers_path, root, int(os.environ.get("INFER_INTERVAL_INDEX_MIN", "10000") or 0)
+        )
+    version = handle["version"]
+    if _buyer_index_cache.get("version") != version:
+        _buyer_index_cache["index"] = buyer_index.attach_shared(root, version)
+        _buyer_index_cache["version"] = version
+        _buyer_index_cache["stamp"] = None
+    return _buyer_index_cache["index"]
+
+
+def load_buyers_raw() -> List[Dict[str, Any]]:
+    # numpy-free fallback for buyerIds/universe requests
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(os.path.join(repo_root, "server", "data", "buyers.json"), "r", encoding="utf-8") as f:
+        payload = json.load(f)
+    buyers = payload.get("buyers") if isinstance(payload, dict) else None
+    return [b for b in (buyers or []) if isinstance(b, dict) and b.get("id") and b.get("name")]
+
+
+def predict_row(model: LoadedModel, feats: Dict[str, float]) -> float:
+    """
+    One buyer's probability from its engineer_features dict (per-row reference path).
+    """
+    sklearn_model = model.sklearn_model
+    legacy = model.legacy
+    feature_names = model.feature_names
+    if model.compiled is not None:
+        return compiled_predict_row(model.compiled, [float(feats.get(name, 0.0)) for name in feature_names])
+    if sklearn_model is not None:
+        # build a single-row feature array in the correct order
+        x = [[float(feats.get(name, 0.0)) for name in feature_names]]
+        try:
+            return float(sklearn_model.predict_proba(x)[0][1])
+        except Exception:
+            # if something goes wrong, fall back to legacy if available
+            if legacy is None:
+                raise
+            return score_with_model(legacy[0], legacy[1], feats, feature_names)
+    assert legacy is not None
+    return score_with_model(legacy[0], legacy[1], feats, feature_names)
+
+
+@profiling.timed_stage("rowwise")
+def score_buyers_rowwise(model: LoadedModel, deal: Dict[str, Any], buyers: List[Any]) -> List[Dict[str, Any]]:
+    out_scores: List[Dict[str, Any]] = []
+    for b in buyers:
+        if not isinstance(b, dict):
+            continue
+        buyer_id = str(b.get("id", ""))
+        feats = engineer_features(deal, b)
+        p = predict_row(model, feats)
+        out_scores.append(
+            {
+                "buyerId": buyer_id,
+                "score": float(clamp01(p)),
+                "features": feats,
+            }
+        )
+    return out_scores
+
+
+def parse_top_k(v: Any) -> Optional[int]:
+    if v is None:
+        return None
+    if isinstance(v, bool) or not isinstance(v, (int, float)) or v < 0 or int(v) != v:
+        raise ValueError("topK must be a non-negative integer")
+    return int(v)
+
+
+@profiling.timed_stage("select")
+def top_k_rows(scores: "np.ndarray", k: int) -> "np.ndarray":
+    """
+    Row indices of the k highest scores, ordered by (score desc, row asc).
+    Partial selection (O(n)) + a sort of just the k winners; ties at the cut go to the lower row.
+    """
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.zeros(0, dtype=np.int64)
+    if k >= n:
+        cand = np.arange(n)
+    else:
+        kth = np.partition(scores, n - k)[n - k]
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[: k - len(above)]
+        cand = np.concatenate([above, ties])
+    return cand[np.lexsort((cand, -scores[cand]))]
+
+
+@profiling.timed_stage("select")
+def top_k_rowwise(scores: List[Dict[str, Any]], k: int) -> List[Dict[str, Any]]:
+    # numpy-free equivalent of top_k_rows over score dicts
+    best = heapq.nsmallest(k, enumerate(scores), key=lambda t: (-t[1]["score"], t[0]))
+    return [s for _, s in best]
+
+
+@profiling.timed_stage("buyers")
+def buyer_index_for_request(inp: Dict[str, Any]) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Resolves the request's buyers to a BuyerIndex (compiled DB, DB subset, or inline profiles
+    compiled on the fly) plus any response fields describing that source.
+    """
+    import buyer_index
+
+    buyer_ids = inp.get("buyerIds")
+    if buyer_ids is None and not inp.get("universe"):
+        buyers = inp.get("buyers") or []
+        if not isinstance(buyers, list):
+            raise ValueError("Invalid input JSON shape")
+        return buyer_index.compile_buyers(buyers, server_defaults=False), {}
+
+    index = get_buyer_index()
+    extra: Dict[str, Any] = {"buyerDbVersion": index.version}
+    if buyer_ids is not None:
+        rows, missing = index.rows_for_ids(buyer_ids)
+        index = index.subset(rows)
+        if missing:
+            extra["missingBuyerIds"] = missing
+    return index, extra
+
+
+@profiling.timed_stage("buyers")
+def buyers_raw_for_request(inp: Dict[str, Any]) -> List[Any]:
+    # numpy-free counterpart of buyer_index_for_request
+    buyer_ids = inp.get("buyerIds")
+    if buyer_ids is None and not inp.get("universe"):
+        buyers = inp.get("buyers") or []
+        if not isinstance(buyers, list):
+            raise ValueError("Invalid input JSON shape")
+        return buyers
+    raw = load_buyers_raw()
+    if buyer_ids is not None:
+        by_id = {str(b.get("id")): b for b in raw}
+        raw = [by_id[str(i)] for i in buyer_ids if str(i) in by_id]
+    return raw
+
+
+def iter_multi_deal(model: LoadedModel, inp: Dict[str, Any], mode: str, with_features: bool) -> Iterator[Dict[str, Any]]:
+    """
+    Header object first, then one {"scores": ...} payload per deal: a matrix row (M floats) without
+    topK, else that deal's top-K list encoded per `mode`.
+    Buyer-side preprocessing (index build / row selection) happens once for all deals.
+    Buyers failing a `require` bit score 0.0 in matrix rows and are left out of top-K lists.
+    """
+    deals = inp.get("deals")
+    if not isinstance(deals, list) or not all(isinstance(d, dict) for d in deals):
+        raise ValueError("Invalid input JSON shape (deals must be a list of objects)")
+    top_k = parse_top_k(inp.get("topK"))
+    require = parse_require(inp.get("require"))
+    header: Dict[str, Any] = {"modelVersion": model.model_version}
+
+    if np is None:
+        buyers = [b for b in buyers_raw_for_request(inp) if isinstance(b, dict)]
+        if top_k is None:
+            yield {**header, "buyerIds": [str(b.get("id", "")) for b in buyers]}
+            for d in deals:
+                scores = score_buyers_rowwise(model, d, buyers)
+                yield {"scores": [s["score"] if passes_require(s["features"], require) else 0.0 for s in scores]}
+        else:
+            yield header
+            for d in deals:
+                entries = score_rowwise_filtered(model, d, buyers, top_k, require)
+                yield encode_scores(ScoredBuyers([e["buyerId"] for e in entries], entries=entries), mode, with_features)
+        return
+
+    index, extra = buyer_index_for_request(inp)
+    header.update(extra)
+    if top_k is None:
+        yield {**header, "buyerIds": list(index.ids)}
+        for d in deals:
+            kept, _, _, probs = score_deal_indexed(model, d, index, require)
+            if kept is None:
+                row = probs
+            else:
+                row = np.zeros(len(index), dtype=np.float64)
+                row[kept] = probs
+            with profiling.timed("encode"):
+                scores = row.tolist()
+            yield {"scores": scores}
+        return
+
+    yield header
+    for d in deals:
+        yield encode_scores(score_indexed(model, d, index, top_k, require), mode, with_features)
+
+
+def handle_multi_deal(model: LoadedModel, inp: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    N deals x M buyers. Without topK: {"buyerIds": [...M], "scoreMatrix": [[...M] per deal]}.
+    With topK: {"results": [{"scores": [top-K entries]} per deal]} (columnar: one column set per deal).
+    """
+    mode, with_features = parse_output(inp)
+    payloads = iter_multi_deal(model, inp, mode, with_features)
+    out = next(payloads)
+    if "buyerIds" in out:
+        out["scoreMatrix"] = [p["scores"] for p in payloads]
+    else:
+        out["results"] = list(payloads)
+    return out
+
+
+def passes_require(features: Dict[str, float], require: List[str]) -> bool:
+    return all(features.get(name, 0.0) >= 1.0 for name in require)
+
+
+def score_rowwise_filtered(
+    model: LoadedModel, deal: Dict[str, Any], buyers: List[Any], top_k: Optional[int], require: List[str]
+) -> List[Dict[str, Any]]:
+    # numpy-free topK / require handling
+    scores = [s for s in score_buyers_rowwise(model, deal, buyers) if passes_require(s["features"], require)]
+    return scores if top_k is None else top_k_rowwise(scores, top_k)
+
+
+def score_single_deal(
+    model: LoadedModel,
+    inp: Dict[str, Any],
+    chunk_size: int = 0,
+    shadows: Optional[List[Tuple[str, LoadedModel]]] = None,
+) -> Tuple[Dict[str, Any], Iterator[ScoredBuyers]]:
+    """
+    Validates a single-deal request and returns (response header, scored batches).
+    chunk_size > 0 scores inline profiles lazily in chunks of that many buyers (NDJSON streaming);
+    index-backed requests are always scored in one batch (and go through the score cache).
+    Shadow models and "explain" contributions reuse each batch's feature matrix.
+    """
+    header, batches = _score_single_deal(model, inp, chunk_size)
+    if shadows:
+        header["shadowModels"] = {name: m.model_version for name, m in shadows}
+        batches = (score_shadows(scored, shadows) for scored in batches)
+    if parse_explain(inp):
+        terms = linear_terms(model)
+        if terms is None:
+            raise ValueError("explain needs a linear model (model.json or a calibrated logistic regression)")
+        header["contributionBias"] = terms[2]
+        batches = (explain_scores(scored, model) for scored in batches)
+    return header, batches
+
+
+def parse_explain(inp: Dict[str, Any]) -> bool:
+    explain = inp.get("explain", False)
+    if not isinstance(explain, bool):
+        raise ValueError("explain must be a boolean")
+    return explain
+
+
+def check_multi_deal_options(inp: Dict[str, Any], shadows: Optional[List[Tuple[str, LoadedModel]]]) -> None:
+    if shadows:
+        raise ValueError("shadow scoring is only supported for single-deal requests")
+    if parse_explain(inp):
+        raise ValueError("explain is only supported for single-deal requests")
+
+
+def _score_single_deal(
+    model: LoadedModel, inp: Dict[str, Any], chunk_size: int
+) -> Tuple[Dict[str, Any], Iterator[ScoredBuyers]]:
+    buyer_ids = inp.get("buyerIds")
+    if not (buyer_ids is None or isinstance(buyer_ids, list)):
+        raise ValueError("Invalid input JSON shape")
+    deal, base = resolve_deal(inp)
+    top_k = parse_top_k(inp.get("topK"))
+    require = parse_require(inp.get("require"))
+    by_reference = buyer_ids is not None or bool(inp.get("universe"))
+    header: Dict[str, Any] = {"modelVersion": model.model_version}
+
+    # "incremental": true (or a baseDeal follow-up) keeps the full matrix cached for cheap re-scoring
+    if np is not None and (base is not None or inp.get("incremental") is True):
+        index, extra = buyer_index_for_request(inp)
+        scored, incremental = score_incremental(model, deal, base, index, top_k, require)
+        header.update(extra)
+        header["dealFingerprint"] = _deal_store.remember(deal)
+        if base is not None:
+            header["incremental"] = incremental
+        return header, iter([scored])
+
+    if np is None:
+        entries = score_rowwise_filtered(model, deal, buyers_raw_for_request(inp), top_k, require)
+        return header, iter([ScoredBuyers([e["buyerId"] for e in entries], entries=entries)])
+
+    # buyerIds / universe (compiled DB) or topK / require (pruned scoring): go through a BuyerIndex
+    if by_reference or top_k is not None or require:
+        index, extra = buyer_index_for_request(inp)
+        header.update(extra)
+        whole_db = top_k is not None and buyer_ids is None and bool(inp.get("universe"))
+        if whole_db and parse_retrieve(inp):
+            retrieved = score_retrieved(model, deal, index, top_k, require)
+            if retrieved is not None:
+                header["retrieval"] = retrieved[1]
+                return header, iter([retrieved[0]])
+        # only the resident DB index is sharded; subsets and inline profiles are per-request
+        pool = get_shard_pool(index) if whole_db else None
+        return header, iter([score_indexed(model, deal, index, top_k, require, pool)])
+
+    buyers = inp.get("buyers") or []
+    if not isinstance(buyers, list):
+        raise ValueError("Invalid input JSON shape")
+    if chunk_size <= 0:
+        return header, iter([score_buyers_batch(model, deal, buyers)])
+    return header, (score_buyers_batch(model, deal, buyers[i : i + chunk_size]) for i in range(0, len(buyers), chunk_size))
+
+
+def handle_request(
+    model: LoadedModel, inp: Any, shadows: Optional[List[Tuple[str, LoadedModel]]] = None
+) -> Dict[str, Any]:
+    if not isinstance(inp, dict):
+        raise ValueError("Invalid input JSON shape")
+    if "deals" in inp:
+        check_multi_deal_options(inp, shadows)
+        return handle_multi_deal(model, inp)
+
+    mode, with_features = parse_output(inp)
+    header, batches = score_single_deal(model, inp, shadows=shadows)
+    return {**header, **encode_scores(next(batches), mode, with_features)}
+
+
+def iter_response(
+    model: LoadedModel, inp: Any, shadows: Optional[List[Tuple[str, LoadedModel]]] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Response objects for one request. Usually exactly one; with "output": "ndjson" a header
+    ({..., "stream": "start"}), one object per buyer (per deal for "deals" requests, tagged with
+    dealIndex) and a closing {"stream": "end", "count": n}.
+    If profiling timings are active, the last object carries them.
+    """
+    timings = profiling.active()
+    if not isinstance(inp, dict) or inp.get("output") != "ndjson":
+        out = handle_request(model, inp, shadows)
+        yield out if timings is None else profiling.attach(out, timings)
+        return
+
+    _, with_features = parse_output(inp)
+    count = 0
+    if "deals" in inp:
+        check_multi_deal_options(inp, shadows)
+        payloads = iter_multi_deal(model, inp, "rows", with_features)
+        yield {**next(payloads), "stream": "start"}
+        for i, payload in enumerate(payloads):
+            yield {"dealIndex": i, **payload}
+            count += 1
+    else:
+        chunk_size = max(1, int(os.environ.get("INFER_STREAM_CHUNK", "2048") or 2048))
+        header, batches = score_single_deal(model, inp, chunk_size, shadows)
+        yield {**header, "stream": "start"}
+        for scored in batches:
+            for entry in scored.iter_rows(with_features, chunk_size):
+                yield entry
+                count += 1
+    end: Dict[str, Any] = {"stream": "end", "count": count}
+    yield end if timings is None else profiling.attach(end, timings)
+
+
+def wants_timings(inp: Any) -> bool:
+    return isinstance(inp, dict) and inp.get("timings") is True
+
+
+def iter_routed_response(models: ModelSet, inp: Any) -> Iterator[Dict[str, Any]]:
+    """
+    iter_response() on the model the request routes to (plus its shadows). Requests that name a
+    model, carry a routingKey or ask for shadows get "model": <served name> on the first object.
+    """
+    name, model = models.route(inp)
+    shadows = models.shadows(inp, name)
+    routed = isinstance(inp, dict) and any(inp.get(k) is not None for k in ("model", "routingKey", "shadow"))
+    for i, out in enumerate(iter_response(model, inp, shadows)):
+        yield {"model": name, **out} if routed and i == 0 else out
+
+
+def handle_line(models: ModelSet, line: str) -> Iterator[Dict[str, Any]]:
+    """
+    One worker request -> its response object(s), each tagged with the request id.
+    Errors are reported per request (never fatal); a streamed response that fails midway ends
+    with an error object instead of the stream end marker.
+    """
+    timings = profiling.Timings()
+    try:
+        with timings.stage("parse"):
+            inp = json.loads(line)
+    except Exception as e:
+        yield {"id": None, "error": f"{type(e).__name__}: {e}"}
+        return
+    yield from handle_input(models, inp, timings)
+
+
+def handle_input(models: ModelSet, inp: Any, timings: profiling.Timings) -> Iterator[Dict[str, Any]]:
+    """
+    handle_line() for an already parsed request; `timings` has its parse stage recorded.
+    """
+    req_id: Any = None
+    try:
+        if isinstance(inp, dict):
+            req_id = inp.get("id")
+        if isinstance(inp, dict) and inp.get("op") == "ping":
+            yield {
+                "id": req_id,
+                "ok": True,
+                "modelVersion": models.primary.model_version,
+                "previousModelVersion": models.previous.get(PRIMARY_MODEL),
+            }
+        elif isinstance(inp, dict) and inp.get("op") == "stats":
+            cache = get_score_cache()
+            yield {
+                "id": req_id,
+                "modelVersion": models.primary.model_version,
+                "previousModelVersion": models.previous.get(PRIMARY_MODEL),
+                "models": {name: m.model_version for name, m in models.models.items()},
+                "previousModels": models.previous,
+                "split": dict(models.split) or None,
+                "reload": _reloader.stats() if _reloader is not None else None,
+                "cache": cache.stats() if cache is not None else None,
+                "microbatch": _batcher.stats() if _batcher is not None else None,
+                "startup": _startup_timings,
+            }
+        elif isinstance(inp, dict) and inp.get("op") == "reload":
+            if _reloader is None:
+                raise ValueError("reload is only available in worker mode")
+            yield {
+                "id": req_id,
+                "reloaded": _reloader.reload_all(),
+                "models": {name: m.model_version for name, m in models.models.items()},
+                "reload": _reloader.stats(),
+            }
+        else:
+            # stays active while the caller serializes each yielded object (serializeMs)
+            with profiling.activate(timings if wants_timings(inp) else None):
+                for out in iter_routed_response(models, inp):
+                    yield {"id": req_id, **out}
+    except Exception as e:
+        yield {"id": req_id, "error": f"{type(e).__name__}: {e}"}
+
+
+def dumps_response(out: Dict[str, Any]) -> str:
+    """
+    json.dumps of one response object. Attached timings are written last, so their serializeMs and
+    totalMs cover the rest of this object.
+    """
+    timings = out.get("timings")
+    if not isinstance(timings, profiling.Timings):
+        with profiling.timed("serialize"):
+            return json.dumps(out, ensure_ascii=False)
+    body = {k: v for k, v in out.items() if k != "timings"}
+    with timings.stage("serialize"):
+        text = json.dumps(body, ensure_ascii=False)
+    head = text[:-1] + ", " if body else "{"
+    return head + '"timings": ' + json.dumps(timings.summary()) + "}"
+
+
+def write_responses(responses: Iterator[Dict[str, Any]], write: Any, flush: Any, flush_every: int = 512) -> None:
+    # streamed responses are flushed in batches of lines, single responses immediately
+    pending = 0
+    for out in responses:
+        write(dumps_response(out) + "\n")
+        pending += 1
+        if pending >= flush_every:
+            flush()
+            pending = 0
+    flush()
+
+
+def serve_stream(models: ModelSet, rfile: Any, wfile: Any) -> None:
+    """
+    Newline-delimited JSON loop: one request per line in, its response line(s) out.
+    """
+    for line in rfile:
+        if not line.strip():
+            continue
+        with profiling.profile_request("worker"):
+            write_responses(handle_line(models, line), wfile.write, wfile.flush)
+
+
+def serve_unix_socket(models: ModelSet, socket_path: str) -> None:
+    """
+    Same protocol as stdin/stdout worker mode; one thread per connection, models shared read-only.
+    """
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                with profiling.profile_request("socket"):
+                    write_responses(
+                        handle_line(models, line.decode("utf-8")),
+                        lambda text: self.wfile.write(text.encode("utf-8")),
+                        self.wfile.flush,
+                    )
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    with socketserver.ThreadingUnixStreamServer(socket_path, Handler) as server:
+        server.daemon_threads = True
+        versions = ", ".join(f"{name}={m.model_version}" for name, m in models.models.items())
+        sys.stderr.write(f"infer worker listening on {socket_path} (models: {versions})\n")
+        sys.stderr.flush()
+        try:
+            server.serve_forever()
+        finally:
+            os.unlink(socket_path)
+
+
+def batchable(inp: Any) -> bool:
+    """
+    Single-deal requests over the buyer DB (universe / buyerIds) that score through
+    score_deal_indexed, i.e. can take a micro-batch's pre-scored rows.
+    """
+    return (
+        isinstance(inp, dict)
+        and isinstance(inp.get("deal"), dict)
+        and "deals" not in inp
+        and "op" not in inp
+        and inp.get("baseDeal") is None
+        and inp.get("incremental") is not True
+        and (inp.get("buyerIds") is not None or bool(inp.get("universe")))
+    )
+
+
+def retrieves(inp: Dict[str, Any], index: Any, model: LoadedModel) -> bool:
+    # universe top-K requests that score_retrieved answers from a candidate set
+    try:
+        enabled = inp.get("topK") is not None and inp.get("buyerIds") is None and parse_retrieve(inp)
+    except ValueError:
+        return False
+    return enabled and get_retriever(index) is not None and linear_terms(model) is not None
+
+
+@profiling.timed_stage("batch")
+def prescore_batch(models: ModelSet, inputs: List[Any]) -> Dict[str, Any]:
+    """
+    Scores every batchable request in `inputs` at once: per (served model, buyer selection, require)
+    group each distinct deal gets its feature rows built, and one predict_batch call covers the whole
+    stacked deals x buyers matrix. Returns score-cache entries keyed like score_deal_indexed, which the
+    requests then pick up (using_prescored) on their normal path, so responses are unchanged.
+    Anything invalid is left out of the shared matrix, for that path to report per request.
+    """
+    import score_cache
+
+    groups: Dict[Tuple[str, str, Tuple[str, ...]], List[Dict[str, Any]]] = {}
+    for inp in inputs:
+        if not batchable(inp):
+            continue
+        try:
+            name, _ = models.route(inp)
+            require = tuple(parse_require(inp.get("require")))
+        except ValueError:
+            continue
+        groups.setdefault((name, json.dumps(inp.get("buyerIds")), require), []).append(inp)
+
+    cache = get_score_cache()
+    out: Dict[str, Any] = {}
+    for (name, _, require), members in groups.items():
+        model = models.models[name]
+        try:
+            index, _ = buyer_index_for_request(members[0])
+        except (ValueError, OSError):
+            continue
+        if get_shard_pool(index) is not None:
+            continue  # sharded top-K skips score_deal_indexed
+        todo: Dict[str, Dict[str, Any]] = {}
+        for inp in members:
+            try:
+                if retrieves(inp, index, model):
+                    continue
+                key = score_cache.make_key(
+                    model.fingerprint, score_cache.deal_fingerprint(inp["deal"]), index.fingerprint(), list(require)
+                )
+            except Exception:
+                continue
+            if key in out or key in todo:
+                continue
+            hit = cache.get(key) if cache is not None else None
+            if hit is not None:
+                out[key] = hit
+            else:
+                todo[key] = inp["deal"]
+        parts = []
+        for key, deal in todo.items():
+            try:
+                rows = hard_filter_rows(deal, index, list(require)) if require else None
+                X = build_feature_matrix_indexed(deal, index if rows is None else index.subset(rows))
+            except Exception:
+                continue  # e.g. a non-numeric dealSize: only this deal's requests see the error
+            parts.append((key, rows, X))
+        if not parts:
+            continue
+        stacked = np.concatenate([X for _, _, X in parts])
+        probs = clamp01_array(predict_batch(model, stacked)) if len(stacked) else np.zeros(0, dtype=np.float64)
+        start = 0
+        for key, rows, X in parts:
+            entry = (rows, X, probs[start : start + len(X)])
+            start += len(X)
+            out[key] = entry
+            if cache is not None:
+                cache.put(key, entry)
+    return out
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent worker requests: lines are queued on the event loop and handed to one
+    scoring thread as a batch once the oldest has waited `window` seconds or `max_batch` are queued.
+    While a batch is scoring, new arrivals keep queueing and go out together as soon as it finishes,
+    so batches grow with load instead of queueing one by one. Responses keep per-request ids; each
+    request's timings gain queueMs (time spent waiting for its batch) and batchMs (shared scoring).
+    """
+
+    def __init__(self, models: ModelSet, window: float, max_batch: int) -> None:
+        self.models = models
+        self.window = window
+        self.max_batch = max(1, max_batch)
+        self._pending: List[Tuple[str, float, Any, Any]] = []  # (line, received, emit, flush)
+        self._timer: Any = None
+        self._busy = False
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="infer-batch")
+        self._loop: Any = None
+        self.batches = 0
+        self.requests = 0
+        self.prescored = 0
+        self.largest = 0
+
+    def submit(self, line: str, emit: Any, flush: Any) -> None:
+        """
+        Queues one request line (event loop thread). emit(text) / flush() are called from the scoring thread.
+        """
+        self._loop = self._loop or asyncio.get_running_loop()
+        self._pending.append((line, time.perf_counter(), emit, flush))
+        if len(self._pending) >= self.max_batch:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = self._loop.call_later(self.window, self._dispatch)
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._busy or not self._pending:
+            return  # _done() sends whatever queued meanwhile
+        batch, self._pending = self._pending[: self.max_batch], self._pending[self.max_batch :]
+        self._busy = True
+        self._loop.run_in_executor(self._executor, self.run_batch, batch).add_done_callback(self._done)
+
+    def _done(self, future: Any) -> None:
+        self._busy = False
+        if future.exception() is not None:
+            sys.stderr.write(f"infer micro-batch failed: {future.exception()!r}\n")
+            sys.stderr.flush()
+        if self._pending:
+            self._dispatch()
+
+    async def drain(self) -> None:
+        """
+        Waits until every queued request has been answered (stdin EOF).
+        """
+        while self._pending or self._busy:
+            self._dispatch()
+            await asyncio.sleep(self.window)
+
+    def run_batch(self, batch: List[Tuple[str, float, Any, Any]]) -> None:
+        started = time.perf_counter()
+        parsed: List[Tuple[Any, profiling.Timings, Any, Any]] = []
+        for line, received, emit, flush in batch:
+            timings = profiling.Timings(received)
+            timings.add("queue", started - received)
+            try:
+                with timings.stage("parse"):
+                    inp = json.loads(line)
+            except Exception as e:
+                write_responses(iter([{"id": None, "error": f"{type(e).__name__}: {e}"}]), emit, flush)
+                continue
+            parsed.append((inp, timings, emit, flush))
+
+        with profiling.profile_request("microbatch"):
+            shared = profiling.Timings()
+            try:
+                with profiling.activate(shared):
+                    entries = prescore_batch(self.models, [inp for inp, _, _, _ in parsed])
+            except Exception as e:
+                # every request is still answered, each on its own unbatched path
+                sys.stderr.write(f"infer micro-batch prescore failed: {e!r}\n")
+                sys.stderr.flush()
+                entries = {}
+            with using_prescored(entries):
+                for inp, timings, emit, flush in parsed:
+                    if wants_timings(inp):
+                        timings.add("batch", shared.stages.get("batch", 0.0))
+                    try:
+                        write_responses(handle_input(self.models, inp, timings), emit, flush)
+                    except Exception as e:  # e.g. a closed connection: the rest of the batch still goes out
+                        sys.stderr.write(f"infer micro-batch response failed: {e!r}\n")
+                        sys.stderr.flush()
+        self.batches += 1
+        self.requests += len(batch)
+        self.prescored += len(entries)
+        self.largest = max(self.largest, len(batch))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "windowMs": self.window * 1e3,
+            "maxBatch": self.max_batch,
+            "batches": self.batches,
+            "requests": self.requests,
+            "prescoredDeals": self.prescored,
+            "largestBatch": self.largest,
+        }
+
+
+_batcher: Optional[MicroBatcher] = None
+
+# request lines can carry whole inline buyer lists
+_LINE_LIMIT = 1 << 30
+
+
+def batcher_from_env(models: ModelSet) -> Optional[MicroBatcher]:
+    """
+    INFER_MICROBATCH_MS > 0 (e.g. 2-5) turns on micro-batching for --worker / --socket;
+    INFER_MICROBATCH_MAX caps a batch (default 64).
+    """
+    window_ms = float(os.environ.get("INFER_MICROBATCH_MS", "0") or 0)
+    if window_ms <= 0 or np is None:
+        return None
+    return MicroBatcher(models, window_ms / 1e3, int(os.environ.get("INFER_MICROBATCH_MAX", "64") or 64))
+
+
+async def serve_stream_batched(batcher: MicroBatcher, rfile: Any, wfile: Any) -> None:
+    """
+    serve_stream() through a MicroBatcher; responses are written by the scoring thread in batch order.
+    """
+    loop = asyncio.get_running_loop()
+    # blocking readline on a helper thread: works for pipes, files and ttys alike
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="infer-stdin") as stdin_reader:
+        while True:
+            line = await loop.run_in_executor(stdin_reader, rfile.readline)
+            if not line:
+                break
+            if line.strip():
+                batcher.submit(line, wfile.write, wfile.flush)
+    await batcher.drain()
+
+
+async def serve_unix_socket_batched(batcher: MicroBatcher, socket_path: str) -> None:
+    """
+    serve_unix_socket() on asyncio: requests from every connection share the batcher.
+    """
+    loop = asyncio.get_running_loop()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        def emit(text: str) -> None:
+            loop.call_soon_threadsafe(writer.write, text.encode("utf-8"))
+
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if line.strip():
+                batcher.submit(line.decode("utf-8"), emit, lambda: None)
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = await asyncio.start_unix_server(handle, socket_path, limit=_LINE_LIMIT)
+    versions = ", ".join(f"{name}={m.model_version}" for name, m in batcher.models.models.items())
+    sys.stderr.write(
+        f"infer worker listening on {socket_path} (models: {versions}; micro-batch {batcher.window * 1e3:g} ms)\n"
+    )
+    sys.stderr.flush()
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        os.unlink(socket_path)
+
+
+def main() -> None:
+    global _reloader, _batcher, _resident
+    parser = argparse.ArgumentParser(description="Buyer-match inference")
+    parser.add_argument("--worker", action="store_true", help="serve NDJSON requests on stdin/stdout")
+    parser.add_argument("--socket", default="", help="serve NDJSON requests on a Unix socket at this path")
+    args = parser.parse_args()
+
+    if args.worker or args.socket:
+        _resident = True
+        t0 = time.perf_counter()
+        models = load_model_set()
+        _startup_timings["importMs"] = round((t0 - _IMPORT_STARTED) * 1e3, 3)
+        _startup_timings["loadMs"] = round((time.perf_counter() - t0) * 1e3, 3)
+        start_shard_pool()
+        _reloader = reloader_from_env(models)
+        _batcher = batcher_from_env(models)
+        if _batcher is not None:
+            if args.socket:
+                asyncio.run(serve_unix_socket_batched(_batcher, args.socket))
+            else:
+                asyncio.run(serve_stream_batched(_batcher, sys.stdin, sys.stdout))
+            return
+        if args.socket:
+            serve_unix_socket(models, args.socket)
+        else:
+            serve_stream(models, sys.stdin, sys.stdout)
+        return
+
+    timings = profiling.Timings(_IMPORT_STARTED)
+    timings.add("import", time.perf_counter() - _IMPORT_STARTED)
+    raw = sys.stdin.read()
+    if not raw.strip():
+        raise ValueError("No stdin JSON provided")
+
+    with profiling.profile_request("one-shot"):
+        with timings.stage("parse"):
+            inp = json.loads(raw)
+        with timings.stage("load"):
+            models = load_model_set()
+        with profiling.activate(timings if wants_timings(inp) else None):
+            if isinstance(inp, dict) and inp.get("output") == "ndjson":
+                write_responses(iter_routed_response(models, inp), sys.stdout.write, sys.stdout.flush)
+            else:
+                sys.stdout.write(dumps_response(next(iter_routed_response(models, inp))))
+
+
+if __name__ == "__main__":
+    main()
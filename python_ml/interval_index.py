@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Static interval index for buyer mandate bands.
+
+sizeFit / ebitdaFit in infer.engineer_features are containment tests
+`lo <= value and (hi <= 0 or value <= hi)` against each buyer's band. A linear scan touches
+every buyer; this centered interval tree answers "which buyers' bands contain value" in
+O(log N + k) node work (plus an O(log N) binary search per visited node).
+
+Layout: each internal node keeps the intervals that straddle its center twice, sorted by lo
+(ascending) and by hi (descending), so a query takes a contiguous prefix of one of them.
+Small subtrees are leaves scanned with one vectorized comparison.
+The tree is stored as flat arrays (a node table plus one segment per node in each pool), so it
+can be published next to a shared buyer index and memory-mapped by every worker (arrays()).
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+
+import numpy as np  # type: ignore
+
+
+LEAF_SIZE = 64
+
+
+def band_bounds(lo: np.ndarray, hi: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Buyer bands -> closed intervals: hi <= 0 means "no upper bound". Returns (rows, lo, hi) for
+    bands that can contain anything (NaN bounds and lo > hi bands never match and are dropped).
+    """
+    lo = np.asarray(lo, dtype=np.float64)
+    hi = np.asarray(hi, dtype=np.float64)
+    hi = np.where(hi <= 0, np.inf, hi)
+    valid = ~np.isnan(lo) & ~np.isnan(hi) & (lo <= hi)
+    rows = np.flatnonzero(valid)
+    return rows, lo[rows], hi[rows]
+
+
+# node table columns
+KIND, LEFT, RIGHT, START, STOP = range(5)
+LEAF, INNER = 0, 1
+
+
+class IntervalIndex:
+    def __init__(self, lo: np.ndarray, hi: np.ndarray) -> None:
+        """
+        lo/hi are the raw buyer band columns (e.g. minDealSize/maxDealSize), one entry per row.
+        """
+        self.n = len(lo)
+        rows, blo, bhi = band_bounds(lo, hi)
+        # per node [START, STOP) of the pools; leaf: rows_a = rows, key_a = lo, key_b = hi;
+        # inner: rows_a / key_a sorted by lo ascending, rows_b / key_b = -hi sorted ascending
+        self._table: List[List[int]] = []
+        self._centers: List[float] = []
+        self._segments: List[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = []
+        self._size = 0
+        if len(rows):
+            self._build(rows, blo, bhi)
+        segs = self._segments
+        self.nodes = np.asarray(self._table, dtype=np.int64).reshape(-1, 5)
+        self.centers = np.asarray(self._centers, dtype=np.float64)
+        self.rows_a = np.concatenate([s[0] for s in segs]) if segs else np.zeros(0, dtype=np.int64)
+        self.key_a = np.concatenate([s[1] for s in segs]) if segs else np.zeros(0, dtype=np.float64)
+        self.rows_b = np.concatenate([s[2] for s in segs]) if segs else np.zeros(0, dtype=np.int64)
+        self.key_b = np.concatenate([s[3] for s in segs]) if segs else np.zeros(0, dtype=np.float64)
+        del self._table, self._centers, self._segments
+
+    def _add_segment(self, rows_a: np.ndarray, key_a: np.ndarray, rows_b: np.ndarray, key_b: np.ndarray) -> Tuple[int, int]:
+        start = self._size
+        self._segments.append((rows_a.astype(np.int64), key_a, rows_b.astype(np.int64), key_b))
+        self._size += len(rows_a)
+        return start, self._size
+
+    def _build(self, rows: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> int:
+        node_id = len(self._table)
+        self._table.append([LEAF, -1, -1, 0, 0])
+        self._centers.append(0.0)
+        if len(rows) <= LEAF_SIZE:
+            self._table[node_id][START:] = self._add_segment(rows, lo, rows, hi)
+            return node_id
+
+        endpoints = np.concatenate([lo, hi[np.isfinite(hi)]])
+        center = float(np.median(endpoints))
+        left = hi < center
+        right = lo > center
+        mid = ~(left | right)
+
+        m_rows, m_lo, m_hi = rows[mid], lo[mid], hi[mid]
+        by_lo = np.argsort(m_lo, kind="stable")
+        by_hi = np.argsort(-m_hi, kind="stable")
+        start, stop = self._add_segment(m_rows[by_lo], m_lo[by_lo], m_rows[by_hi], -m_hi[by_hi])
+        left_id = self._build(rows[left], lo[left], hi[left]) if left.any() else -1
+        right_id = self._build(rows[right], lo[right], hi[right]) if right.any() else -1
+        self._table[node_id] = [INNER, left_id, right_id, start, stop]
+        self._centers[node_id] = center
+        return node_id
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            "nodes": self.nodes,
+            "centers": self.centers,
+            "rows_a": self.rows_a,
+            "key_a": self.key_a,
+            "rows_b": self.rows_b,
+            "key_b": self.key_b,
+        }
+
+    @classmethod
+    def from_arrays(cls, n: int, arrays: Dict[str, np.ndarray]) -> "IntervalIndex":
+        """
+        Rebuilds an index from arrays() output (e.g. memory-mapped .npy files) without copying.
+        """
+        tree = cls.__new__(cls)
+        tree.n = n
+        for name, values in arrays.items():
+            setattr(tree, name, values)
+        return tree
+
+    def query(self, value: float) -> np.ndarray:
+        """
+        Rows whose band contains `value` (unsorted, int64).
+        """
+        if value != value or not len(self.nodes):
+            return np.zeros(0, dtype=np.int64)
+        out: List[np.ndarray] = []
+        node_id = 0
+        while node_id >= 0:
+            kind, left_id, right_id, start, stop = self.nodes[node_id].tolist()
+            if kind == LEAF:
+                lo, hi = self.key_a[start:stop], self.key_b[start:stop]
+                out.append(self.rows_a[start:stop][(lo <= value) & (value <= hi)])
+                break
+            center = float(self.centers[node_id])
+            if value < center:
+                # straddling intervals all have hi >= center > value; need lo <= value
+                cut = np.searchsorted(self.key_a[start:stop], value, side="right")
+                out.append(self.rows_a[start : start + cut])
+                node_id = left_id
+            elif value > center:
+                # straddling intervals all have lo <= center < value; need hi >= value
+                cut = np.searchsorted(self.key_b[start:stop], -value, side="right")
+                out.append(self.rows_b[start : start + cut])
+                node_id = right_id
+            else:
+                out.append(self.rows_a[start:stop])
+                break
+        if not out:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate(out).astype(np.int64, copy=False)
+
+    def contains_mask(self, value: float) -> np.ndarray:
+        """
+        float64[n] 0/1 column, identical to infer.interval_fit(value, lo, hi).
+        """
+        col = np.zeros(self.n, dtype=np.float64)
+        col[self.query(value)] = 1.0
+        return col
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Per-request stage timings and on-demand profiling for infer.py.
+
+Timings: a request with `"timings": true` gets a `timings` block (milliseconds, monotonic clock)
+with one entry per stage that ran:
+- importMs / loadMs: module import and artifact loading (one-shot mode; the worker pays these once
+  and reports them in `{"op": "stats"}`)
+- queueMs: time waiting for a micro-batch (INFER_MICROBATCH_MS)
+- parseMs: json.loads of the request
+- buyersMs: resolving the buyer set (buyers.json index, buyerIds subset, inline profile compile)
+- retrieveMs: first-stage candidate retrieval ("retrieve": true)
+- featuresMs: feature engineering (incl. hard-filter pruning)
+- modelMs: model evaluation (serving and shadow models)
+- batchMs: the micro-batch's shared scoring pass, which this request's features/model time then mostly skips
+- explainMs: per-feature contributions ("explain": true)
+- shardsMs: sharded top-K over INFER_PROCS processes (their features/model time is not split out)
+- rowwiseMs: per-row reference path (features + model interleaved)
+- selectMs: top-K selection
+- encodeMs: building the response payload (rows / columns)
+- serializeMs: json.dumps
+- totalMs: wall time from request start to the timings block being written
+
+Stages are recorded through a thread-local "active" Timings, so scoring functions only need a
+`@timed_stage("features")` / `with timed("features"):` and cost one attribute lookup when no request
+asked for timings.
+
+Profiling (env, per request, written to stderr):
+- INFER_PROFILE=cprofile: cProfile stats sorted by cumulative time
+- INFER_PROFILE=tracemalloc: top allocation sites + peak traced memory
+- INFER_PROFILE_LIMIT: number of rows printed (default 25)
+tracemalloc is process-wide, so concurrent socket-worker requests share one trace.
+"""
+
+from __future__ import annotations
+
+import functools
+import io
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+
+class Timings:
+    def __init__(self, started: Optional[float] = None) -> None:
+        self.started = time.perf_counter() if started is None else started
+        self.stages: Dict[str, float] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t0)
+
+    def summary(self) -> Dict[str, float]:
+        out = {f"{name}Ms": round(seconds * 1e3, 3) for name, seconds in self.stages.items()}
+        out["totalMs"] = round((time.perf_counter() - self.started) * 1e3, 3)
+        return out
+
+
+_local = threading.local()
+
+
+def active() -> Optional[Timings]:
+    return getattr(_local, "timings", None)
+
+
+@contextmanager
+def activate(timings: Optional[Timings]) -> Iterator[None]:
+    """
+    Makes `timings` the target of timed() on this thread (None: no-op).
+    """
+    if timings is None:
+        yield
+        return
+    prev = active()
+    _local.timings = timings
+    try:
+        yield
+    finally:
+        _local.timings = prev
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    timings = active()
+    if timings is None:
+        yield
+        return
+    with timings.stage(name):
+        yield
+
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def timed_stage(name: str) -> Callable[[F], F]:
+    """
+    Decorator form of timed() for functions that are a stage on their own.
+    """
+
+    def wrap(fn: F) -> F:
+        @functools.wraps(fn)
+        def inner(*args: Any, **kwargs: Any) -> Any:
+            timings = active()
+            if timings is None:
+                return fn(*args, **kwargs)
+            with timings.stage(name):
+                return fn(*args, **kwargs)
+
+        return inner  # type: ignore[return-value]
+
+    return wrap
+
+
+def profile_mode() -> str:
+    return (os.environ.get("INFER_PROFILE", "") or "").strip().lower()
+
+
+@contextmanager
+def profile_request(label: str = "request") -> Iterator[None]:
+    """
+    Wraps one request in cProfile / tracemalloc when INFER_PROFILE is set; summary goes to stderr.
+    """
+    mode = profile_mode()
+    if mode not in ("cprofile", "tracemalloc"):
+        yield
+        return
+    limit = int(os.environ.get("INFER_PROFILE_LIMIT", "25") or 25)
+
+    if mode == "cprofile":
+        import cProfile
+        import pstats
+
+        prof = cProfile.Profile()
+        prof.enable()
+        try:
+            yield
+        finally:
+            prof.disable()
+            buf = io.StringIO()
+            pstats.Stats(prof, stream=buf).sort_stats("cumulative").print_stats(limit)
+            _emit(label, mode, buf.getvalue())
+        return
+
+    import tracemalloc
+
+    started_here = not tracemalloc.is_tracing()
+    if started_here:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    try:
+        yield
+    finally:
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if started_here:
+            tracemalloc.stop()
+        lines = [f"peak traced memory: {peak / 1024:.1f} KiB"]
+        lines += [str(stat) for stat in after.compare_to(before, "lineno")[:limit]]
+        _emit(label, mode, "\n".join(lines) + "\n")
+
+
+def _emit(label: str, mode: str, text: str) -> None:
+    sys.stderr.write(f"--- infer {mode} profile ({label}) ---\n{text}")
+    sys.stderr.flush()
+
+
+def attach(out: Dict[str, Any], timings: Timings) -> Dict[str, Any]:
+    """
+    Marks a response object to carry `timings`; dumps_response fills it in after serializing the rest.
+    """
+    out["timings"] = timings
+    return out
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+First-stage candidate retrieval for whole-universe top-K scoring.
+
+Buyers are grouped by k-means over profile vectors (sector / geography one-hots, log deal-size and
+EBITDA bands, log dry powder, activity). Each cluster keeps summaries of its members (OR / AND of
+their bitmask rows, band extremes, dry-powder and activity ranges) that bound every model feature
+for any deal, and with the model's linear weights bound every member's logit. A query visits
+clusters by upper bound and stops once K members are guaranteed to beat every unvisited cluster,
+or once a candidate budget is spent (approximate mode). infer.py then scores the candidates exactly.
+
+For a linear model with a strictly monotone link (model.json, a single sigmoid-calibrated fold) the
+stopping rule is exact: the candidates contain the true top K. Isotonic calibration maps a range of
+logits to one score, so a buyer outside the candidates can tie the K-th score and win the tie on row
+order; fold ensembles are bounded through their fold-averaged logit. For those the bound is a close
+proxy and infer.py does not report the result as proven; `python3 python_ml/benchmarks.py retrieval`
+reports recall@K.
+"""
+
+from __future__ import annotations
+
+import heapq
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np  # type: ignore
+
+from buyer_index import BuyerIndex, normalize_token, popcount, token_mask
+
+
+# bound columns, in infer.FEATURE_NAMES order
+FEATURES = ["sectorMatch", "geoMatch", "sizeFit", "dryPowderFit", "activityLevel", "ebitdaFit", "tagOverlap"]
+
+PROFILE_NUMERIC = ["minDealSize", "maxDealSize", "minEbitda", "maxEbitda", "dryPowder"]
+
+KMEANS_SAMPLE = 20000
+# sector / geography carry the largest weights; scaling their one-hots keeps clusters categorically
+# pure, which tightens those bounds (3x roughly halves the candidates at 60k buyers)
+ONEHOT_WEIGHT = 3.0
+MAX_CLUSTERS = 2048
+
+
+def unpack_bits(bits: np.ndarray, vocab_size: int) -> np.ndarray:
+    """
+    [n, words] bitmask rows -> [n, vocab_size] 0/1 float32 (bit j of the row = vocab entry j).
+    """
+    as_bytes = np.ascontiguousarray(bits.astype(bits.dtype.newbyteorder("<"), copy=False)).view(np.uint8)
+    return np.unpackbits(as_bytes, axis=1, bitorder="little")[:, :vocab_size].astype(np.float32)
+
+
+def profile_vectors(index: BuyerIndex) -> np.ndarray:
+    """
+    float32[n, d] buyer profile vectors: sector / geography one-hots (x ONEHOT_WEIGHT), standardized
+    log1p of the band and dry-powder columns, activity (pastDeals / 20, clipped) in [0, 1].
+    """
+    parts = [
+        ONEHOT_WEIGHT * unpack_bits(index.sector_bits, len(index.sector_vocab)),
+        ONEHOT_WEIGHT * unpack_bits(index.geo_bits, len(index.geo_vocab)),
+    ]
+    for key in PROFILE_NUMERIC:
+        col = np.log1p(np.maximum(np.nan_to_num(index.numeric[key].astype(np.float64)), 0.0))
+        std = col.std()
+        parts.append(((col - col.mean()) / (std if std > 0 else 1.0)).astype(np.float32)[:, None])
+    activity = np.clip(np.nan_to_num(index.numeric["pastDeals"].astype(np.float64)) / 20.0, 0.0, 1.0)
+    parts.append(activity.astype(np.float32)[:, None])
+    return np.hstack(parts)
+
+
+def nearest_centroid(vectors: np.ndarray, centroids: np.ndarray, chunk: int = 65536) -> np.ndarray:
+    c_norm = (centroids * centroids).sum(axis=1)
+    labels = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk):
+        part = vectors[start : start + chunk]
+        # |v - c|^2 up to the per-row |v|^2 term, which does not change the argmin
+        labels[start : start + chunk] = np.argmin(c_norm - 2.0 * (part @ centroids.T), axis=1)
+    return labels
+
+
+def kmeans(vectors: np.ndarray, k: int, seed: int = 0, iters: int = 10) -> np.ndarray:
+    """
+    Lloyd's k-means on a sample of at most KMEANS_SAMPLE rows; returns float32[k, d] centroids.
+    """
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(len(vectors), min(len(vectors), KMEANS_SAMPLE), replace=False)]
+    k = min(k, len(sample))
+    centroids = sample[rng.choice(len(sample), k, replace=False)].copy()
+    for _ in range(iters):
+        labels = nearest_centroid(sample, centroids)
+        counts = np.bincount(labels, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]  # empty clusters keep their centroid
+    return centroids
+
+
+class ClusterIndex:
+    """
+    Buyers grouped into k-means clusters of their profile vectors, with per-cluster feature bounds.
+    Rows of cluster c are order[starts[c]:starts[c + 1]] (ascending).
+    """
+
+    def __init__(self, index: BuyerIndex, n_clusters: Optional[int] = None, seed: int = 0) -> None:
+        n = len(index)
+        self.index = index
+        vectors = profile_vectors(index)
+        k = n_clusters or max(1, min(MAX_CLUSTERS, n // 32))
+        labels = nearest_centroid(vectors, kmeans(vectors, k, seed)) if n else np.zeros(0, dtype=np.int64)
+        k = int(labels.max()) + 1 if n else 0
+        self.order = np.argsort(labels, kind="stable")
+        self.sizes = np.bincount(labels, minlength=k)
+        self.starts = np.concatenate([[0], np.cumsum(self.sizes)]).astype(np.int64)
+
+        # summaries over each non-empty cluster's rows (reduceat needs non-empty segments)
+        filled = np.flatnonzero(self.sizes)
+        seg = self.starts[filled]
+
+        def reduce(op: Any, values: np.ndarray, empty: Any) -> np.ndarray:
+            out = np.full((k,) + values.shape[1:], empty, dtype=values.dtype)
+            if len(filled):
+                out[filled] = op.reduceat(values[self.order], seg, axis=0)
+            return out
+
+        self.bits: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for name, bits in (("sector", index.sector_bits), ("geo", index.geo_bits), ("tag", index.tag_bits)):
+            self.bits[name] = (reduce(np.bitwise_or, bits, 0), reduce(np.bitwise_and, bits, 0))
+
+        cols = {key: np.asarray(v, dtype=np.float64) for key, v in index.numeric.items()}
+        self.bands: Dict[str, Tuple[np.ndarray, ...]] = {}
+        for name, (lo_key, hi_key) in {"sizeFit": ("minDealSize", "maxDealSize"), "ebitdaFit": ("minEbitda", "maxEbitda")}.items():
+            lo = cols[lo_key]
+            hi = np.where(cols[hi_key] <= 0, np.inf, cols[hi_key])  # hi <= 0: no upper bound
+            self.bands[name] = (
+                reduce(np.fmin, lo, np.inf),
+                reduce(np.fmax, lo, -np.inf),
+                reduce(np.fmin, hi, np.inf),
+                reduce(np.fmax, hi, -np.inf),
+            )
+        dry = cols["dryPowder"]
+        self.dry_pos_min = reduce(np.fmin, np.where(dry > 0, dry, np.inf), np.inf)
+        self.dry_pos_max = reduce(np.fmax, np.where(dry > 0, dry, -np.inf), -np.inf)
+        self.dry_nonpos = reduce(np.maximum, (dry <= 0).astype(np.int8), 0) > 0
+        activity = np.clip(cols["pastDeals"] / 20.0, 0.0, 1.0)
+        self.activity_min = reduce(np.fmin, activity, 0.0)
+        self.activity_max = reduce(np.fmax, activity, 0.0)
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    def feature_bounds(self, deal: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (lower, upper) float64[clusters, features]: bounds on each FEATURES column over every member
+        of each cluster, for this deal (same normalization and rules as infer.engineer_features).
+        """
+        k = len(self)
+        lb = np.zeros((k, len(FEATURES)), dtype=np.float64)
+        ub = np.zeros((k, len(FEATURES)), dtype=np.float64)
+        index = self.index
+
+        sector = normalize_token(str(deal.get("sector", "")))
+        sector_id = index._sector_id.get(sector) if sector else None
+        if sector_id is not None:
+            lb[:, 0], ub[:, 0] = self._any_bits("sector", [sector_id])
+        geo = normalize_token(str(deal.get("geography", "")))
+        lb[:, 1], ub[:, 1] = self._any_bits("geo", [j for j, g in enumerate(index.geo_vocab) if g and g in geo])
+
+        for col, name, key in ((2, "sizeFit", "dealSize"), (5, "ebitdaFit", "ebitda")):
+            value = float(deal.get(key, 0) or 0)
+            lo_min, lo_max, hi_min, hi_max = self.bands[name]
+            ub[:, col] = (lo_min <= value) & (hi_max >= value)
+            lb[:, col] = (lo_max <= value) & (hi_min >= value)
+
+        cap = max(1.0, float(deal.get("dealSize", 0) or 0)) * 10.0
+        fit_min = np.clip(self.dry_pos_min / cap, 0.0, 1.0)
+        fit_max = np.clip(self.dry_pos_max / cap, 0.0, 1.0)
+        has_pos = np.isfinite(self.dry_pos_max)
+        lb[:, 3] = np.where(has_pos, np.where(self.dry_nonpos, np.minimum(fit_min, 0.65), fit_min), 0.65)
+        ub[:, 3] = np.where(has_pos, np.where(self.dry_nonpos, np.maximum(fit_max, 0.65), fit_max), 0.65)
+        lb[:, 4], ub[:, 4] = self.activity_min, self.activity_max
+
+        wanted = {normalize_token(str(t)) for t in (deal.get("strategyTags") or [])} - {""}
+        known = [index._tag_id[t] for t in wanted if t in index._tag_id]
+        if known:
+            tag_or, tag_and = self.bits["tag"]
+            mask = token_mask(known, tag_or.shape[1], tag_or.dtype.type)
+            lb[:, 6] = popcount(tag_and & mask).sum(axis=1) / float(len(wanted))
+            ub[:, 6] = popcount(tag_or & mask).sum(axis=1) / float(len(wanted))
+        return lb, ub
+
+    def _any_bits(self, name: str, token_ids: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        bits_or, bits_and = self.bits[name]
+        mask = token_mask(token_ids, bits_or.shape[1], bits_or.dtype.type)
+        return (bits_and & mask).any(axis=1).astype(np.float64), (bits_or & mask).any(axis=1).astype(np.float64)
+
+    def candidates(
+        self,
+        deal: Dict[str, Any],
+        weights: Dict[str, float],
+        bias: float,
+        k: int,
+        require: Optional[List[str]] = None,
+        budget: int = 0,
+    ) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """
+        Ascending candidate rows for the top `k` of `deal` under the linear logit (weights by
+        feature name, bias), plus retrieval stats. Clusters are visited by logit upper bound until
+        the k-th best guaranteed lower bound beats every unvisited cluster ("proven"), or until
+        `budget` candidates are collected (0: no budget). Clusters that cannot pass a `require`
+        bit are skipped; only members certain to pass count towards the k.
+        """
+        lb, ub = self.feature_bounds(deal)
+        w = np.asarray([float(weights.get(name, 0.0)) for name in FEATURES], dtype=np.float64)
+        upper = bias + np.where(w >= 0, w * ub, w * lb).sum(axis=1)
+        lower = bias + np.where(w >= 0, w * lb, w * ub).sum(axis=1)
+        cols = [FEATURES.index(r) for r in (require or [])]
+        eligible = (self.sizes > 0) & (ub[:, cols] >= 1.0).all(axis=1)
+        certain = (lb[:, cols] >= 1.0).all(axis=1)
+        visit = np.flatnonzero(eligible)
+        visit = visit[np.lexsort((visit, -upper[visit]))]
+
+        taken: List[int] = []
+        heap: List[Tuple[float, int]] = []  # (lower bound, size) of certain clusters covering the k best
+        covered = 0
+        total = 0
+        proven = True
+        for c in visit.tolist() if k > 0 else []:
+            if covered >= k and upper[c] < heap[0][0]:
+                break
+            if budget and total >= budget:
+                proven = False
+                break
+            taken.append(c)
+            total += int(self.sizes[c])
+            if certain[c]:
+                heapq.heappush(heap, (float(lower[c]), int(self.sizes[c])))
+                covered += int(self.sizes[c])
+                while covered - heap[0][1] >= k:
+                    covered -= heapq.heappop(heap)[1]
+        rows = (
+            np.sort(np.concatenate([self.order[self.starts[c] : self.starts[c + 1]] for c in taken]))
+            if taken
+            else np.zeros(0, dtype=np.int64)
+        )
+        return rows, {"candidates": int(len(rows)), "clusters": len(taken), "ofClusters": len(self), "proven": proven}
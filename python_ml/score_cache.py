@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Score result cache for infer.py.
+
+Bankers re-run the same deal many times while editing memos/outreach, and every re-run used to
+recompute identical buyer scores. Entries hold one deal's scored rows (row ids, feature matrix,
+probabilities) and are keyed by:
+- the loaded model's artifact fingerprint (modelVersion + artifact bytes)
+- a canonical hash of the deal fields that feed engineer_features
+- the buyer set fingerprint (compiled buyers.json hash / inline profile contents)
+- the hard-filter bits the rows were pruned with
+
+Because artifact and buyer-DB hashes are part of the key, retraining or regenerating buyers.json
+can never serve stale scores; old entries simply age out of the LRU.
+
+Config (env):
+- INFER_CACHE_MB: in-memory budget, default 64 (0 disables the cache)
+- INFER_CACHE_DIR: optional on-disk store shared across processes
+- INFER_CACHE_DISK_MB: on-disk budget, default 512
+
+The cache is on in resident workers (--worker / --socket). A one-shot process only uses it with
+INFER_CACHE_DIR set; otherwise the in-memory entries would die with it, after it paid for the keys.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np  # type: ignore
+
+
+CacheEntry = Tuple[Optional[np.ndarray], np.ndarray, np.ndarray]  # (rows or None, X, probs)
+
+
+def deal_fingerprint(deal: Dict[str, Any]) -> str:
+    # same normalization/coercion as infer.engineer_features
+    canonical = {
+        "sector": str(deal.get("sector", "")).strip().lower(),
+        "geography": str(deal.get("geography", "")).strip().lower(),
+        "dealSize": float(deal.get("dealSize", 0) or 0),
+        "ebitda": float(deal.get("ebitda", 0) or 0),
+        "strategyTags": sorted({str(t).strip().lower() for t in (deal.get("strategyTags") or [])} - {""}),
+    }
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def make_key(model_fp: str, deal_fp: str, buyers_fp: str, require: List[str]) -> str:
+    raw = "\x1f".join([model_fp, deal_fp, buyers_fp, ",".join(require)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _entry_bytes(entry: CacheEntry) -> int:
+    rows, X, probs = entry
+    return int(X.nbytes + probs.nbytes + (rows.nbytes if rows is not None else 0))
+
+
+class ScoreCache:
+    """
+    Size-bounded LRU (bytes, not entries) with an optional on-disk second level.
+    Thread-safe: the Unix-socket worker serves connections on several threads.
+    """
+
+    def __init__(self, max_bytes: int, disk_dir: str = "", disk_max_bytes: int = 0) -> None:
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        entry = self._disk_get(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._mem_put(key, entry)
+        return entry
+
+    def put(self, key: str, entry: CacheEntry) -> None:
+        self._mem_put(key, entry)
+        self._disk_put(key, entry)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "maxBytes": self.max_bytes,
+                "hits": self.hits,
+                "diskHits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "diskEvictions": self.disk_evictions,
+                "diskDir": self.disk_dir or None,
+            }
+
+    def _mem_put(self, key: str, entry: CacheEntry) -> None:
+        size = _entry_bytes(entry)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= _entry_bytes(old)
+            self._entries[key] = entry
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= _entry_bytes(evicted)
+                self.evictions += 1
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.npz")
+
+    def _disk_get(self, key: str) -> Optional[CacheEntry]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                rows = z["rows"] if bool(z["has_rows"]) else None
+                entry: CacheEntry = (rows, z["X"], z["probs"])
+            os.utime(path)  # LRU order on disk = mtime
+            return entry
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def _disk_put(self, key: str, entry: CacheEntry) -> None:
+        if not self.disk_dir:
+            return
+        rows, X, probs = entry
+        path = self._disk_path(key)
+        tmp_path = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez(
+                    f,
+                    rows=rows if rows is not None else np.zeros(0, dtype=np.int64),
+                    has_rows=np.asarray(rows is not None),
+                    X=X,
+                    probs=probs,
+                )
+            os.replace(tmp_path, path)
+            self._disk_evict()
+        except OSError:
+            pass  # the disk level is best-effort
+
+    def _disk_evict(self) -> None:
+        files = []
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith(".npz"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.disk_dir, name))
+            except OSError:
+                continue
+            files.append((st.st_mtime_ns, st.st_size, name))
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.disk_dir, name))
+                total -= size
+                with self._lock:
+                    self.disk_evictions += 1
+            except OSError:
+                pass
+
+
+def cache_from_env(resident: bool = True) -> Optional[ScoreCache]:
+    max_mb = float(os.environ.get("INFER_CACHE_MB", "64") or 0)
+    disk_dir = (os.environ.get("INFER_CACHE_DIR", "") or "").strip()
+    if max_mb <= 0 or not (resident or disk_dir):
+        return None
+    return ScoreCache(
+        max_bytes=int(max_mb * 1024 * 1024),
+        disk_dir=disk_dir,
+        disk_max_bytes=int(float(os.environ.get("INFER_CACHE_DISK_MB", "512") or 0) * 1024 * 1024),
+    )
@@ -0,0 +1,76 @@
+"""
+Retraining through different train.py paths must leave infer.py serving the model just trained.
+Runs on a scratch copy of python_ml/ so the checked-in artifacts are never touched.
+"""
+
+from __future__ import annotations
+
+import glob
+import json
+import os
+import shutil
+import subprocess
+import sys
+from typing import Dict
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture()
+def scratch(tmp_path) -> str:
+    for path in glob.glob(os.path.join(ROOT, "*.py")):
+        shutil.copy(path, tmp_path)
+    os.makedirs(tmp_path / "data")
+    os.makedirs(tmp_path / "artifacts")
+    with open(os.path.join(ROOT, "data", "training_data.csv"), encoding="utf-8") as src:
+        lines = src.readlines()[:2001]  # header + 2000 rows keeps each training run short
+    with open(tmp_path / "data" / "training_data.csv", "w", encoding="utf-8") as dst:
+        dst.writelines(lines)
+    return str(tmp_path)
+
+
+def train(scratch: str, **env: str) -> None:
+    full_env = {**os.environ, "TRAIN_CACHE": "0", **env}
+    subprocess.run([sys.executable, "train.py"], cwd=scratch, env=full_env, check=True, capture_output=True)
+
+
+def served(scratch: str) -> Dict[str, object]:
+    code = (
+        "import json, infer; m = infer.load_model(); "
+        "print(json.dumps({'compiled': m.compiled is not None, 'sklearn': m.sklearn_model is not None}))"
+    )
+    env = {k: v for k, v in os.environ.items() if k != "INFER_USE_JOBLIB"}
+    out = subprocess.run([sys.executable, "-c", code], cwd=scratch, env=env, check=True, capture_output=True, text=True)
+    return json.loads(out.stdout)
+
+
+def metadata(scratch: str) -> Dict[str, object]:
+    with open(os.path.join(scratch, "artifacts", "metadata.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_plain_retrain_after_stream_serves_model_json(scratch: str) -> None:
+    train(scratch, TRAIN_STREAM="1")
+    assert served(scratch) == {"compiled": True, "sklearn": False}
+
+    train(scratch)
+    assert metadata(scratch)["trainer"] == "numpy_minibatch"
+    assert not os.path.exists(os.path.join(scratch, "artifacts", "model_compiled.json"))
+    assert served(scratch) == {"compiled": False, "sklearn": False}
+
+
+def test_stream_retrain_after_sklearn_serves_compiled_model(scratch: str) -> None:
+    pytest.importorskip("sklearn")
+    train(scratch, TRAIN_USE_SKLEARN="1")
+    assert metadata(scratch)["trainer"] == "sklearn_calibrated_lbfgs"
+    assert os.path.exists(os.path.join(scratch, "artifacts", "model.joblib"))
+
+    train(scratch, TRAIN_STREAM="1")
+    assert metadata(scratch)["trainer"] == "numpy_minibatch_stream"
+    assert not os.path.exists(os.path.join(scratch, "artifacts", "model.joblib"))
+    assert served(scratch) == {"compiled": True, "sklearn": False}
+
+    train(scratch)
+    assert served(scratch) == {"compiled": False, "sklearn": False}
@@ -12,22 +12,65 @@ Goal:
 
 Artifacts:
 - artifacts/model.joblib (sklearn pipeline)
+- artifacts/model_compiled.json (same calibrated model as plain arrays; infer.py evaluates it without sklearn)
 - artifacts/metadata.json (feature order + versions)
 
 Note:
-- This script prefers sklearn+pandas if installed. If not, it falls back to the legacy pure-python trainer.
+- This script prefers sklearn+pandas if installed. If not, it falls back to the dependency-free trainers:
+  NumPy mini-batch gradient descent when numpy is importable, else the legacy pure-python SGD loop.
+
+Dependency-free trainer (env):
+- TRAIN_TRAINER: "minibatch" (default when numpy is installed) or "sgd" (legacy per-row loop)
+- TRAIN_EPOCHS / TRAIN_LR: passes over the data / step size (minibatch defaults 100 / 0.5; sgd 450 / 0.12)
+- TRAIN_BATCH_SIZE: rows per gradient step (default 256)
+- TRAIN_L2: L2 penalty on the weights, not the bias (default 0)
+- TRAIN_SEED: also seeds the per-epoch shuffle, so a seed + batch size always gives the same weights
+- TRAIN_VAL_FRACTION: rows held out for early stopping (default 0.1)
+- TRAIN_PATIENCE: stop after this many epochs without a validation-loss improvement of at least
+  TRAIN_MIN_DELTA (defaults 5 / 1e-4; 0 disables), keeping the best epoch's weights
+
+Streaming mode (TRAIN_STREAM=1, needs numpy; see train_stream): trains over TRAIN_CHUNK_ROWS-row
+chunks of the CSV (default 65536) with the mini-batch settings above, so memory does not grow with
+the file, then calibrates in one more pass and writes model_compiled.json next to model.json.
+
+Training cache (TRAIN_CACHE, default 1 when numpy is installed; see training_cache.py): the
+numpy trainers and the sklearn path read the features + label from a memory-mapped binary copy of
+the CSV, built on first use and rebuilt when the CSV changes. TRAIN_CACHE=0 parses the CSV.
+
+Hyperparameter search (TRAIN_SEARCH=1, needs numpy; see run_search): trains the mini-batch model
+for every combination of TRAIN_SEARCH_LR (default "0.1,0.5,2.0"), TRAIN_SEARCH_L2 ("0,1e-4,1e-3")
+and TRAIN_SEARCH_POS_WEIGHT (positive-class weight, "1,balanced"), calibrates each with every
+TRAIN_SEARCH_CALIBRATION method ("isotonic,sigmoid"), and ranks them by calibrated log loss on a
+selection split; only the winner is scored on the untouched test split.
+Trials run on TRAIN_SEARCH_PROCS forked workers (default: all cores) sharing one loaded matrix, with
+per-trial seeds derived from TRAIN_SEED; artifacts/leaderboard.json lists every trial and the best
+one is written as model.json + model_compiled.json. The sklearn path's calibration method is
+TRAIN_CALIBRATION ("isotonic" or "sigmoid", default isotonic).
+
+metadata.json records a `training` block for every trainer: wall time, rows/sec, peak RSS, and
+the per-epoch train / validation loss (sklearn: lbfgs iterations per fold and whether they converged).
 """
 
 from __future__ import annotations
 
+import hashlib
 import json
 import math
+import multiprocessing
 import os
 import random
 import csv
+import itertools
+import sys
+import time
 from dataclasses import dataclass
 from datetime import date
-from typing import Dict, List, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # numpy is optional; the legacy trainer needs only the stdlib
+    np = None  # type: ignore
 
 
 MODEL_VERSION = str(date.today())
@@ -69,9 +112,11 @@ def train_logistic_regression(
     data: List[TrainingRow],
     learning_rate: float = 0.12,
     epochs: int = 450,
+    on_epoch: Optional[Callable[[int, Any, float], bool]] = None,
 ) -> Tuple[List[float], float]:
     """
-    Returns (weights, bias)
+    Returns (weights, bias). `on_epoch(epoch, weights, bias)` runs after every epoch; returning
+    True stops training.
     """
     if not data:
         raise ValueError("No training data")
@@ -80,7 +125,7 @@ def train_logistic_regression(
     w = [0.0] * dim
     b = 0.0
 
-    for _ in range(epochs):
+    for epoch in range(1, epochs + 1):
         for row in data:
             z = dot(w, row.x) + b
             p = sigmoid(z)
@@ -89,10 +134,755 @@ def train_logistic_regression(
             for j in range(dim):
                 w[j] -= learning_rate * err * row.x[j]
             b -= learning_rate * err * 1.0
+        if on_epoch is not None and on_epoch(epoch, w, b):
+            break
 
     return w, b
 
 
+def rows_to_arrays(data: List[TrainingRow]) -> Tuple["np.ndarray", "np.ndarray"]:
+    X = np.asarray([row.x for row in data], dtype=np.float64).reshape(len(data), -1)
+    y = np.asarray([row.y for row in data], dtype=np.float64)
+    return X, y
+
+
+def train_logistic_regression_minibatch(
+    X: "np.ndarray",
+    y: "np.ndarray",
+    learning_rate: float = 0.5,
+    epochs: int = 100,
+    batch_size: int = 256,
+    l2: float = 0.0,
+    seed: int = 7,
+    on_epoch: Optional[Callable[[int, Any, float], bool]] = None,
+    pos_weight: float = 1.0,
+) -> Tuple[List[float], float]:
+    """
+    Returns (weights, bias) like train_logistic_regression, minimizing the mean log loss
+    (+ l2 / 2 * |w|^2) with one vectorized gradient step per batch. Rows are reshuffled every epoch
+    by a generator seeded with `seed`; `on_epoch` works as in train_logistic_regression.
+    `pos_weight` scales the loss of positive rows (class weighting).
+    """
+    n = len(X)
+    if n == 0:
+        raise ValueError("No training data")
+    if batch_size < 1:
+        raise ValueError("batch_size must be >= 1")
+
+    rng = np.random.default_rng(seed)
+    w = np.zeros(X.shape[1], dtype=np.float64)
+    b = 0.0
+    for epoch in range(1, epochs + 1):
+        b = minibatch_pass(X, y, rng.permutation(n), w, b, learning_rate, batch_size, l2, pos_weight)
+        if on_epoch is not None and on_epoch(epoch, w, b):
+            break
+    return [float(v) for v in w], b
+
+
+def sigmoid_array(z: "np.ndarray") -> "np.ndarray":
+    e = np.exp(-np.abs(z))
+    return np.where(z >= 0, 1.0 / (1.0 + e), e / (1.0 + e))
+
+
+def minibatch_pass(
+    X: "np.ndarray",
+    y: "np.ndarray",
+    perm: "np.ndarray",
+    w: "np.ndarray",
+    b: float,
+    learning_rate: float,
+    batch_size: int,
+    l2: float,
+    pos_weight: float = 1.0,
+) -> float:
+    """
+    One pass over X's rows in `perm` order, updating `w` in place; returns the new bias.
+    """
+    for start in range(0, len(perm), batch_size):
+        rows = perm[start : start + batch_size]
+        xb = X[rows]
+        err = sigmoid_array(xb @ w + b) - y[rows]
+        if pos_weight != 1.0:
+            err = np.where(y[rows] > 0.5, pos_weight, 1.0) * err
+        w -= learning_rate * (xb.T @ err / len(rows) + l2 * w)
+        b -= learning_rate * float(err.mean())
+    return b
+
+
+def iter_csv_chunks(csv_path: str, chunk_rows: int = 65536) -> Iterator[Tuple["np.ndarray", "np.ndarray"]]:
+    """
+    Streams a training CSV as (X float64[m, FEATURE_NAMES], y float64[m]) blocks of at most
+    `chunk_rows` rows, holding one block at a time. Only the feature and label columns are parsed
+    (pandas' C reader when installed, else the csv module); missing columns / blank cells read as 0,
+    like load_rows_from_csv.
+    """
+    with open(csv_path, "r", encoding="utf-8", newline="") as f:
+        header = next(csv.reader(f), None)
+    if header is None:
+        return
+    wanted = FEATURE_NAMES + ["label"]
+    names = [name for name in wanted if name in header]
+    present = [name in header for name in wanted]
+    try:
+        import pandas as pd  # type: ignore
+    except ImportError:
+        pd = None
+    blocks = _pandas_blocks(pd, csv_path, names, chunk_rows) if pd is not None else _csv_blocks(csv_path, names, chunk_rows)
+    for block in blocks:
+        values = np.zeros((len(block), len(wanted)), dtype=np.float64)
+        values[:, present] = block
+        yield values[:, :-1], np.trunc(values[:, -1])
+
+
+def _pandas_blocks(pd: Any, csv_path: str, names: List[str], chunk_rows: int) -> Iterator["np.ndarray"]:
+    # round_trip parses exactly like float(), so both readers give bit-identical matrices
+    reader = pd.read_csv(
+        csv_path, usecols=names, dtype=np.float64, chunksize=chunk_rows, float_precision="round_trip"
+    )
+    with reader:
+        for chunk in reader:
+            yield chunk[names].fillna(0.0).to_numpy(dtype=np.float64)
+
+
+def _csv_blocks(csv_path: str, names: List[str], chunk_rows: int) -> Iterator["np.ndarray"]:
+    with open(csv_path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        cols = [header.index(name) for name in names]
+        while True:
+            lines = list(itertools.islice(reader, chunk_rows))
+            if not lines:
+                return
+            cells = [[row[i] if i < len(row) else "" for i in cols] for row in lines if row]  # [] = blank line
+            block = np.asarray(cells, dtype=str).reshape(len(cells), len(cols))
+            block[block == ""] = "0"
+            yield block.astype(np.float64)
+
+
+def log_loss_rows(data: List[TrainingRow], w: Any, b: float) -> float:
+    total = 0.0
+    for row in data:
+        z = dot(w, row.x) + b
+        # log(1 + e^z) - y * z, without overflow
+        total += max(z, 0.0) + math.log1p(math.exp(-abs(z))) - row.y * z
+    return total / max(1, len(data))
+
+
+def log_loss_arrays(X: "np.ndarray", y: "np.ndarray", w: Any, b: float, pos_weight: float = 1.0) -> float:
+    z = X @ np.asarray(w, dtype=np.float64) + b
+    if not len(z):
+        return 0.0
+    losses = np.logaddexp(0.0, z) - y * z
+    if pos_weight != 1.0:
+        weights = np.where(y > 0.5, pos_weight, 1.0)
+        return float(np.dot(weights, losses) / weights.sum())
+    return float(np.mean(losses))
+
+
+def peak_rss_bytes() -> Optional[int]:
+    # Linux: VmHWM is this process image's own peak (ru_maxrss also carries over the peak of the
+    # parent we were forked from, e.g. the Node server)
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:  # not on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return int(peak if sys.platform == "darwin" else peak * 1024)  # bytes on macOS, KiB on Linux
+
+
+class EpochMonitor:
+    """
+    on_epoch hook for the dependency-free trainers: records per-epoch train / validation loss and
+    elapsed time, keeps the weights of the best validation epoch, and stops training once the
+    validation loss has not improved by `min_delta` for `patience` epochs (0: never stops early).
+    Without validation rows it tracks the train loss instead.
+    """
+
+    def __init__(
+        self,
+        train_loss: Callable[[Any, float], float],
+        val_loss: Optional[Callable[[Any, float], float]],
+        patience: int,
+        min_delta: float,
+    ) -> None:
+        self.train_loss = train_loss
+        self.val_loss = val_loss
+        self.patience = patience
+        self.min_delta = min_delta
+        self.started = time.perf_counter()
+        self.history: List[Dict[str, Any]] = []
+        self.best_loss = math.inf
+        self.best_epoch = 0
+        self.best: Optional[Tuple[List[float], float]] = None
+        self.stopped_early = False
+
+    def __call__(self, epoch: int, w: Any, b: float) -> bool:
+        val_loss = self.val_loss(w, b) if self.val_loss is not None else None
+        return self.record(epoch, w, b, self.train_loss(w, b), val_loss)
+
+    def record(self, epoch: int, w: Any, b: float, train_loss: float, val_loss: Optional[float]) -> bool:
+        """
+        __call__ with the losses already computed (e.g. progressively, during a streaming pass).
+        """
+        entry: Dict[str, Any] = {"epoch": epoch, "trainLoss": round(train_loss, 6)}
+        if val_loss is not None:
+            entry["valLoss"] = round(val_loss, 6)
+        entry["seconds"] = round(time.perf_counter() - self.started, 3)
+        self.history.append(entry)
+        loss = entry.get("valLoss", entry["trainLoss"])
+        if loss < self.best_loss - self.min_delta:
+            self.best_loss, self.best_epoch = loss, epoch
+            self.best = ([float(v) for v in w], float(b))
+        elif self.patience > 0 and epoch - self.best_epoch >= self.patience:
+            self.stopped_early = True
+        return self.stopped_early
+
+    def summary(self, seconds: float, train_rows: int, val_rows: int) -> Dict[str, object]:
+        ran = len(self.history)
+        return {
+            "epochsRun": ran,
+            "bestEpoch": self.best_epoch,
+            "stoppedEarly": self.stopped_early,
+            "patience": self.patience,
+            "minDelta": self.min_delta,
+            "trainRows": train_rows,
+            "valRows": val_rows,
+            "wallSeconds": round(seconds, 3),
+            "rowsPerSec": round(ran * train_rows / seconds, 1) if seconds > 0 else None,
+            "peakRssBytes": peak_rss_bytes(),
+            "history": self.history,
+        }
+
+
+def split_holdout(n: int, fraction: float, seed: int) -> Tuple[List[int], List[int]]:
+    """
+    (train, validation) row indices: a seeded shuffle, with `fraction` of the rows (at least one
+    when fraction > 0 and n > 1) held out.
+    """
+    n_val = min(n - 1, max(1, int(round(n * fraction)))) if fraction > 0 and n > 1 else 0
+    if np is not None:
+        order = np.random.default_rng(seed).permutation(n).tolist()
+    else:
+        order = list(range(n))
+        random.Random(seed).shuffle(order)
+    return sorted(order[n_val:]), sorted(order[:n_val])
+
+
+def dependency_free_trainer() -> str:
+    """
+    "minibatch" or "sgd": TRAIN_TRAINER, falling back to "sgd" without numpy.
+    """
+    trainer = (os.environ.get("TRAIN_TRAINER", "") or ("minibatch" if np is not None else "sgd")).strip().lower()
+    if trainer not in ("minibatch", "sgd"):
+        raise ValueError(f"Unknown TRAIN_TRAINER {trainer!r} (expected minibatch or sgd)")
+    return "sgd" if np is None else trainer
+
+
+def train_dependency_free(
+    rows: List[TrainingRow], seed: int, arrays: Optional[Tuple["np.ndarray", "np.ndarray"]] = None
+) -> Tuple[List[float], float, Dict[str, object]]:
+    """
+    Trains with TRAIN_TRAINER (see module docstring) on all but the TRAIN_VAL_FRACTION holdout;
+    returns (weights of the best epoch, bias, metadata fields incl. the `training` telemetry block).
+    The minibatch trainer takes `arrays` (X, y) in place of `rows`, e.g. from load_training_arrays.
+    """
+    legacy = dependency_free_trainer() == "sgd"
+    if legacy and arrays is not None:
+        rows = [TrainingRow(x=x, y=int(t)) for x, t in zip(arrays[0].tolist(), arrays[1].tolist())]
+    epochs = int(os.environ.get("TRAIN_EPOCHS", "450" if legacy else "100") or 0)
+    learning_rate = float(os.environ.get("TRAIN_LR", "0.12" if legacy else "0.5") or 0.0)
+    val_fraction = float(os.environ.get("TRAIN_VAL_FRACTION", "0.1") or 0.0)
+    patience = int(os.environ.get("TRAIN_PATIENCE", "5") or 0)
+    min_delta = float(os.environ.get("TRAIN_MIN_DELTA", "1e-4") or 0.0)
+
+    train_idx, val_idx = split_holdout(len(rows) if arrays is None else len(arrays[0]), val_fraction, seed)
+    started = time.perf_counter()
+    if legacy:
+        train_rows = [rows[i] for i in train_idx]
+        val_rows = [rows[i] for i in val_idx]
+        monitor = EpochMonitor(
+            lambda w, b: log_loss_rows(train_rows, w, b),
+            (lambda w, b: log_loss_rows(val_rows, w, b)) if val_rows else None,
+            patience,
+            min_delta,
+        )
+        w, b = train_logistic_regression(train_rows, learning_rate, epochs, monitor)
+        fields: Dict[str, object] = {"trainer": "legacy_pure_python", "epochs": epochs, "learningRate": learning_rate}
+    else:
+        batch_size = int(os.environ.get("TRAIN_BATCH_SIZE", "256") or 256)
+        l2 = float(os.environ.get("TRAIN_L2", "0") or 0.0)
+        X, y = rows_to_arrays(rows) if arrays is None else arrays
+        X_train, y_train, X_val, y_val = X[train_idx], y[train_idx], X[val_idx], y[val_idx]
+        monitor = EpochMonitor(
+            lambda w, b: log_loss_arrays(X_train, y_train, w, b),
+            (lambda w, b: log_loss_arrays(X_val, y_val, w, b)) if len(val_idx) else None,
+            patience,
+            min_delta,
+        )
+        w, b = train_logistic_regression_minibatch(
+            X_train, y_train, learning_rate, epochs, batch_size, l2, seed, monitor
+        )
+        fields = {
+            "trainer": "numpy_minibatch",
+            "epochs": epochs,
+            "learningRate": learning_rate,
+            "batchSize": batch_size,
+            "l2": l2,
+        }
+    seconds = time.perf_counter() - started
+    if monitor.best is not None:
+        w, b = monitor.best
+    fields["training"] = monitor.summary(seconds, len(train_idx), len(val_idx))
+    return w, b, fields
+
+
+def cache_enabled() -> bool:
+    return np is not None and (os.environ.get("TRAIN_CACHE", "1") or "").strip() not in ("0", "false", "False")
+
+
+def load_training_arrays(csv_path: str) -> Tuple["np.ndarray", "np.ndarray", Dict[str, object]]:
+    """
+    (X, y, cache info) for `csv_path`: memory-mapped from the training cache (built first if the CSV
+    changed), or parsed chunk by chunk with TRAIN_CACHE=0 / when the cache cannot be written.
+    """
+    chunk_rows = int(os.environ.get("TRAIN_CHUNK_ROWS", "65536") or 65536)
+    error = ""
+    if cache_enabled():
+        import training_cache
+
+        try:
+            return training_cache.load_or_build(csv_path, FEATURE_NAMES, lambda: iter_csv_chunks(csv_path, chunk_rows))
+        except OSError as e:  # read-only checkout / full disk: parse instead
+            error = str(e)
+    t0 = time.perf_counter()
+    blocks = list(iter_csv_chunks(csv_path, chunk_rows))
+    X = np.concatenate([x for x, _ in blocks]) if blocks else np.zeros((0, len(FEATURE_NAMES)))
+    y = np.concatenate([t for _, t in blocks]) if blocks else np.zeros(0)
+    info: Dict[str, object] = {"status": "error" if error else "off", "seconds": round(time.perf_counter() - t0, 3)}
+    if error:
+        info["error"] = error
+    return X, y, info
+
+
+def iter_array_chunks(X: "np.ndarray", y: "np.ndarray", chunk_rows: int) -> Iterator[Tuple["np.ndarray", "np.ndarray"]]:
+    for start in range(0, len(X), chunk_rows):
+        yield X[start : start + chunk_rows], y[start : start + chunk_rows]
+
+
+def pool_adjacent_violators(values: List[float], weights: List[float]) -> List[float]:
+    """
+    Weighted isotonic (non-decreasing) fit of `values`, one output per input.
+    """
+    blocks: List[List[float]] = []  # [mean, weight, count]
+    for v, wt in zip(values, weights):
+        blocks.append([v, wt, 1])
+        while len(blocks) > 1 and blocks[-2][0] > blocks[-1][0]:
+            m2, w2, c2 = blocks.pop()
+            m1, w1, c1 = blocks.pop()
+            blocks.append([(m1 * w1 + m2 * w2) / (w1 + w2), w1 + w2, c1 + c2])
+    out: List[float] = []
+    for mean, _, count in blocks:
+        out.extend([mean] * int(count))
+    return out
+
+
+def bin_logits(z: "np.ndarray", y: "np.ndarray", bins: int) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """
+    (rows, sum of logits, sum of labels) per equal-width bin of sigmoid(z); bins add up across chunks.
+    """
+    slot = np.minimum((sigmoid_array(z) * bins).astype(np.int64), bins - 1)
+    return (
+        np.bincount(slot, minlength=bins).astype(np.float64),
+        np.bincount(slot, weights=z, minlength=bins),
+        np.bincount(slot, weights=y, minlength=bins),
+    )
+
+
+def isotonic_from_bins(counts: "np.ndarray", sum_z: "np.ndarray", sum_y: "np.ndarray") -> Dict[str, object]:
+    """
+    Isotonic calibrator (model_compiled.json format) over the non-empty bins of bin_logits: each bin's
+    mean logit maps to its PAV-smoothed positive rate.
+    """
+    filled = counts > 0
+    return {
+        "type": "isotonic",
+        "x": (sum_z[filled] / counts[filled]).tolist(),
+        "y": pool_adjacent_violators((sum_y[filled] / counts[filled]).tolist(), counts[filled].tolist()),
+    }
+
+
+def fit_sigmoid_calibrator(z: "np.ndarray", y: "np.ndarray", max_iter: int = 100) -> Dict[str, object]:
+    """
+    Platt scaling as in sklearn's sigmoid calibration: p = 1 / (1 + exp(a * z + b)) fit by Newton's
+    method on the log loss against Platt's smoothed targets.
+    """
+    n_pos = float((y > 0.5).sum())
+    n_neg = float(len(y)) - n_pos
+    target = np.where(y > 0.5, (n_pos + 1.0) / (n_pos + 2.0), 1.0 / (n_neg + 2.0))
+    a, b = 0.0, math.log((n_neg + 1.0) / (n_pos + 1.0))
+    for _ in range(max_iter):
+        p = sigmoid_array(-(a * z + b))
+        grad = target - p  # d loss / d (a * z + b)
+        curv = p * (1.0 - p) + 1e-12
+        g = np.array([np.dot(grad, z), grad.sum()])
+        h = np.array([[np.dot(curv, z * z), np.dot(curv, z)], [np.dot(curv, z), curv.sum()]])
+        step = np.linalg.solve(h + 1e-12 * np.eye(2), g)
+        a, b = a - float(step[0]), b - float(step[1])
+        if abs(step).max() < 1e-10:
+            break
+    return {"type": "sigmoid", "a": a, "b": b}
+
+
+def holdout_mask(split: "np.random.Generator", n: int, val_fraction: float) -> "np.ndarray":
+    # per-chunk validation rows; the same generator seed + chunk sizes give the same rows every pass
+    return split.random(n) < val_fraction if val_fraction > 0 else np.zeros(n, dtype=bool)
+
+
+def train_stream(csv_path: str, seed: int) -> Tuple[List[float], float, Dict[str, object], Dict[str, object]]:
+    """
+    TRAIN_STREAM mode: trains the mini-batch model over TRAIN_CHUNK_ROWS-row chunks of `csv_path`,
+    never holding more than one chunk, then fits an isotonic calibrator in one more pass. Returns
+    (weights of the best epoch, bias, metadata fields, calibrator for model_compiled.json). With
+    the training cache the chunks are slices of the memory-mapped arrays (pages the kernel can drop),
+    so no pass parses the CSV.
+
+    Each chunk's rows are split into train / validation by a seeded draw repeated every pass, and
+    shuffled within the chunk. Epoch losses are progressive: each chunk is scored before the model
+    trains on it, so early stopping needs no extra pass. The calibration pass bins the validation
+    rows' probabilities into TRAIN_CALIBRATION_BINS bins (default 1000) and fits a
+    pool-adjacent-violators isotonic map over the bins' mean logits.
+    """
+    chunk_rows = int(os.environ.get("TRAIN_CHUNK_ROWS", "65536") or 65536)
+    epochs = int(os.environ.get("TRAIN_EPOCHS", "100") or 0)
+    learning_rate = float(os.environ.get("TRAIN_LR", "0.5") or 0.0)
+    batch_size = int(os.environ.get("TRAIN_BATCH_SIZE", "256") or 256)
+    l2 = float(os.environ.get("TRAIN_L2", "0") or 0.0)
+    val_fraction = float(os.environ.get("TRAIN_VAL_FRACTION", "0.1") or 0.0)
+    patience = int(os.environ.get("TRAIN_PATIENCE", "5") or 0)
+    min_delta = float(os.environ.get("TRAIN_MIN_DELTA", "1e-4") or 0.0)
+    bins = int(os.environ.get("TRAIN_CALIBRATION_BINS", "1000") or 1000)
+    if chunk_rows < 1 or batch_size < 1 or bins < 1:
+        raise ValueError("TRAIN_CHUNK_ROWS, TRAIN_BATCH_SIZE and TRAIN_CALIBRATION_BINS must be >= 1")
+
+    data_cache: Dict[str, object] = {"status": "off"}
+    chunks: Callable[[], Iterator[Tuple["np.ndarray", "np.ndarray"]]] = lambda: iter_csv_chunks(csv_path, chunk_rows)
+    if cache_enabled():
+        import training_cache
+
+        try:
+            X_all, y_all, data_cache = training_cache.load_or_build(csv_path, FEATURE_NAMES, chunks)
+            chunks = lambda: iter_array_chunks(X_all, y_all, chunk_rows)
+        except OSError as e:
+            data_cache = {"status": "error", "error": str(e)}
+
+    rng = np.random.default_rng(seed)
+    w = np.zeros(len(FEATURE_NAMES), dtype=np.float64)
+    b = 0.0
+    monitor = EpochMonitor(lambda w_, b_: 0.0, None, patience, min_delta)
+    train_rows = val_rows = 0
+    started = time.perf_counter()
+    for epoch in range(1, epochs + 1):
+        split = np.random.default_rng([seed, 1])
+        train_rows = val_rows = 0
+        train_total = val_total = 0.0
+        for X, y in chunks():
+            val = holdout_mask(split, len(X), val_fraction)
+            Xt, yt = X[~val], y[~val]
+            if val.any():
+                val_total += log_loss_arrays(X[val], y[val], w, b) * int(val.sum())
+            train_total += log_loss_arrays(Xt, yt, w, b) * len(Xt)
+            b = minibatch_pass(Xt, yt, rng.permutation(len(Xt)), w, b, learning_rate, batch_size, l2)
+            train_rows += len(Xt)
+            val_rows += len(X) - len(Xt)
+        if train_rows == 0:
+            raise ValueError(f"No training rows in {csv_path}")
+        val_loss = val_total / val_rows if val_rows else None
+        if monitor.record(epoch, w, b, train_total / train_rows, val_loss):
+            break
+    seconds = time.perf_counter() - started
+    if monitor.best is not None:
+        w, b = np.asarray(monitor.best[0]), monitor.best[1]
+
+    # calibration pass: validation rows only (all rows when nothing is held out)
+    split = np.random.default_rng([seed, 1])
+    counts = np.zeros(bins, dtype=np.float64)
+    sum_z = np.zeros(bins, dtype=np.float64)
+    sum_y = np.zeros(bins, dtype=np.float64)
+    cal_started = time.perf_counter()
+    for X, y in chunks():
+        val = holdout_mask(split, len(X), val_fraction)
+        if val_rows:
+            X, y = X[val], y[val]
+        part = bin_logits(X @ w + b, y, bins)
+        counts += part[0]
+        sum_z += part[1]
+        sum_y += part[2]
+    calibrator = isotonic_from_bins(counts, sum_z, sum_y)
+
+    fields: Dict[str, object] = {
+        "trainer": "numpy_minibatch_stream",
+        "epochs": epochs,
+        "learningRate": learning_rate,
+        "batchSize": batch_size,
+        "l2": l2,
+        "chunkRows": chunk_rows,
+        "dataCache": data_cache,
+        "training": monitor.summary(seconds, train_rows, val_rows),
+        "calibration": {
+            "type": "isotonic_binned",
+            "rows": int(counts.sum()),
+            "bins": bins,
+            "thresholds": len(calibrator["x"]),
+            "wallSeconds": round(time.perf_counter() - cal_started, 3),
+        },
+    }
+    return [float(v) for v in w], float(b), fields, calibrator
+
+
+SEARCH_CALIBRATIONS = ("isotonic", "sigmoid")
+
+# split matrices of the running search; pool workers inherit them (see _init_search_worker)
+_search_data: Dict[str, Any] = {}
+
+
+def _init_search_worker(data: Dict[str, Any]) -> None:
+    # with the fork start method Pool initargs are inherited, not pickled: every trial reads the
+    # parent's matrices (mapped cache pages or copy-on-write) instead of a private copy
+    global _search_data
+    _search_data = data
+
+
+def _env_list(name: str, default: str) -> List[str]:
+    return [v.strip() for v in (os.environ.get(name, "") or default).split(",") if v.strip()]
+
+
+def search_space() -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    (trial configs, calibration methods) from TRAIN_SEARCH_LR / TRAIN_SEARCH_L2 /
+    TRAIN_SEARCH_POS_WEIGHT / TRAIN_SEARCH_CALIBRATION. Each config is trained once; every
+    calibration method is fit on its weights.
+    """
+    learning_rates = [float(v) for v in _env_list("TRAIN_SEARCH_LR", "0.1,0.5,2.0")]
+    l2s = [float(v) for v in _env_list("TRAIN_SEARCH_L2", "0,1e-4,1e-3")]
+    pos_weights: List[Any] = []
+    for v in _env_list("TRAIN_SEARCH_POS_WEIGHT", "1,balanced"):
+        pos_weights.append("balanced" if v.lower() == "balanced" else float(v))
+    calibrations = [v.lower() for v in _env_list("TRAIN_SEARCH_CALIBRATION", ",".join(SEARCH_CALIBRATIONS))]
+    unknown = sorted(set(calibrations) - set(SEARCH_CALIBRATIONS))
+    if unknown:
+        raise ValueError(f"Unknown TRAIN_SEARCH_CALIBRATION {unknown} (expected isotonic or sigmoid)")
+    configs = [
+        {"learningRate": lr, "l2": l2, "posWeight": pw}
+        for lr, l2, pw in itertools.product(learning_rates, l2s, pos_weights)
+    ]
+    return configs, calibrations
+
+
+def trial_seed(seed: int, config: Dict[str, Any]) -> int:
+    """
+    Shuffle seed of one trial, derived from TRAIN_SEED and the config itself, so a trial's result
+    does not depend on its grid position or on which worker runs it.
+    """
+    digest = hashlib.sha256(json.dumps([seed, config], sort_keys=True).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+def roc_auc(y: "np.ndarray", p: "np.ndarray") -> Optional[float]:
+    # Mann-Whitney U with average ranks for ties (calibrated scores are step functions)
+    pos = y > 0.5
+    n_pos = int(pos.sum())
+    n_neg = len(y) - n_pos
+    if not n_pos or not n_neg:
+        return None
+    _, inverse, counts = np.unique(p, return_inverse=True, return_counts=True)
+    ranks = (np.cumsum(counts) - (counts - 1) / 2.0)[inverse]
+    return float((ranks[pos].sum() - n_pos * (n_pos + 1) / 2.0) / (n_pos * n_neg))
+
+
+def single_fold_model(w: List[float], b: float, calibrator: Dict[str, object]) -> Dict[str, object]:
+    return {
+        "modelType": "calibrated_logistic_regression",
+        "modelVersion": MODEL_VERSION,
+        "featureNames": FEATURE_NAMES,
+        "folds": [{"coef": w, "intercept": b, "calibrator": calibrator}],
+    }
+
+
+def calibrated_metrics(
+    w: List[float], b: float, calibrator: Dict[str, object], X: "np.ndarray", y: "np.ndarray"
+) -> Dict[str, Optional[float]]:
+    """
+    {logLoss, brier, auc} of the one-fold calibrated model on (X, y), scored through infer.py's
+    compiled-model path so the numbers are those of the served model.
+    """
+    import infer  # type: ignore
+
+    p = infer.compiled_predict_batch(infer.parse_compiled_model(single_fold_model(w, b, calibrator)), X)
+    clipped = np.clip(p, 1e-15, 1.0 - 1e-15)
+    return {
+        "logLoss": float(-np.mean(y * np.log(clipped) + (1.0 - y) * np.log1p(-clipped))),
+        "brier": float(np.mean((p - y) ** 2)),
+        "auc": roc_auc(y, p),
+    }
+
+
+def run_trial(task: Tuple[int, Dict[str, Any], List[str], Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    One search trial on the _search_data splits: trains the config with early stopping on the
+    validation rows, fits each calibration method on them, and scores the calibrated model on the
+    selection rows. Returns one leaderboard entry per method. Trials never see the test rows.
+    """
+    trial, config, calibrations, settings = task
+    d = _search_data
+    pos_weight = d["balancedWeight"] if config["posWeight"] == "balanced" else float(config["posWeight"])
+    seed = trial_seed(settings["seed"], config)
+    monitor = EpochMonitor(
+        lambda w, b: log_loss_arrays(d["X_train"], d["y_train"], w, b, pos_weight),
+        lambda w, b: log_loss_arrays(d["X_val"], d["y_val"], w, b, pos_weight),
+        settings["patience"],
+        settings["minDelta"],
+    )
+    started = time.perf_counter()
+    w, b = train_logistic_regression_minibatch(
+        d["X_train"],
+        d["y_train"],
+        config["learningRate"],
+        settings["epochs"],
+        settings["batchSize"],
+        config["l2"],
+        seed,
+        monitor,
+        pos_weight,
+    )
+    if monitor.best is not None:
+        w, b = monitor.best
+    seconds = time.perf_counter() - started
+
+    z_val = d["X_val"] @ np.asarray(w) + b
+    entries: List[Dict[str, Any]] = []
+    for method in calibrations:
+        if method == "isotonic":
+            calibrator = isotonic_from_bins(*bin_logits(z_val, d["y_val"], settings["bins"]))
+        else:
+            calibrator = fit_sigmoid_calibrator(z_val, d["y_val"])
+        selection = calibrated_metrics(w, b, calibrator, d["X_select"], d["y_select"])
+        entries.append(
+            {
+                "trial": trial,
+                **config,
+                "calibration": method,
+                "seed": seed,
+                "epochsRun": len(monitor.history),
+                "bestEpoch": monitor.best_epoch,
+                "valLoss": round(monitor.best_loss, 6),
+                "selectionLogLoss": selection["logLoss"],
+                "selectionBrier": selection["brier"],
+                "selectionAuc": selection["auc"],
+                "trainSeconds": round(seconds, 3),
+                "weights": w,
+                "bias": b,
+                "calibrator": calibrator,
+            }
+        )
+    return entries
+
+
+def search_procs() -> int:
+    return max(1, int(os.environ.get("TRAIN_SEARCH_PROCS", "0") or 0) or (os.cpu_count() or 1))
+
+
+def run_search(X: "np.ndarray", y: "np.ndarray", seed: int, procs: int) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    TRAIN_SEARCH mode over loaded (X, y): one seeded split shared by every trial, with
+    TRAIN_VAL_FRACTION of the rows each for
+    - validation: early stopping and fitting the calibrators
+    - selection: ranking the trials (calibrated log loss, then trial order, so the result does
+      not depend on `procs`)
+    - test: scored once, for the winner only, after the ranking
+    Trials are spread over `procs` forked workers. Returns (leaderboard, best entry incl. its
+    weights, calibrator and `test` metrics).
+    """
+    fraction = float(os.environ.get("TRAIN_VAL_FRACTION", "0.1") or 0.0)
+    n = len(X)
+    n_hold = max(1, int(round(n * fraction)))
+    if fraction <= 0 or n < 4 or 3 * n_hold >= n:
+        raise ValueError("TRAIN_SEARCH needs TRAIN_VAL_FRACTION > 0 and rows left to train on")
+    order = np.random.default_rng(seed).permutation(n)
+    val_idx, select_idx, test_idx, train_idx = (
+        np.sort(part) for part in (order[:n_hold], order[n_hold : 2 * n_hold], order[2 * n_hold : 3 * n_hold], order[3 * n_hold :])
+    )
+    y_train = np.asarray(y[train_idx])
+    n_pos = float((y_train > 0.5).sum())
+    data = {
+        "X_train": np.asarray(X[train_idx]),
+        "y_train": y_train,
+        "X_val": np.asarray(X[val_idx]),
+        "y_val": np.asarray(y[val_idx]),
+        "X_select": np.asarray(X[select_idx]),
+        "y_select": np.asarray(y[select_idx]),
+        # "balanced": positives weigh n_neg / n_pos (sklearn's class_weight="balanced", up to scale)
+        "balancedWeight": (len(y_train) - n_pos) / n_pos if n_pos else 1.0,
+    }
+    settings = {
+        "seed": seed,
+        "epochs": int(os.environ.get("TRAIN_EPOCHS", "100") or 0),
+        "batchSize": int(os.environ.get("TRAIN_BATCH_SIZE", "256") or 256),
+        "patience": int(os.environ.get("TRAIN_PATIENCE", "5") or 0),
+        "minDelta": float(os.environ.get("TRAIN_MIN_DELTA", "1e-4") or 0.0),
+        "bins": int(os.environ.get("TRAIN_CALIBRATION_BINS", "1000") or 1000),
+    }
+    configs, calibrations = search_space()
+    tasks = [(i, config, calibrations, settings) for i, config in enumerate(configs)]
+
+    started = time.perf_counter()
+    workers = min(procs, len(tasks))
+    if workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("fork")
+        with ctx.Pool(workers, initializer=_init_search_worker, initargs=(data,)) as pool:
+            results = pool.map(run_trial, tasks, chunksize=1)
+    else:
+        workers = 1
+        _init_search_worker(data)
+        results = [run_trial(task) for task in tasks]
+    seconds = time.perf_counter() - started
+
+    entries = [entry for trial_entries in results for entry in trial_entries]
+    entries.sort(key=lambda e: (e["selectionLogLoss"], e["trial"], calibrations.index(e["calibration"])))
+    best = entries[0]
+    for rank, entry in enumerate(entries, 1):
+        entry["rank"] = rank
+    best["test"] = calibrated_metrics(best["weights"], best["bias"], best["calibrator"], X[test_idx], y[test_idx])
+    leaderboard = {
+        "modelVersion": MODEL_VERSION,
+        "seed": seed,
+        "metric": "selectionLogLoss",
+        "trials": len(tasks),
+        "calibrations": calibrations,
+        "procs": workers,
+        "wallSeconds": round(seconds, 3),
+        # summed training time of all trials: ~wallSeconds * procs when the pool is saturated
+        "trialSeconds": round(sum(trial_entries[0]["trainSeconds"] for trial_entries in results), 3),
+        "rows": {
+            "train": int(len(train_idx)),
+            "val": int(len(val_idx)),
+            "selection": int(len(select_idx)),
+            "test": int(len(test_idx)),
+        },
+        "settings": settings,
+        # held-out estimate for the winner (rank 1); the other entries are never scored on test
+        "test": best["test"],
+        "entries": [{k: v for k, v in e.items() if k not in ("calibrator", "test")} for e in entries],
+    }
+    return leaderboard, best
+
+
 def clamp01(x: float) -> float:
     if x != x or x == float("inf") or x == float("-inf"):
         return 0.0
@@ -200,6 +990,70 @@ def export_metadata(path: str, model_version: str, feature_names: List[str], ext
         json.dump(payload, f, indent=2)
 
 
+def compile_calibrated_model(clf: object, feature_names: List[str]) -> Dict[str, object]:
+    """
+    Flattens a fitted CalibratedClassifierCV(LogisticRegression) into plain arrays:
+    per fold, the logistic coefficients/intercept plus the calibrator
+    (isotonic thresholds or sigmoid a/b). predict_proba is the mean over folds.
+    """
+    folds: List[Dict[str, object]] = []
+    for cc in clf.calibrated_classifiers_:  # type: ignore[attr-defined]
+        est = getattr(cc, "estimator", None) or getattr(cc, "base_estimator")
+        calibrators = list(cc.calibrators)
+        if len(calibrators) != 1 or est.coef_.shape[0] != 1:
+            raise ValueError("Only binary calibrated classifiers can be compiled")
+        cal = calibrators[0]
+        if hasattr(cal, "X_thresholds_"):
+            calibrator: Dict[str, object] = {
+                "type": "isotonic",
+                "x": [float(v) for v in cal.X_thresholds_],
+                "y": [float(v) for v in cal.y_thresholds_],
+            }
+        elif hasattr(cal, "a_"):
+            calibrator = {"type": "sigmoid", "a": float(cal.a_), "b": float(cal.b_)}
+        else:
+            raise ValueError(f"Unsupported calibrator {type(cal).__name__}")
+        folds.append(
+            {
+                "coef": [float(v) for v in est.coef_[0]],
+                "intercept": float(est.intercept_[0]),
+                "calibrator": calibrator,
+            }
+        )
+    return {
+        "modelType": "calibrated_logistic_regression",
+        "modelVersion": MODEL_VERSION,
+        "featureNames": feature_names,
+        "folds": folds,
+    }
+
+
+def export_compiled_model(path: str, compiled: Dict[str, object]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(compiled, f, indent=2)
+
+
+# infer.load_model prefers these over model.json, so a run that does not write one must remove it
+SERVED_ARTIFACTS = ["model_compiled.json", "model.joblib"]
+
+
+def remove_stale_artifacts(out_dir: str, written: List[str]) -> None:
+    """
+    Deletes the SERVED_ARTIFACTS this run did not write, so infer.py serves the model just trained.
+    """
+    for name in SERVED_ARTIFACTS:
+        path = os.path.join(out_dir, name)
+        if name not in written and os.path.exists(path):
+            os.remove(path)
+
+
+def export_leaderboard(path: str, leaderboard: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(leaderboard, f, indent=2)
+
+
 def main() -> None:
     seed = int(os.environ.get("TRAIN_SEED", "7"))
     random.seed(seed)
@@ -207,8 +1061,85 @@ def main() -> None:
     csv_path = os.path.join(os.path.dirname(__file__), "data", "training_data.csv")
     src = "csv" if os.path.exists(csv_path) else "synthetic_fallback"
 
+    if (os.environ.get("TRAIN_STREAM", "0") or "").strip() in ("1", "true", "True"):
+        if np is None:
+            raise RuntimeError("TRAIN_STREAM needs numpy")
+        if not os.path.exists(csv_path):
+            raise FileNotFoundError(f"Missing {csv_path}. Run: python3 python_ml/generate_csv.py")
+        w, b, trained, calibrator = train_stream(csv_path, seed)
+        out_dir = os.path.join(os.path.dirname(__file__), "artifacts")
+        out_path = os.path.join(out_dir, "model.json")
+        export_model(out_path, w, b)
+        export_compiled_model(os.path.join(out_dir, "model_compiled.json"), single_fold_model(w, b, calibrator))
+        remove_stale_artifacts(out_dir, ["model_compiled.json"])
+        export_metadata(
+            os.path.join(out_dir, "metadata.json"),
+            MODEL_VERSION,
+            FEATURE_NAMES,
+            {"source": src, "seed": seed, **trained, "compiledModel": {"path": "model_compiled.json"}},
+        )
+        training = trained["training"]
+        print(
+            f"Wrote {out_path} + model_compiled.json (v={MODEL_VERSION}) source={src} trainer={trained['trainer']} "
+            f"rows={training['trainRows']}+{training['valRows']} epochs={training['epochsRun']} "
+            f"in {training['wallSeconds']}s"
+        )
+        return
+
+    if (os.environ.get("TRAIN_SEARCH", "0") or "").strip() in ("1", "true", "True"):
+        if np is None:
+            raise RuntimeError("TRAIN_SEARCH needs numpy")
+        if not os.path.exists(csv_path):
+            raise FileNotFoundError(f"Missing {csv_path}. Run: python3 python_ml/generate_csv.py")
+        X_all, y_all, data_cache = load_training_arrays(csv_path)
+        leaderboard, best = run_search(X_all, y_all, seed, search_procs())
+        out_dir = os.path.join(os.path.dirname(__file__), "artifacts")
+        export_leaderboard(os.path.join(out_dir, "leaderboard.json"), leaderboard)
+        out_path = os.path.join(out_dir, "model.json")
+        export_model(out_path, best["weights"], best["bias"])
+        export_compiled_model(
+            os.path.join(out_dir, "model_compiled.json"), single_fold_model(best["weights"], best["bias"], best["calibrator"])
+        )
+        remove_stale_artifacts(out_dir, ["model_compiled.json"])
+        config = {k: best[k] for k in ("learningRate", "l2", "posWeight", "calibration", "seed")}
+        export_metadata(
+            os.path.join(out_dir, "metadata.json"),
+            MODEL_VERSION,
+            FEATURE_NAMES,
+            {
+                "source": src,
+                "rows": int(len(X_all)),
+                "seed": seed,
+                "trainer": "numpy_minibatch_search",
+                **config,
+                "metrics": {
+                    **{k: best[k] for k in ("valLoss", "selectionLogLoss")},
+                    "testLogLoss": best["test"]["logLoss"],
+                    "testBrier": best["test"]["brier"],
+                    "testAuc": best["test"]["auc"],
+                },
+                "search": {
+                    "leaderboard": "leaderboard.json",
+                    **{k: leaderboard[k] for k in ("trials", "calibrations", "procs", "wallSeconds", "trialSeconds", "rows")},
+                },
+                "dataCache": data_cache,
+                "compiledModel": {"path": "model_compiled.json"},
+            },
+        )
+        print(
+            f"Wrote {out_path} + model_compiled.json + leaderboard.json (v={MODEL_VERSION}) source={src} "
+            f"trials={leaderboard['trials']} procs={leaderboard['procs']} in {leaderboard['wallSeconds']}s; best "
+            f"lr={best['learningRate']} l2={best['l2']} posWeight={best['posWeight']} calibration={best['calibration']} "
+            f"selectionLogLoss={best['selectionLogLoss']:.5f} testLogLoss={best['test']['logLoss']:.5f}"
+        )
+        return
+
     # Preferred: sklearn pipeline (opt-in to avoid accidental env issues)
     use_sklearn = (os.environ.get("TRAIN_USE_SKLEARN", "0") or "").strip() in ("1", "true", "True")
+    # checked before the try: a typo must fail loudly, not fall back to the dependency-free trainer
+    calibration = (os.environ.get("TRAIN_CALIBRATION", "isotonic") or "isotonic").strip().lower()
+    if calibration not in SEARCH_CALIBRATIONS:
+        raise ValueError(f"Unknown TRAIN_CALIBRATION {calibration!r} (expected isotonic or sigmoid)")
     try:
         if not use_sklearn:
             raise RuntimeError("TRAIN_USE_SKLEARN not enabled")
@@ -217,15 +1148,21 @@ def main() -> None:
         from joblib import dump  # type: ignore
         from sklearn.calibration import CalibratedClassifierCV  # type: ignore
         from sklearn.linear_model import LogisticRegression  # type: ignore
-        from sklearn.metrics import average_precision_score, roc_auc_score  # type: ignore
+        from sklearn.metrics import average_precision_score, log_loss, roc_auc_score  # type: ignore
         from sklearn.model_selection import train_test_split  # type: ignore
 
         if not os.path.exists(csv_path):
             raise FileNotFoundError(f"Missing {csv_path}. Run: python3 python_ml/generate_csv.py")
 
-        df = pd.read_csv(csv_path)
-        X = df[SKLEARN_FEATURES].astype(float)
-        y = df["label"].astype(int)
+        data_cache: Dict[str, object] = {"status": "off"}
+        if cache_enabled():
+            X_all, y_all, data_cache = load_training_arrays(csv_path)
+            X = pd.DataFrame(np.asarray(X_all), columns=SKLEARN_FEATURES)
+            y = pd.Series(y_all.astype(int), name="label")
+        else:
+            df = pd.read_csv(csv_path)
+            X = df[SKLEARN_FEATURES].astype(float)
+            y = df["label"].astype(int)
 
         X_train, X_tmp, y_train, y_tmp = train_test_split(
             X, y, test_size=0.3, random_state=seed, stratify=y
@@ -234,9 +1171,17 @@ def main() -> None:
             X_tmp, y_tmp, test_size=0.5, random_state=seed, stratify=y_tmp
         )
 
-        base = LogisticRegression(max_iter=2000, solver="lbfgs")
-        clf = CalibratedClassifierCV(base, method="isotonic", cv=3)
+        max_iter = int(os.environ.get("TRAIN_MAX_ITER", "2000") or 2000)
+        base = LogisticRegression(max_iter=max_iter, solver="lbfgs")
+        clf = CalibratedClassifierCV(base, method=calibration, cv=3)
+        fit_started = time.perf_counter()
         clf.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - fit_started
+        # lbfgs stops on its own tolerance; max_iter only caps it, so record where each fold stopped
+        n_iter = [
+            int((getattr(cc, "estimator", None) or getattr(cc, "base_estimator")).n_iter_[0])
+            for cc in clf.calibrated_classifiers_
+        ]
 
         # metrics
         def probs(m, X_):
@@ -254,6 +1199,27 @@ def main() -> None:
         model_path = os.path.join(out_dir, "model.joblib")
         dump(clf, model_path)
 
+        # dependency-free copy for infer.py; verify it reproduces predict_proba before shipping it
+        compiled_path = os.path.join(out_dir, "model_compiled.json")
+        compiled_meta: Dict[str, object] = {"path": "model_compiled.json"}
+        try:
+            import infer  # type: ignore
+
+            compiled = compile_calibrated_model(clf, SKLEARN_FEATURES)
+            compiled_max_diff = float(
+                abs(infer.compiled_predict_batch(infer.parse_compiled_model(compiled), X_test.to_numpy()) - p_test).max()
+            )
+            if compiled_max_diff > 1e-9:
+                raise ValueError(f"compiled model diverges from sklearn (max abs diff {compiled_max_diff})")
+            export_compiled_model(compiled_path, compiled)
+            compiled_meta["maxAbsDiffTest"] = compiled_max_diff
+        except Exception as ce:
+            # never leave a stale compiled artifact next to a fresh model.joblib
+            if os.path.exists(compiled_path):
+                os.remove(compiled_path)
+            compiled_meta = {"error": str(ce)}
+            print(f"Skipped {compiled_path}: {ce}")
+
         metadata_path = os.path.join(out_dir, "metadata.json")
         export_metadata(
             metadata_path,
@@ -261,7 +1227,7 @@ def main() -> None:
             SKLEARN_FEATURES,
             {
                 "source": src,
-                "rows": int(len(df)),
+                "rows": int(len(X)),
                 "seed": seed,
                 "metrics": {
                     "val_auc": val_auc,
@@ -269,6 +1235,21 @@ def main() -> None:
                     "val_ap": val_ap,
                     "test_ap": test_ap,
                 },
+                "compiledModel": compiled_meta,
+                "dataCache": data_cache,
+                "trainer": "sklearn_calibrated_lbfgs",
+                "calibration": calibration,
+                "training": {
+                    "maxIter": max_iter,
+                    "iterations": n_iter,
+                    "converged": all(it < max_iter for it in n_iter),
+                    "trainRows": int(len(X_train)),
+                    "valRows": int(len(X_val)),
+                    "valLoss": float(log_loss(y_val, p_val)),
+                    "wallSeconds": round(fit_seconds, 3),
+                    "rowsPerSec": round(len(X_train) / fit_seconds, 1) if fit_seconds > 0 else None,
+                    "peakRssBytes": peak_rss_bytes(),
+                },
             },
         )
 
@@ -278,17 +1259,30 @@ def main() -> None:
 
     except Exception as e:
         # Fallback: legacy pure-python weights
-        rows = load_rows_from_csv(csv_path) if os.path.exists(csv_path) else build_synthetic_rows(seed=seed)
-        w, b = train_logistic_regression(rows)
+        rows: List[TrainingRow] = []
+        arrays = None
+        extra: Dict[str, object] = {}
+        if dependency_free_trainer() == "minibatch" and os.path.exists(csv_path):
+            X_all, y_all, extra["dataCache"] = load_training_arrays(csv_path)
+            arrays = (X_all, y_all)
+        else:
+            rows = load_rows_from_csv(csv_path) if os.path.exists(csv_path) else build_synthetic_rows(seed=seed)
+        n_rows = len(rows) if arrays is None else len(arrays[0])
+        w, b, trained = train_dependency_free(rows, seed, arrays)
         out_path = os.path.join(os.path.dirname(__file__), "artifacts", "model.json")
         export_model(out_path, w, b)
+        remove_stale_artifacts(os.path.dirname(out_path), [])
         export_metadata(
             os.path.join(os.path.dirname(__file__), "artifacts", "metadata.json"),
             MODEL_VERSION,
             FEATURE_NAMES,
-            {"source": src, "rows": int(len(rows)), "seed": seed, "trainer": "legacy_pure_python", "note": str(e)},
+            {"source": src, "rows": int(n_rows), "seed": seed, **trained, **extra, "note": str(e)},
+        )
+        training = trained["training"]
+        print(
+            f"Wrote {out_path} (v={MODEL_VERSION}) source={src} rows={n_rows} trainer={trained['trainer']} "
+            f"epochs={training['epochsRun']} (best {training['bestEpoch']}) in {training['wallSeconds']}s"
         )
-        print(f"Wrote {out_path} (v={MODEL_VERSION}) source={src} rows={len(rows)} (legacy fallback)")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Compiled binary cache of the training matrix for train.py.
+
+training_data.csv carries ~28 text columns, of which training reads six features and the label.
+The first run parses them once into raw .npy arrays:
+- X.npy: float64[rows, features], row-major (mini-batches gather whole rows)
+- y.npy: float64[rows]
+Later runs memory-map the arrays, so repeat trainings and sweeps skip CSV parsing entirely.
+
+Layout: `<csv stem>.cache/<schema hash>/` next to the CSV, one directory per feature list (the
+schema hash covers CACHE_FORMAT, feature names and label column), with a meta.json recording the
+source CSV's size, mtime and sha256. A cache is used when (mtime, size) match, or when the size
+matches and the sha256 does (a touched or copied file; the stamp is then refreshed). Builds stream
+the CSV chunk by chunk and are written to a temp dir that is renamed into place, so concurrent
+trainings never read a partial cache.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np  # type: ignore
+
+
+CACHE_FORMAT = 1
+
+LABEL = "label"
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_root(csv_path: str) -> str:
+    return os.path.splitext(csv_path)[0] + ".cache"
+
+
+def schema_hash(feature_names: List[str]) -> str:
+    canonical = json.dumps({"format": CACHE_FORMAT, "features": feature_names, "label": LABEL})
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def cache_path(csv_path: str, feature_names: List[str]) -> str:
+    return os.path.join(cache_root(csv_path), schema_hash(feature_names))
+
+
+def _mapped(path: str) -> np.ndarray:
+    try:
+        return np.load(path, mmap_mode="r").view(np.ndarray)
+    except ValueError:  # zero-length arrays cannot be mapped
+        return np.load(path)
+
+
+def read_meta(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_cache(csv_path: str, feature_names: List[str]) -> Optional[Tuple[np.ndarray, np.ndarray, Dict[str, Any]]]:
+    """
+    (X, y, meta) memory-mapped from a cache built from the current CSV bytes, else None.
+    """
+    path = cache_path(csv_path, feature_names)
+    meta = read_meta(path)
+    if meta is None or meta.get("format") != CACHE_FORMAT or meta.get("featureNames") != feature_names:
+        return None
+    st = os.stat(csv_path)
+    stamp = [st.st_mtime_ns, st.st_size]
+    if meta.get("stamp") != stamp:
+        if meta.get("stamp", [None, None])[1] != st.st_size or meta.get("sourceHash") != file_sha256(csv_path):
+            return None
+        meta["stamp"] = stamp
+        try:
+            write_meta(path, meta)
+        except OSError:
+            pass  # read-only checkout: the hash check just runs again next time
+    return _mapped(os.path.join(path, "X.npy")), _mapped(os.path.join(path, "y.npy")), meta
+
+
+def write_meta(path: str, meta: Dict[str, Any]) -> None:
+    tmp_path = os.path.join(path, f"meta.json.tmp{os.getpid()}")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, os.path.join(path, "meta.json"))
+
+
+def _wrap_npy(raw_path: str, out_path: str, dtype: Any, shape: Tuple[int, ...]) -> None:
+    # raw C-order bytes -> .npy: header first, then the data copied sequentially
+    with open(out_path, "wb") as out, open(raw_path, "rb") as raw:
+        np.lib.format.write_array_header_1_0(
+            out, {"descr": np.lib.format.dtype_to_descr(np.dtype(dtype)), "fortran_order": False, "shape": shape}
+        )
+        shutil.copyfileobj(raw, out, 1 << 22)
+    os.remove(raw_path)
+
+
+def build_cache(
+    csv_path: str, feature_names: List[str], chunks: Iterator[Tuple[np.ndarray, np.ndarray]]
+) -> Dict[str, Any]:
+    """
+    Writes the cache for `csv_path` from `chunks` ((X, y) blocks in row order, e.g.
+    train.iter_csv_chunks); memory stays at one block. Returns the new meta.
+    """
+    st = os.stat(csv_path)
+    stamp = [st.st_mtime_ns, st.st_size]  # taken first: a CSV rewritten mid-build fails the next check
+    source_hash = file_sha256(csv_path)
+    path = cache_path(csv_path, feature_names)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    rows = 0
+    with open(os.path.join(tmp, "X.raw"), "wb") as fx, open(os.path.join(tmp, "y.raw"), "wb") as fy:
+        for X, y in chunks:
+            if X.shape[1] != len(feature_names):
+                raise ValueError(f"Chunk has {X.shape[1]} features, expected {len(feature_names)}")
+            fx.write(np.ascontiguousarray(X, dtype=np.float64).tobytes())
+            fy.write(np.ascontiguousarray(y, dtype=np.float64).tobytes())
+            rows += len(X)
+    _wrap_npy(os.path.join(tmp, "X.raw"), os.path.join(tmp, "X.npy"), np.float64, (rows, len(feature_names)))
+    _wrap_npy(os.path.join(tmp, "y.raw"), os.path.join(tmp, "y.npy"), np.float64, (rows,))
+
+    meta: Dict[str, Any] = {
+        "format": CACHE_FORMAT,
+        "schemaHash": schema_hash(feature_names),
+        "featureNames": feature_names,
+        "label": LABEL,
+        "rows": rows,
+        "source": os.path.basename(csv_path),
+        "sourceHash": source_hash,
+        "stamp": stamp,
+    }
+    write_meta(tmp, meta)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+    return meta
+
+
+def load_or_build(
+    csv_path: str, feature_names: List[str], chunks: Callable[[], Iterator[Tuple[np.ndarray, np.ndarray]]]
+) -> Tuple[np.ndarray, np.ndarray, Dict[str, Any]]:
+    """
+    (X, y, info) from the cache, building it from `chunks()` first when it is missing or stale.
+    info: {"status": "hit" | "built", "path", "schemaHash", "rows", "seconds"}.
+    """
+    t0 = time.perf_counter()
+    cached = load_cache(csv_path, feature_names)
+    status = "hit"
+    if cached is None:
+        build_cache(csv_path, feature_names, chunks())
+        cached = load_cache(csv_path, feature_names)
+        status = "built"
+        if cached is None:
+            raise OSError(f"Training cache for {csv_path} went stale while it was built")
+    X, y, meta = cached
+    info = {
+        "status": status,
+        "path": os.path.relpath(cache_path(csv_path, feature_names), os.path.dirname(csv_path)),
+        "schemaHash": meta["schemaHash"],
+        "rows": int(meta["rows"]),
+        "seconds": round(time.perf_counter() - t0, 3),
+    }
+    return X, y, info
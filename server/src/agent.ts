@@ -1,5 +1,5 @@
 import { claudeJson } from "./claude";
-import { BUYERS } from "./buyers";
+import { BUYERS, buyersLoadedFromDb } from "./buyers";
 import { inferBuyerScoresPython } from "./pythonMl";
 import { BuyerMatchScore, DealInput } from "./types";
 import { z } from "zod";
@@ -117,7 +117,12 @@ function applyMandateFilters(scores: BuyerMatchScore[], deal: DealInput): BuyerM
 
 export async function scoreAndRankBuyers(deal: DealInput): Promise<{ modelVersion?: string; matches: BuyerMatchScore[] }> {
   // Primary path: Python ML inference
-  const py = await inferBuyerScoresPython({ deal, buyers: BUYERS });
+  // BUYERS mirrors buyers.json, so let Python score its compiled index instead of re-sending every profile.
+  // Buyers failing the hard bits of applyMandateFilters are pruned in Python (they would be dropped below anyway).
+  const require: Array<"sizeFit" | "ebitdaFit"> = deal.dealSize > 0 ? ["ebitdaFit", "sizeFit"] : ["ebitdaFit"];
+  const py = await inferBuyerScoresPython(
+    buyersLoadedFromDb() ? { deal, universe: true, require } : { deal, buyers: BUYERS, require }
+  );
   const scoreById = new Map(py.scores.map((s) => [s.buyerId, s]));
 
   const matches: BuyerMatchScore[] = BUYERS.map((b) => {
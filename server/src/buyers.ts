@@ -24,6 +24,14 @@ function repoRoot() {
   return path.resolve(__dirname, "..", "..");
 }
 
+// True once BUYERS came from server/data/buyers.json, i.e. the same DB python_ml compiles
+// into its buyer index (so inference can be asked for the "whole universe" by reference).
+let loadedFromDb = false;
+
+export function buyersLoadedFromDb() {
+  return loadedFromDb;
+}
+
 export function loadBuyers(): BuyerProfile[] {
   try {
     const filePath = path.join(repoRoot(), "server", "data", "buyers.json");
@@ -38,6 +46,7 @@ export function loadBuyers(): BuyerProfile[] {
       log.warn("buyers.json invalid; using fallback buyer list", { filePath });
       return FALLBACK_BUYERS;
     }
+    loadedFromDb = true;
     // shallow sanitize
     return buyers
       .filter((b: any) => b?.id && b?.name)
@@ -1,4 +1,4 @@
-import { spawn } from "node:child_process";
+import { ChildProcessWithoutNullStreams, spawn } from "node:child_process";
 import path from "node:path";
 import { BuyerProfile, DealInput } from "./types";
 import { log } from "./logger";
@@ -13,34 +13,328 @@ export type PythonBuyerScore = {
     dryPowderFit: number;
     activityLevel: number;
     ebitdaFit: number;
+    /** Share of the deal's strategyTags the buyer carries (0 when the deal has none). */
+    tagOverlap: number;
   };
+  /** Shadow model name -> that model's score for this buyer (requests sent with `shadow`). */
+  shadow?: Record<string, number>;
+  /** Logit contribution (weight × value) per model feature (requests sent with `explain`). */
+  contributions?: Partial<Record<keyof PythonBuyerScore["features"], number>>;
 };
 
 export type PythonInferResponse = {
   modelVersion: string;
+  /** Name of the model that served the request (requests sent with model / routingKey / shadow). */
+  model?: string;
+  /** Shadow model name -> modelVersion. */
+  shadowModels?: Record<string, string>;
+  /** Logit intercept; with a buyer's contributions it sums to the model's (pre-calibration) logit. */
+  contributionBias?: number;
+  buyerDbVersion?: string;
+  /** Handle for rescoreBuyersPython (worker mode, requests sent with `incremental: true`). */
+  dealFingerprint?: string;
+  /** Rescore only: whether the worker reused the cached matrix (false = full re-score). */
+  incremental?: boolean;
   scores: PythonBuyerScore[];
 };
 
+/**
+ * Which buyers to score: inline profiles, ids from the compiled buyer DB, or the whole DB.
+ */
+export type PythonInferRequest = {
+  deal: DealInput;
+  buyers?: BuyerProfile[];
+  buyerIds?: string[];
+  universe?: boolean;
+  /** Only return the K best buyers (sorted by score). */
+  topK?: number;
+  /** Hard mandate bits; buyers failing any of them are skipped before scoring. */
+  require?: Array<"sectorMatch" | "geoMatch" | "sizeFit" | "ebitdaFit">;
+  /** Keep this deal's full score matrix in the worker so dealSize / ebitda edits can be re-scored incrementally. */
+  incremental?: boolean;
+  /** Serve with a named model from the worker's INFER_MODELS instead of the primary one. */
+  model?: string;
+  /** Stable key (e.g. deal id) hashed onto the worker's INFER_AB_SPLIT when `model` is not set. */
+  routingKey?: string;
+  /** Also score the returned buyers with other loaded models (true = all of them); defaults to PYTHON_ML_SHADOW=1. */
+  shadow?: boolean | string[];
+  /** Return per-feature logit contributions for each buyer. */
+  explain?: boolean;
+  timeoutMs?: number;
+};
+
+/** Re-score a deal the worker has seen, sending only the changed fields. */
+export type PythonRescoreRequest = Omit<PythonInferRequest, "deal" | "incremental"> & {
+  baseDeal: string;
+  delta: Partial<DealInput>;
+};
+
+/** Columnar response body (`output: "columnar"`): one array per field instead of one object per buyer. */
+type PythonColumnarResponse = {
+  modelVersion: string;
+  model?: string;
+  shadowModels?: Record<string, string>;
+  contributionBias?: number;
+  buyerDbVersion?: string;
+  dealFingerprint?: string;
+  incremental?: boolean;
+  buyerIds: string[];
+  scores: number[];
+  features?: Partial<Record<keyof PythonBuyerScore["features"], number[]>>;
+  shadow?: Record<string, number[]>;
+  contributions?: Partial<Record<keyof PythonBuyerScore["features"], number[]>>;
+};
+
+function requestBody(opts: PythonInferRequest | PythonRescoreRequest): Record<string, unknown> {
+  const target =
+    "baseDeal" in opts
+      ? { baseDeal: opts.baseDeal, delta: opts.delta }
+      : { deal: opts.deal, ...(opts.incremental ? { incremental: true } : {}) };
+  const shadow = opts.shadow ?? (wantShadow() || undefined);
+  const options = {
+    // columnar is much cheaper to serialize and JSON.parse than per-buyer objects on big universes
+    output: "columnar",
+    ...(opts.topK !== undefined ? { topK: opts.topK } : {}),
+    ...(opts.require?.length ? { require: opts.require } : {}),
+    ...(opts.model ? { model: opts.model } : {}),
+    ...(opts.routingKey ? { routingKey: opts.routingKey } : {}),
+    ...(shadow ? { shadow } : {}),
+    ...(opts.explain ? { explain: true } : {}),
+    ...(wantTimings() ? { timings: true } : {}),
+  };
+  if (opts.universe) return { ...target, universe: true, ...options };
+  if (opts.buyerIds) return { ...target, buyerIds: opts.buyerIds, ...options };
+  return { ...target, buyers: opts.buyers ?? [], ...options };
+}
+
+function wantTimings() {
+  // PYTHON_ML_TIMINGS=1: infer.py returns a per-stage breakdown, logged with each request
+  return (process.env.PYTHON_ML_TIMINGS || "").trim() === "1";
+}
+
+function wantShadow() {
+  // PYTHON_ML_SHADOW=1: score every request with all loaded models and log how far they drift
+  return (process.env.PYTHON_ML_SHADOW || "").trim() === "1";
+}
+
+/** Mean |shadow - served| score per shadow model, for logging. */
+function shadowDrift(parsed: PythonInferResponse): Record<string, number> | undefined {
+  if (!parsed.shadowModels || !parsed.scores.length) return undefined;
+  const drift: Record<string, number> = {};
+  for (const name of Object.keys(parsed.shadowModels)) {
+    const total = parsed.scores.reduce((acc, s) => acc + Math.abs((s.shadow?.[name] ?? s.score) - s.score), 0);
+    drift[name] = total / parsed.scores.length;
+  }
+  return drift;
+}
+
+function requestSize(opts: PythonInferRequest | PythonRescoreRequest): number | "universe" {
+  if (opts.universe) return "universe";
+  return opts.buyerIds?.length ?? opts.buyers?.length ?? 0;
+}
+
 function clamp01(x: number) {
   if (!Number.isFinite(x)) return 0;
   return Math.max(0, Math.min(1, x));
 }
 
-export async function inferBuyerScoresPython(opts: {
-  deal: DealInput;
-  buyers: BuyerProfile[];
-  timeoutMs?: number;
-}): Promise<PythonInferResponse> {
+function repoScriptPath() {
+  const repoRoot = path.resolve(__dirname, "..", "..");
+  return path.join(repoRoot, "python_ml", "infer.py");
+}
+
+function fromColumnar(cols: PythonColumnarResponse): PythonBuyerScore[] {
+  const f = cols.features || {};
+  return cols.buyerIds.map((buyerId, i) => ({
+    buyerId,
+    score: cols.scores?.[i],
+    features: {
+      sectorMatch: f.sectorMatch?.[i] ?? 0,
+      geoMatch: f.geoMatch?.[i] ?? 0,
+      sizeFit: f.sizeFit?.[i] ?? 0,
+      dryPowderFit: f.dryPowderFit?.[i] ?? 0,
+      activityLevel: f.activityLevel?.[i] ?? 0,
+      ebitdaFit: f.ebitdaFit?.[i] ?? 0,
+      tagOverlap: f.tagOverlap?.[i] ?? 0,
+    },
+    ...(cols.shadow
+      ? { shadow: Object.fromEntries(Object.entries(cols.shadow).map(([name, vals]) => [name, vals[i]])) }
+      : {}),
+    ...(cols.contributions
+      ? { contributions: Object.fromEntries(Object.entries(cols.contributions).map(([name, vals]) => [name, vals?.[i] ?? 0])) }
+      : {}),
+  }));
+}
+
+function sanitizeResponse(raw: PythonInferResponse | PythonColumnarResponse): PythonInferResponse {
+  const parsed: PythonInferResponse = {
+    modelVersion: raw.modelVersion,
+    ...(raw.model !== undefined ? { model: raw.model } : {}),
+    ...(raw.shadowModels !== undefined ? { shadowModels: raw.shadowModels } : {}),
+    ...(raw.contributionBias !== undefined ? { contributionBias: Number(raw.contributionBias) } : {}),
+    ...(raw.buyerDbVersion !== undefined ? { buyerDbVersion: raw.buyerDbVersion } : {}),
+    ...(raw.dealFingerprint !== undefined ? { dealFingerprint: raw.dealFingerprint } : {}),
+    ...(raw.incremental !== undefined ? { incremental: raw.incremental } : {}),
+    scores: "buyerIds" in raw && Array.isArray(raw.buyerIds) ? fromColumnar(raw) : (raw as PythonInferResponse).scores,
+  };
+  parsed.scores = (parsed.scores || []).map((s) => ({
+    ...s,
+    score: clamp01(Number(s.score)),
+    features: {
+      sectorMatch: clamp01(Number(s.features?.sectorMatch)),
+      geoMatch: clamp01(Number(s.features?.geoMatch)),
+      sizeFit: clamp01(Number(s.features?.sizeFit)),
+      dryPowderFit: clamp01(Number(s.features?.dryPowderFit)),
+      activityLevel: clamp01(Number(s.features?.activityLevel)),
+      ebitdaFit: clamp01(Number(s.features?.ebitdaFit)),
+      tagOverlap: clamp01(Number(s.features?.tagOverlap)),
+    },
+    ...(s.shadow
+      ? { shadow: Object.fromEntries(Object.entries(s.shadow).map(([name, v]) => [name, clamp01(Number(v))])) }
+      : {}),
+  }));
+  return parsed;
+}
+
+type PendingRequest = {
+  resolve: (r: PythonInferResponse) => void;
+  reject: (e: Error) => void;
+  timer: NodeJS.Timeout;
+  startedAt: number;
+};
+
+/**
+ * Resident `infer.py --worker` process: artifacts are loaded once and requests are
+ * multiplexed over newline-delimited JSON, matched back up by request id.
+ */
+class PythonInferWorker {
+  private child: ChildProcessWithoutNullStreams | null = null;
+  private pending = new Map<string, PendingRequest>();
+  private stdoutBuf = "";
+  private nextId = 1;
+
+  private ensureStarted(): ChildProcessWithoutNullStreams {
+    if (this.child) return this.child;
+
+    const scriptPath = repoScriptPath();
+    log.info("Python inference worker start", { scriptPath });
+    // default stdio is all pipes
+    const child = spawn("python3", [scriptPath, "--worker"], { env: process.env });
+    this.child = child;
+    this.stdoutBuf = "";
+
+    child.stdout.on("data", (d) => {
+      this.stdoutBuf += d.toString("utf-8");
+      let idx = this.stdoutBuf.indexOf("\n");
+      while (idx >= 0) {
+        const line = this.stdoutBuf.slice(0, idx);
+        this.stdoutBuf = this.stdoutBuf.slice(idx + 1);
+        if (line.trim()) this.handleLine(line);
+        idx = this.stdoutBuf.indexOf("\n");
+      }
+    });
+    child.stderr.on("data", (d) => log.warn("Python inference worker stderr", { stderr: d.toString("utf-8").slice(0, 2000) }));
+    child.stdin.on("error", (err) => this.failAll(child, err));
+    child.on("error", (err) => this.failAll(child, err));
+    child.on("close", (code) => {
+      log.warn("Python inference worker exited", { code, pending: this.pending.size });
+      this.failAll(child, new Error(`Python ML worker exited (code=${code})`));
+    });
+    return child;
+  }
+
+  private failAll(child: ChildProcessWithoutNullStreams, err: Error) {
+    if (this.child !== child) return;
+    this.child = null;
+    if (child.exitCode === null) child.kill("SIGKILL");
+    for (const [id, p] of this.pending) {
+      clearTimeout(p.timer);
+      p.reject(err);
+      this.pending.delete(id);
+    }
+  }
+
+  private handleLine(line: string) {
+    let msg: any;
+    try {
+      msg = JSON.parse(line);
+    } catch (e: any) {
+      log.error("Python inference worker sent invalid JSON", { message: e?.message || String(e), line: line.slice(0, 500) });
+      return;
+    }
+    const id = String(msg?.id ?? "");
+    const p = this.pending.get(id);
+    if (!p) return; // timed out or unknown id
+    this.pending.delete(id);
+    clearTimeout(p.timer);
+    if (msg.error) {
+      log.error("Python inference failed", { ms: Date.now() - p.startedAt, error: String(msg.error).slice(0, 2000) });
+      return p.reject(new Error(`Python ML inference failed: ${msg.error}`));
+    }
+    const parsed = sanitizeResponse(msg);
+    const drift = shadowDrift(parsed);
+    log.info("Python inference ok", {
+      ms: Date.now() - p.startedAt,
+      modelVersion: msg.modelVersion,
+      worker: true,
+      ...(msg.model ? { model: msg.model } : {}),
+      ...(drift ? { shadowDrift: drift } : {}),
+      ...(msg.timings ? { timings: msg.timings } : {}),
+    });
+    p.resolve(parsed);
+  }
+
+  request(body: Record<string, unknown>, timeoutMs: number): Promise<PythonInferResponse> {
+    const child = this.ensureStarted();
+    const id = String(this.nextId++);
+    return new Promise((resolve, reject) => {
+      const timer = setTimeout(() => {
+        this.pending.delete(id);
+        reject(new Error(`Python ML inference timed out after ${timeoutMs}ms`));
+      }, timeoutMs);
+      this.pending.set(id, { resolve, reject, timer, startedAt: Date.now() });
+      child.stdin.write(JSON.stringify({ id, ...body }) + "\n");
+    });
+  }
+}
+
+let sharedWorker: PythonInferWorker | null = null;
+
+function useWorker() {
+  // Set PYTHON_ML_WORKER=0 to fall back to one process per request.
+  return (process.env.PYTHON_ML_WORKER || "1").trim() !== "0";
+}
+
+export async function inferBuyerScoresPython(opts: PythonInferRequest): Promise<PythonInferResponse> {
   const timeoutMs = opts.timeoutMs ?? 6000;
+  if (!useWorker()) return inferBuyerScoresPythonOneShot(opts);
 
-  const repoRoot = path.resolve(__dirname, "..", "..");
-  const scriptPath = path.join(repoRoot, "python_ml", "infer.py");
+  if (!sharedWorker) sharedWorker = new PythonInferWorker();
+  log.info("Python inference start", { buyers: requestSize(opts), worker: true });
+  return await sharedWorker.request(requestBody(opts), timeoutMs);
+}
+
+/**
+ * Incremental re-score against the shared worker. The base deal only lives in that process, so there
+ * is no one-shot fallback; on error, callers should re-send the full deal via inferBuyerScoresPython.
+ */
+export async function rescoreBuyersPython(opts: PythonRescoreRequest): Promise<PythonInferResponse> {
+  if (!useWorker()) throw new Error("Incremental re-scoring needs the Python ML worker (PYTHON_ML_WORKER=0)");
+  if (!sharedWorker) sharedWorker = new PythonInferWorker();
+  log.info("Python rescore start", { buyers: requestSize(opts), worker: true, delta: Object.keys(opts.delta) });
+  return await sharedWorker.request(requestBody(opts), opts.timeoutMs ?? 6000);
+}
 
-  const payload = JSON.stringify({ deal: opts.deal, buyers: opts.buyers });
+async function inferBuyerScoresPythonOneShot(opts: PythonInferRequest): Promise<PythonInferResponse> {
+  const timeoutMs = opts.timeoutMs ?? 6000;
+
+  const scriptPath = repoScriptPath();
+
+  const payload = JSON.stringify(requestBody(opts));
 
   return await new Promise((resolve, reject) => {
     const startedAt = Date.now();
-    log.info("Python inference start", { scriptPath, buyers: opts.buyers.length });
+    log.info("Python inference start", { scriptPath, buyers: requestSize(opts) });
 
     const child = spawn("python3", [scriptPath], {
       stdio: ["pipe", "pipe", "pipe"],
@@ -74,21 +368,18 @@ export async function inferBuyerScoresPython(opts: {
         return reject(new Error(`Python ML inference failed (code=${code}): ${stderr || stdout}`));
       }
       try {
-        const parsed = JSON.parse(stdout) as PythonInferResponse;
-        // sanitize
-        parsed.scores = (parsed.scores || []).map((s) => ({
-          ...s,
-          score: clamp01(Number(s.score)),
-          features: {
-            sectorMatch: clamp01(Number(s.features?.sectorMatch)),
-            geoMatch: clamp01(Number(s.features?.geoMatch)),
-            sizeFit: clamp01(Number(s.features?.sizeFit)),
-            dryPowderFit: clamp01(Number(s.features?.dryPowderFit)),
-            activityLevel: clamp01(Number(s.features?.activityLevel)),
-            ebitdaFit: clamp01(Number(s.features?.ebitdaFit)),
-          },
-        }));
-        log.info("Python inference ok", { ms: Date.now() - startedAt, modelVersion: parsed.modelVersion });
+        const raw = JSON.parse(stdout);
+        const parsed = sanitizeResponse(raw);
+        const ms = Date.now() - startedAt;
+        const drift = shadowDrift(parsed);
+        log.info("Python inference ok", {
+          ms,
+          modelVersion: parsed.modelVersion,
+          ...(parsed.model ? { model: parsed.model } : {}),
+          ...(drift ? { shadowDrift: drift } : {}),
+          // whatever infer.py did not account for is interpreter start + pipe overhead
+          ...(raw.timings ? { timings: raw.timings, startupMs: Math.max(0, ms - Number(raw.timings.totalMs || 0)) } : {}),
+        });
         resolve(parsed);
       } catch (e: any) {
         log.error("Python inference parse failed", { ms: Date.now() - startedAt, message: e?.message || String(e) });
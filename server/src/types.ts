@@ -35,6 +35,8 @@ export interface DealInput {
   revenue: number;
   dealSize: number;
   description: string;
+  // Optional deal-side strategy tags (e.g. "roll-up", "carve-out"); scored against buyer strategyTags.
+  strategyTags?: string[];
   // Original metrics as provided in source text (currency + scale). Default currency: INR.
   provided?: {
     currency: string; // INR (default), USD, EUR